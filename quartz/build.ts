@@ -1,6 +1,7 @@
 import sourceMapSupport from "source-map-support"
 sourceMapSupport.install(options)
 import path from "path"
+import fs from "fs"
 import { PerfTimer } from "./util/perf"
 import { rm } from "fs/promises"
 import { GlobbyFilterFunction, isGitIgnored } from "globby"
@@ -33,6 +34,26 @@ type ContentMap = Map<
     }
 >
 
+// Written to the content folder by `python -m scripts watch` while it syncs an export.
+// Rebuilds wait until it is removed, so the whole sync lands as one rebuild.
+const SYNC_MARKER = ".sync-in-progress"
+
+function syncInProgress(contentDir: string): boolean {
+  let pid: number
+  try {
+    pid = parseInt(fs.readFileSync(path.join(contentDir, SYNC_MARKER), "utf8"), 10)
+  } catch {
+    return false
+  }
+  // a marker left behind by a sync that died does not hold rebuilds
+  try {
+    process.kill(pid, 0)
+    return true
+  } catch (err) {
+    return (err as NodeJS.ErrnoException).code === "EPERM"
+  }
+}
+
 type BuildData = {
   ctx: BuildCtx
   ignored: GlobbyFilterFunction
@@ -143,6 +164,7 @@ async function startWatching(
   }
 
   const watcher = chokidar.watch(".", {
+    // scripts/watch.py keeps its sync marker for longer than this (MARKER_LINGER_S)
     awaitWriteFinish: { stabilityThreshold: 250 },
     persistent: true,
     cwd: argv.directory,
@@ -165,6 +187,10 @@ async function startWatching(
     })
     .on("unlink", (fp) => {
       fp = toPosixPath(fp)
+      if (fp === SYNC_MARKER) {
+        if (changes.length > 0) void rebuild(changes, clientRefresh, buildData)
+        return
+      }
       if (buildData.ignored(fp)) return
       changes.push({ path: fp as FilePath, type: "delete" })
       void rebuild(changes, clientRefresh, buildData)
@@ -191,6 +217,12 @@ async function rebuild(changes: ChangeEvent[], clientRefresh: () => void, buildD
     return
   }
 
+  // a sync is still writing pages; its changes are rebuilt together once it finishes
+  if (syncInProgress(argv.directory)) {
+    release()
+    return
+  }
+
   const perf = new PerfTimer()
   perf.addEvent("rebuild")
   console.log(styleText("yellow", "Detected change, rebuilding..."))
@@ -1,5 +1,12 @@
 import { resolveRelative, FullSlug } from "../util/path"
-import { extractFirstImageSrc, resolveImageToAbsolute } from "../util/image"
+import {
+  buildSrcset,
+  findImageDerivatives,
+  ImageDerivatives,
+  pickDerivative,
+  placeholderStyle,
+} from "../util/image"
+import { pageImage } from "../util/collections"
 import { QuartzComponent, QuartzComponentProps } from "./types"
 import { SortFn, byDateAndAlphabetical } from "./PageList"
 
@@ -8,7 +15,17 @@ type Props = {
   sort?: SortFn
 } & QuartzComponentProps
 
-export const GalleryList: QuartzComponent = ({ cfg, fileData, allFiles, limit, sort }: Props) => {
+// Cards are ~200px wide on desktop, half the viewport on mobile
+const cardSizes = "(max-width: 600px) 50vw, 300px"
+
+export const GalleryList: QuartzComponent = ({
+  ctx,
+  cfg,
+  fileData,
+  allFiles,
+  limit,
+  sort,
+}: Props) => {
   const sorter = sort ?? byDateAndAlphabetical(cfg)
   let list = allFiles.sort(sorter)
   if (limit) {
@@ -20,17 +37,36 @@ export const GalleryList: QuartzComponent = ({ cfg, fileData, allFiles, limit, s
       {list.map((page) => {
         const title = page.frontmatter?.title
         const href = resolveRelative(fileData.slug!, page.slug!)
-        const rawSrc = extractFirstImageSrc(page)
-        let imageSrc: string | null = null
-        if (rawSrc && page.slug) {
-          const abs = resolveImageToAbsolute(rawSrc, page.slug)
-          imageSrc = abs ? resolveRelative(fileData.slug!, abs as FullSlug) : null
-        }
+        const toUrl = (p: string) => resolveRelative(fileData.slug!, p as FullSlug)
+        // From the collection index when the page is in it; otherwise read from the page
+        const abs = pageImage(ctx, page)
+        const imageSrc: string | null = abs ? toUrl(abs) : null
+        const derived: ImageDerivatives | null = abs ? findImageDerivatives(ctx, abs) : null
+        const fallbackJpeg = derived ? pickDerivative(derived.jpeg, 640) : null
 
         return (
           <a href={href} class="gallery-card internal">
             <div class="gallery-card-image">
-              {imageSrc ? (
+              {derived && imageSrc ? (
+                <picture>
+                  <source
+                    type="image/webp"
+                    srcset={buildSrcset(derived.webp, toUrl)}
+                    sizes={cardSizes}
+                  />
+                  <img
+                    src={fallbackJpeg ? toUrl(fallbackJpeg) : imageSrc}
+                    srcset={derived.jpeg.length > 0 ? buildSrcset(derived.jpeg, toUrl) : undefined}
+                    sizes={cardSizes}
+                    width={derived.width}
+                    height={derived.height}
+                    style={placeholderStyle(derived)}
+                    alt={title ?? ""}
+                    loading="lazy"
+                    decoding="async"
+                  />
+                </picture>
+              ) : imageSrc ? (
                 <img src={imageSrc} alt={title ?? ""} loading="lazy" />
               ) : (
                 <div class="gallery-card-placeholder">
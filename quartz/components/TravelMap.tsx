@@ -1,6 +1,6 @@
 import { QuartzComponent, QuartzComponentConstructor, QuartzComponentProps } from "./types"
-import { FullSlug } from "../util/path"
-import { extractFirstImageSrc, resolveImageToAbsolute } from "../util/image"
+import { findImageDerivatives, pickDerivative, placeholderStyle } from "../util/image"
+import { findCollectionEntry, loadMapClusters, pageImage } from "../util/collections"
 // @ts-ignore
 import script from "./scripts/travelmap.inline"
 import style from "./styles/travelMap.scss"
@@ -24,42 +24,63 @@ export default ((userOpts?: Partial<TravelMapOptions>) => {
   const opts = { ...defaultOptions, ...userOpts }
 
   const TravelMap: QuartzComponent = (props: QuartzComponentProps) => {
-    const { allFiles, fileData } = props
+    const { allFiles, fileData, ctx } = props
 
-    // Collect pages with coordinates
-    const locations = allFiles
-      .filter((file) => {
-        const fm = file.frontmatter as Record<string, unknown> | undefined
-        if (!fm?.coordinates) return false
-        const coords = fm.coordinates as number[]
+    // Collect pages with coordinates; indexed pages skip the frontmatter and image lookups
+    const located = allFiles
+      .map((file) => ({ file, entry: findCollectionEntry(ctx, file.slug) }))
+      .filter(({ file, entry }) => {
+        const coords = entry
+          ? entry.coordinates
+          : (file.frontmatter as Record<string, unknown> | undefined)?.coordinates
         if (!Array.isArray(coords) || coords.length !== 2) return false
         if (opts.folderFilter && !file.slug?.startsWith(opts.folderFilter)) return false
         return true
       })
-      .map((file) => {
-        const fm = file.frontmatter as Record<string, unknown>
-        const coords = fm.coordinates as number[]
-        const rawImg = extractFirstImageSrc(file)
-        const image = rawImg && file.slug ? resolveImageToAbsolute(rawImg, file.slug as FullSlug) : null
-        const date = (fm.date as string) ?? null
-        return {
-          title: file.frontmatter?.title ?? file.slug ?? "",
-          slug: file.slug ?? "",
-          lat: coords[0],
-          lng: coords[1],
-          image,
-          date,
-        }
-      })
+    if (located.length === 0) return null
+
+    // Precomputed clusters hold exactly the indexed places: the client then fetches the clusters
+    // of its zoom level, and the popups of the places, and only draws those in view.
+    // Otherwise every marker, with its popup, is placed on load.
+    const clusters = loadMapClusters(ctx)
+    const clustered =
+      clusters !== null &&
+      clusters.bounds !== null &&
+      !opts.folderFilter &&
+      clusters.places === located.length &&
+      located.every(({ entry }) => entry !== null)
 
-    if (locations.length === 0) return null
+    const locations = clustered
+      ? null
+      : located.map(({ file, entry }) => {
+          const fm = file.frontmatter as Record<string, unknown>
+          const coords = (entry ? entry.coordinates : fm.coordinates) as number[]
+          const original = pageImage(ctx, file)
+          // Popups are ~220px wide: prefer the smallest resized copy over the original photo
+          const derived = original ? findImageDerivatives(ctx, original) : null
+          const image = (derived && pickDerivative(derived.webp, 320)) ?? original
+          const date = entry ? entry.date : ((fm.date as string) ?? null)
+          return {
+            title: entry?.title ?? file.frontmatter?.title ?? file.slug ?? "",
+            slug: file.slug ?? "",
+            lat: coords[0],
+            lng: coords[1],
+            image,
+            placeholder: placeholderStyle(derived) ?? null,
+            date,
+          }
+        })
 
     return (
       <div class="travel-map-container">
         {opts.title && <h3 class="travel-map-title">{opts.title}</h3>}
         <div
           id="travel-map"
-          data-locations={JSON.stringify(locations)}
+          data-locations={locations ? JSON.stringify(locations) : undefined}
+          data-clusters={clustered ? "assets/derived/map" : undefined}
+          data-cluster-version={clustered ? clusters.hash : undefined}
+          data-max-zoom={clustered ? clusters.maxZoom : undefined}
+          data-bounds={clustered ? JSON.stringify(clusters.bounds) : undefined}
           style={`height: ${opts.height}px;`}
         />
       </div>
@@ -28,15 +28,59 @@ interface LocationData {
   lat: number
   lng: number
   image: string | null
+  /** Inline style painting a blurry preview until the image loads */
+  placeholder: string | null
   date: string | null
 }
 
+/** One marker of a precomputed zoom level, as written by scripts/build_map_clusters.py */
+interface ClusterData {
+  lat: number
+  lng: number
+  count: number
+  /** [south, west, north, east] of the places in the cluster */
+  bounds: [number, number, number, number]
+  /** Pages in the cluster, for single places and small clusters only */
+  slugs: string[] | null
+}
+
+// Cluster and popup files already fetched and parsed, by URL (shared by every map on the site)
+const mapFiles = new Map<string, Promise<unknown>>()
+
+function fetchMapFile<T>(url: string, parse: (data: any) => T): Promise<T> {
+  let file = mapFiles.get(url) as Promise<T> | undefined
+  if (!file) {
+    file = fetch(url)
+      .then((res) => {
+        if (!res.ok) throw new Error(`${res.status} fetching ${url}`)
+        return res.json()
+      })
+      .then(parse)
+    // a failed fetch is retried on the next move instead of being cached
+    file.catch(() => mapFiles.delete(url))
+    mapFiles.set(url, file)
+  }
+  return file
+}
+
+function fetchClusters(url: string): Promise<ClusterData[]> {
+  return fetchMapFile(url, (data) => data.clusters as ClusterData[])
+}
+
+/** Popup data of every place, by slug, as written by scripts/build_map_clusters.py */
+function fetchPlaces(url: string): Promise<Map<string, LocationData>> {
+  return fetchMapFile(
+    url,
+    (data) => new Map((data.places as LocationData[]).map((loc) => [loc.slug, loc])),
+  )
+}
+
 function buildPopupContent(loc: LocationData, currentSlug: string): string {
   const resolvedHref = resolveRelative(currentSlug as any, loc.slug as any)
   const resolvedImg = loc.image ? resolveRelative(currentSlug as any, loc.image as any) : null
-  const imgHtml = resolvedImg
-    ? `<div class="map-preview-img"><img src="${resolvedImg}" alt="${loc.title}" loading="lazy" /></div>`
-    : ""
+  const style = loc.placeholder ? ` style='${loc.placeholder}'` : ""
+  const img = `<img src="${resolvedImg}" alt="${loc.title}"${style} loading="lazy" />`
+  const imgHtml = resolvedImg ? `<div class="map-preview-img">${img}</div>` : ""
   const dateHtml = loc.date ? `<div class="map-preview-date">${loc.date}</div>` : ""
   return `<a href="${resolvedHref}" class="map-preview-card internal" data-slug="${loc.slug}">
     ${imgHtml}
@@ -48,11 +92,11 @@ function buildPopupContent(loc: LocationData, currentSlug: string): string {
 }
 
 function renderMap(container: HTMLElement) {
+  // With clusters, the places come with them instead of with the page
   const raw = container.getAttribute("data-locations")
-  if (!raw) return
-
-  const locations: LocationData[] = JSON.parse(raw)
-  if (locations.length === 0) return
+  const clusterBase = container.getAttribute("data-clusters")
+  const locations: LocationData[] = raw ? JSON.parse(raw) : []
+  if (!clusterBase && locations.length === 0) return
 
   loadLeafletCSS()
 
@@ -72,10 +116,9 @@ function renderMap(container: HTMLElement) {
     maxZoom: 18,
   }).addTo(map)
 
-  // Add markers with hover previews
-  const markers: L.Marker[] = []
-  for (const loc of locations) {
-    const marker = L.marker([loc.lat, loc.lng], { icon: defaultIcon }).addTo(map)
+  // A marker with a hover preview; clicking it opens the page
+  function placeMarker(loc: LocationData): L.Marker {
+    const marker = L.marker([loc.lat, loc.lng], { icon: defaultIcon })
 
     const popup = L.popup({
       closeButton: false,
@@ -106,7 +149,15 @@ function renderMap(container: HTMLElement) {
       window.location.href = href
     })
 
-    markers.push(marker)
+    return marker
+  }
+
+  if (clusterBase) {
+    renderClusters(map, container, clusterBase, placeMarker, currentSlug)
+  } else {
+    // Every place gets its own marker up front
+    const markers = locations.map((loc) => placeMarker(loc).addTo(map))
+    map.fitBounds(L.featureGroup(markers).getBounds().pad(0.15))
   }
 
   // Keep popup open when hovering over it
@@ -125,12 +176,6 @@ function renderMap(container: HTMLElement) {
     }
   })
 
-  // Fit map to show all markers with padding
-  if (markers.length > 0) {
-    const group = L.featureGroup(markers)
-    map.fitBounds(group.getBounds().pad(0.15))
-  }
-
   // Enable scroll zoom after first click on map
   map.once("click", () => {
     map.scrollWheelZoom.enable()
@@ -152,6 +197,97 @@ function renderMap(container: HTMLElement) {
   return map
 }
 
+/**
+ * Draw the precomputed clusters of the current zoom level, only those in (or near) the view.
+ * Single places get a normal marker; a cluster zooms to its places when clicked, or lists them
+ * when they are too close together to separate.
+ */
+function renderClusters(
+  map: L.Map,
+  container: HTMLElement,
+  base: string,
+  placeMarker: (loc: LocationData) => L.Marker,
+  currentSlug: string,
+) {
+  const version = container.getAttribute("data-cluster-version") ?? ""
+  const maxZoom = parseInt(container.getAttribute("data-max-zoom") ?? "0", 10)
+  const [south, west, north, east] = JSON.parse(container.getAttribute("data-bounds")!) as number[]
+  const baseUrl = resolveRelative(currentSlug as any, base as any)
+  let bySlug = new Map<string, LocationData>()
+  const layer = L.layerGroup().addTo(map)
+  const placeMarkers = new Map<string, L.Marker>()
+  // Zooms past the last precomputed level reuse its clusters
+  const level = () => Math.min(Math.max(Math.round(map.getZoom()), 0), maxZoom)
+
+  function clusterMarker(cluster: ClusterData): L.Marker {
+    const size = cluster.count < 10 ? 32 : cluster.count < 50 ? 38 : 46
+    const marker = L.marker([cluster.lat, cluster.lng], {
+      icon: L.divIcon({
+        html: `<span>${cluster.count}</span>`,
+        className: "map-cluster",
+        iconSize: [size, size],
+      }),
+    })
+    const [s, w, n, e] = cluster.bounds
+    // Too many to list, or spread out enough that zooming in will split them
+    const separable = cluster.slugs === null || (map.getZoom() < maxZoom && (s !== n || w !== e))
+    if (separable) {
+      marker.on("click", () => map.fitBounds(L.latLngBounds([s, w], [n, e]).pad(0.2)))
+    } else {
+      const links = (cluster.slugs ?? [])
+        .map((slug) => bySlug.get(slug))
+        .filter((loc): loc is LocationData => loc !== undefined)
+        .map((loc) => {
+          const href = resolveRelative(currentSlug as any, loc.slug as any)
+          return `<li><a href="${href}" class="internal">${loc.title}</a></li>`
+        })
+      marker.bindPopup(`<ul class="map-cluster-list">${links.join("")}</ul>`, { closeButton: false })
+    }
+    return marker
+  }
+
+  // Place markers are reused as the map moves, keeping their popups
+  function markerFor(loc: LocationData): L.Marker {
+    let marker = placeMarkers.get(loc.slug)
+    if (!marker) {
+      marker = placeMarker(loc)
+      placeMarkers.set(loc.slug, marker)
+    }
+    return marker
+  }
+
+  async function update() {
+    const zoom = level()
+    const [places, clusters] = await Promise.allSettled([
+      fetchPlaces(`${baseUrl}/places.json?v=${version}`),
+      fetchClusters(`${baseUrl}/${zoom}.json?v=${version}`),
+    ])
+    // without the popups there is nothing to show; both are fetched again on the next move
+    if (places.status === "rejected") return
+    bySlug = places.value
+    if (clusters.status === "rejected") {
+      // cluster file not deployed or unreachable: show every place instead
+      layer.clearLayers()
+      for (const loc of bySlug.values()) layer.addLayer(markerFor(loc))
+      return
+    }
+    // the map moved on while the file was loading
+    if (zoom !== level()) return
+
+    const view = map.getBounds().pad(0.25)
+    layer.clearLayers()
+    for (const cluster of clusters.value) {
+      if (!view.contains([cluster.lat, cluster.lng])) continue
+      const loc = cluster.count === 1 && cluster.slugs ? bySlug.get(cluster.slugs[0]) : undefined
+      layer.addLayer(loc ? markerFor(loc) : clusterMarker(cluster))
+    }
+  }
+
+  map.fitBounds(L.latLngBounds([south, west], [north, east]).pad(0.15))
+  map.on("moveend", () => void update())
+  void update()
+}
+
 document.addEventListener("nav", () => {
   const container = document.getElementById("travel-map")
   if (!container) return
@@ -0,0 +1,144 @@
+import fs from "fs"
+import path from "path"
+import { createHash } from "crypto"
+import { QuartzPluginData } from "../plugins/vfile"
+import { BuildCtx } from "./ctx"
+import { extractFirstImageSrc, resolveImageToAbsolute } from "./image"
+
+/** One collection page, as written by scripts/build_collection_index.py */
+export interface CollectionEntry {
+  /** "travel", "books", "movies" or "short-stories" */
+  collection: string
+  /** Source file relative to the content folder, and its sha1, size and mtime when indexed */
+  file: string
+  hash: string
+  size?: number
+  /** Nanoseconds since the epoch, as a string (absent in indexes written before it was recorded) */
+  mtime_ns?: string
+  title: string
+  date: string | null
+  coordinates: [number, number] | null
+  /** Cover or first image as a path from the vault root (as resolveImageToAbsolute returns it) */
+  image: string | null
+}
+
+type CollectionIndex = Record<string, CollectionEntry>
+
+const INDEX_VERSION = 1
+
+const indexCache = new Map<string, { mtimeMs: number; buildId: string; pages: CollectionIndex }>()
+
+/**
+ * Whether a page's source file is still the one indexed. Its size and mtime are compared first,
+ * as the Python scripts record them; the file is only read and hashed when those moved, e.g.
+ * after a checkout that rewrote it with the same bytes.
+ */
+function unchanged(contentDir: string, entry: CollectionEntry): boolean {
+  const fp = path.join(contentDir, entry.file)
+  let stat: fs.BigIntStats
+  try {
+    stat = fs.statSync(fp, { bigint: true })
+  } catch {
+    return false
+  }
+  if (entry.size !== undefined && stat.size !== BigInt(entry.size)) return false
+  if (entry.mtime_ns !== undefined && stat.mtimeNs.toString() === entry.mtime_ns) return true
+  try {
+    return createHash("sha1").update(fs.readFileSync(fp)).digest("hex") === entry.hash
+  } catch {
+    return false
+  }
+}
+
+/**
+ * Load the collection index from content/assets/derived/collections.json, keyed by slug.
+ * Entries whose source file changed since the index was built are dropped, so callers fall
+ * back to reading the page itself. Checked once per build; empty if the index is missing.
+ */
+export function loadCollectionIndex(ctx: BuildCtx): CollectionIndex {
+  const contentDir = ctx.argv.directory
+  const fp = path.join(contentDir, "assets", "derived", "collections.json")
+  let mtimeMs: number
+  try {
+    mtimeMs = fs.statSync(fp).mtimeMs
+  } catch {
+    return {}
+  }
+
+  const cached = indexCache.get(fp)
+  if (cached && cached.mtimeMs === mtimeMs && cached.buildId === ctx.buildId) return cached.pages
+
+  const pages: CollectionIndex = {}
+  try {
+    const index = JSON.parse(fs.readFileSync(fp, "utf8"))
+    if (index.version === INDEX_VERSION) {
+      for (const [slug, entry] of Object.entries(index.pages as CollectionIndex)) {
+        if (unchanged(contentDir, entry)) pages[slug] = entry
+      }
+    }
+  } catch {
+    // malformed or partially written index: read the pages instead
+  }
+  indexCache.set(fp, { mtimeMs, buildId: ctx.buildId, pages })
+  return pages
+}
+
+/** The indexed entry for a page, or null if it is not in the collection index (or is stale). */
+export function findCollectionEntry(
+  ctx: BuildCtx,
+  slug: string | undefined,
+): CollectionEntry | null {
+  if (!slug) return null
+  return loadCollectionIndex(ctx)[slug] ?? null
+}
+
+/**
+ * A page's cover or first image as a path from the vault root.
+ * Taken from the collection index when possible, else extracted from the page.
+ */
+export function pageImage(ctx: BuildCtx, page: QuartzPluginData): string | null {
+  const entry = findCollectionEntry(ctx, page.slug)
+  if (entry) return entry.image
+  const rawSrc = extractFirstImageSrc(page)
+  return rawSrc && page.slug ? resolveImageToAbsolute(rawSrc, page.slug) : null
+}
+
+/** Summary of the travel map's marker clusters, as written by scripts/build_map_clusters.py */
+export interface MapClusterIndex {
+  /** Changes whenever any cluster file does; appended to their URLs for cache busting */
+  hash: string
+  /** Number of pages with coordinates the clusters were built from */
+  places: number
+  /** Zooms 0..maxZoom have a file at assets/derived/map/<zoom>.json; popups are in places.json */
+  maxZoom: number
+  /** [south, west, north, east] of every place, or null if there are none */
+  bounds: [number, number, number, number] | null
+}
+
+const MAP_VERSION = 2
+
+const mapCache = new Map<string, { mtimeMs: number; index: MapClusterIndex | null }>()
+
+/** The map cluster summary from content/assets/derived/map/index.json, or null if not built. */
+export function loadMapClusters(ctx: BuildCtx): MapClusterIndex | null {
+  const fp = path.join(ctx.argv.directory, "assets", "derived", "map", "index.json")
+  let mtimeMs: number
+  try {
+    mtimeMs = fs.statSync(fp).mtimeMs
+  } catch {
+    return null
+  }
+
+  const cached = mapCache.get(fp)
+  if (cached && cached.mtimeMs === mtimeMs) return cached.index
+
+  let index: MapClusterIndex | null = null
+  try {
+    const data = JSON.parse(fs.readFileSync(fp, "utf8"))
+    if (data.version === MAP_VERSION) index = data
+  } catch {
+    // malformed or partially written: place every marker on the client instead
+  }
+  mapCache.set(fp, { mtimeMs, index })
+  return index
+}
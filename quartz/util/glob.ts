@@ -6,17 +6,25 @@ export function toPosixPath(fp: string): string {
   return fp.split(path.sep).join("/")
 }
 
+/**
+ * Folders the sync scripts generate inside the content folder (image derivatives, collection
+ * index, map clusters). They are gitignored but still part of the site.
+ */
+const generatedDirs = ["assets/derived"]
+
 export async function glob(
   pattern: string,
   cwd: string,
   ignorePatterns: string[],
 ): Promise<FilePath[]> {
-  const fps = (
-    await globby(pattern, {
-      cwd,
-      ignore: ignorePatterns,
-      gitignore: true,
-    })
-  ).map(toPosixPath)
-  return fps as FilePath[]
+  const fps = await globby(pattern, {
+    cwd,
+    ignore: ignorePatterns,
+    gitignore: true,
+  })
+  const generated = await globby(generatedDirs.map((dir) => `${dir}/${pattern}`), {
+    cwd,
+    ignore: ignorePatterns,
+  })
+  return [...new Set([...fps, ...generated].map(toPosixPath))] as FilePath[]
 }
@@ -1,5 +1,8 @@
+import fs from "fs"
+import path from "path"
 import { FullSlug } from "./path"
 import { QuartzPluginData } from "../plugins/vfile"
+import { BuildCtx } from "./ctx"
 import { visit } from "unist-util-visit"
 import { Root, Element } from "hast"
 
@@ -48,3 +51,80 @@ export function resolveImageToAbsolute(imageSrc: string, pageSlug: FullSlug): st
     return null
   }
 }
+
+/** Resized copies of a source image, as written by scripts/build_image_derivatives.py */
+export interface ImageDerivatives {
+  width: number
+  height: number
+  /** 16px WebP data URI and dominant colour, shown while loading (absent in older manifests) */
+  placeholder?: string
+  color?: string
+  /** [path from the vault root, width] pairs, smallest first */
+  jpeg: [string, number][]
+  webp: [string, number][]
+}
+
+type DerivativeManifest = Record<string, ImageDerivatives>
+
+const manifestCache = new Map<string, { mtimeMs: number; manifest: DerivativeManifest }>()
+
+/**
+ * Load the responsive image manifest from content/assets/derived/manifest.json.
+ * Re-read only when the file changes; empty if the derivative step has not been run.
+ */
+export function loadImageDerivatives(contentDir: string): DerivativeManifest {
+  const fp = path.join(contentDir, "assets", "derived", "manifest.json")
+  let mtimeMs: number
+  try {
+    mtimeMs = fs.statSync(fp).mtimeMs
+  } catch {
+    return {}
+  }
+
+  const cached = manifestCache.get(fp)
+  if (cached && cached.mtimeMs === mtimeMs) return cached.manifest
+
+  let manifest: DerivativeManifest = {}
+  try {
+    manifest = JSON.parse(fs.readFileSync(fp, "utf8"))
+  } catch {
+    // malformed or partially written manifest: serve originals
+  }
+  manifestCache.set(fp, { mtimeMs, manifest })
+  return manifest
+}
+
+/**
+ * Find the derivatives for an image given its absolute path from the vault root
+ * (as returned by resolveImageToAbsolute).
+ */
+export function findImageDerivatives(ctx: BuildCtx, absPath: string): ImageDerivatives | null {
+  let key = absPath
+  try {
+    key = decodeURI(absPath)
+  } catch {
+    // keep the raw path
+  }
+  return loadImageDerivatives(ctx.argv.directory)[key] ?? null
+}
+
+/** Build a srcset attribute from [path, width] pairs. */
+export function buildSrcset(entries: [string, number][], toUrl: (p: string) => string): string {
+  return entries.map(([p, w]) => `${toUrl(p)} ${w}w`).join(", ")
+}
+
+/** Pick the smallest entry at least minWidth wide (or the largest available). */
+export function pickDerivative(entries: [string, number][], minWidth: number): string | null {
+  if (entries.length === 0) return null
+  return (entries.find(([, w]) => w >= minWidth) ?? entries[entries.length - 1])[0]
+}
+
+/**
+ * Inline style painting an image's placeholder behind it: the blurry thumbnail scaled to cover,
+ * over the dominant colour. It is hidden by the real image once that has loaded.
+ */
+export function placeholderStyle(derived: ImageDerivatives | null): string | undefined {
+  if (!derived?.color) return undefined
+  const thumb = derived.placeholder ? ` url("${derived.placeholder}") center / cover no-repeat` : ""
+  return `background:${derived.color}${thumb}`
+}
@@ -0,0 +1,11 @@
+"""
+Sync tooling for the Quartz content folder (books, travel pages, images).
+
+Run everything through the single entry point:
+
+    python -m scripts status
+    python -m scripts books travel-sync travel-update
+    python -m scripts --dry-run books
+
+Individual modules also run on their own, e.g. ``python -m scripts.gazetteer build <dump>``.
+"""
@@ -0,0 +1,332 @@
+"""
+Reference graph between the markdown pages and the files they embed or link.
+
+One walk of the content folder lists every file and reads every page
+once; a single compiled pattern picks up all references:
+- wiki embeds and links: ![[IMG_1.jpg|300]], [[Smart_Brevity.pdf]]
+- markdown images and links: ![cover](covers/A.jpg), [clip](<Halifax/DJI 1.mp4>)
+- HTML tags: <img src="...">, <video src="...">, <a href="...">
+- frontmatter image keys: image, cover, socialImage
+
+Only references to files (a target with an extension other than .md) are
+followed. A reference resolves the way Obsidian and Quartz's "shortest"
+link resolution do: a bare name matches that file name anywhere in the
+vault, a path is tried relative to the page and then to the vault root.
+
+Reported:
+- orphans: files in content/assets that no page references
+- dangling references: file references that resolve to nothing
+
+With --prune, orphaned assets are deleted (they stay in git history).
+With --dedupe, assets with identical bytes are merged: the shortest name
+is kept, every embed of the other copies is rewritten to it and the copies
+are deleted (the asset store only deduplicates new imports).
+
+Run with: python -m scripts assets [--prune] [--dedupe]
+"""
+
+import os
+import posixpath
+import re
+import urllib.parse
+from collections import defaultdict
+
+from . import config, metrics
+from .assetstore import AssetStore
+from .pageindex import header_fields
+from .pagewriter import PageWriter
+
+CONTENT_DIR = config.CONTENT_DIR
+ASSETS_DIR = config.ASSETS_DIR
+
+REFERENCE = re.compile(
+    r'!?\[\[(?P<wiki>[^\]|#^\n]+)[^\]\n]*\]\]'
+    r'|!?\[[^\]\n]*\]\(\s*(?:<(?P<angled>[^>\n]+)>|(?P<link>[^)\s]+))(?:\s+"[^"]*")?\s*\)'
+    r'|<(?:img|video|audio|source|embed|a)\s[^>]*?(?:src|href)=["\'](?P<html>[^"\']+)'
+)
+FENCED_CODE = re.compile(r'^(```|~~~).*?^\1', re.S | re.M)
+# Frontmatter keys holding an image path relative to the page
+IMAGE_KEYS = ("image", "cover", "socialImage")
+# "name.jpg" but not "St. John's": a short alphanumeric extension
+FILE_EXT = re.compile(r'\.[A-Za-z0-9]{1,5}$')
+# http:, mailto:, data:, obsidian: ...
+SCHEME = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*:')
+# An image key's line in the frontmatter, value optionally quoted
+IMAGE_LINE = re.compile(r'^(?:%s):[ \t]*([\'"]?)(?P<value>.+?)\1[ \t]*$' % "|".join(IMAGE_KEYS), re.M)
+
+
+class AssetGraph:
+    """Files of the vault, the file references of each page and what they resolve to."""
+
+    def __init__(self):
+        self.pages = 0
+        self.references = 0
+        self.files = set()                 # vault-relative paths (posix)
+        self.by_name = defaultdict(list)   # file name -> paths
+        self.by_lower = defaultdict(list)  # lowercase path and name -> paths
+        self.used_by = defaultdict(set)    # path -> pages referencing it
+        self.dangling = []                 # (page, reference)
+
+    def add_file(self, rel):
+        self.files.add(rel)
+        name = posixpath.basename(rel)
+        self.by_name[name].append(rel)
+        self.by_lower[rel.lower()].append(rel)
+        self.by_lower[name.lower()].append(rel)
+
+    def resolve(self, target, page_dir):
+        """Paths a reference may point to (all of them when a bare name is ambiguous)."""
+        if "/" not in target:
+            return self.by_name.get(target) or self.by_lower.get(target.lower(), [])
+        for candidate in (posixpath.normpath(posixpath.join(page_dir, target)),
+                          posixpath.normpath(target.lstrip("/"))):
+            if candidate in self.files:
+                return [candidate]
+        # Case-insensitive filesystems (macOS) forgive a wrong case; so do we
+        for candidate in (posixpath.normpath(posixpath.join(page_dir, target)),
+                          posixpath.normpath(target.lstrip("/"))):
+            if candidate.lower() in self.by_lower:
+                return self.by_lower[candidate.lower()]
+        return []
+
+    def assets(self):
+        """Vault paths of the files directly in content/assets."""
+        rel_dir = os.path.relpath(ASSETS_DIR, CONTENT_DIR).replace(os.sep, "/")
+        return sorted(p for p in self.files if posixpath.dirname(p) == rel_dir)
+
+    def orphans(self):
+        """Assets that no page references."""
+        return [p for p in self.assets() if p not in self.used_by]
+
+
+def page_references(content):
+    """File references in a page: frontmatter images, then embeds and links in the body."""
+    refs = []
+    body = content
+    if content.startswith("---"):
+        end = content.find("\n---", 3)
+        if end != -1:
+            fields = header_fields(content[:end + 4], IMAGE_KEYS)
+            refs += [v.strip("'\"") for k in IMAGE_KEYS if (v := fields.get(k))]
+            body = content[end + 4:]
+    body = FENCED_CODE.sub("", body)
+    for m in REFERENCE.finditer(body):
+        refs.append(m.group("wiki") or m.group("angled") or m.group("link") or m.group("html"))
+    return refs
+
+
+def file_target(ref):
+    """The path a reference names if it points at a file (not a page, anchor or URL), else None."""
+    ref = ref.strip()
+    if not ref or ref.startswith("#") or SCHEME.match(ref):
+        return None
+    target = urllib.parse.unquote(ref.split("#")[0].split("?")[0]).strip()
+    if not FILE_EXT.search(target) or target.lower().endswith(".md"):
+        return None
+    return target
+
+
+def renamed(raw, path, kind):
+    """raw reference text pointing at the vault file path instead, keeping anchors and encoding."""
+    cut = min((i for i in (raw.find("#"), raw.find("?")) if i != -1), default=len(raw))
+    target, suffix = raw[:cut], raw[cut:]
+    head = target[:target.rfind("/") + 1]
+    name = posixpath.basename(path)
+    # Links in (...) cannot hold spaces; keep percent-encoding where the original used it
+    if "%" in target[len(head):] or (kind == "link" and " " in name):
+        name = urllib.parse.quote(name)
+    return head + name + suffix
+
+
+def rewrite_references(content, page_dir, graph, renames):
+    """Return (content with references to renamed files rewritten, renamed files it still points at).
+
+    Only references that resolve to exactly one renamed file are rewritten; anything
+    ambiguous is left alone and its file reported, so it is not deleted.
+    """
+    kept = set()
+    edits = []  # (start, end, replacement)
+
+    def visit(raw, start, end, kind, base):
+        target = file_target(raw)
+        if target is None:
+            return
+        resolved = graph.resolve(target, page_dir)
+        hits = [p for p in resolved if p in renames]
+        if not hits:
+            return
+        if len(resolved) != 1:
+            kept.update(hits)
+            return
+        new_path = renames[hits[0]]
+        new_raw = renamed(raw, new_path, kind)
+        # A bare name must still resolve to the kept file alone
+        if "/" not in target and len(graph.by_name.get(posixpath.basename(new_path), ())) > 1:
+            new_raw = new_path
+        if graph.resolve(file_target(new_raw), page_dir) != [new_path]:
+            kept.add(hits[0])
+            return
+        edits.append((base + start, base + end, new_raw))
+
+    body_start = 0
+    if content.startswith("---"):
+        end = content.find("\n---", 3)
+        if end != -1:
+            body_start = end + 4
+            for m in IMAGE_LINE.finditer(content, 0, body_start):
+                visit(m.group("value"), *m.span("value"), "frontmatter", 0)
+    body = content[body_start:]
+    fenced = [m.span() for m in FENCED_CODE.finditer(body)]
+    for m in REFERENCE.finditer(body):
+        if any(a <= m.start() < b for a, b in fenced):
+            continue
+        kind = next(g for g in ("wiki", "angled", "link", "html") if m.group(g))
+        visit(m.group(kind), *m.span(kind), kind, body_start)
+
+    for start, end, new_raw in sorted(edits, reverse=True):
+        content = content[:start] + new_raw + content[end:]
+    return content, kept
+
+
+def duplicate_assets(graph):
+    """{duplicate path: path kept} for assets whose bytes match another asset's."""
+    rel_dir = os.path.relpath(ASSETS_DIR, CONTENT_DIR).replace(os.sep, "/")
+    store = AssetStore(ASSETS_DIR)
+    store.save()
+    by_digest = defaultdict(list)
+    for name, digest in store.by_name.items():
+        path = f"{rel_dir}/{name}"
+        if path in graph.files:
+            by_digest[digest].append(path)
+    renames = {}
+    for paths in by_digest.values():
+        keep = min(paths, key=lambda p: (len(p), p))
+        renames.update((p, keep) for p in paths if p != keep)
+    return renames
+
+
+def dedupe(graph, dry_run=False):
+    """Point every embed of a duplicate asset at one copy and delete the others."""
+    with metrics.phase("assets.dedupe"):
+        renames = duplicate_assets(graph)
+    metrics.count("assets.duplicates", len(renames))
+    if not renames:
+        print("\nNo duplicate assets")
+        return
+    print(f"\nDuplicate assets: {len(renames)} ({size_mb(renames):.1f} MB)")
+    for path, keep in sorted(renames.items()):
+        print(f"  {posixpath.basename(path)} -> {posixpath.basename(keep)}")
+
+    pages = sorted(set().union(*(graph.used_by.get(p, ()) for p in renames)))
+    kept = set()
+    rewritten = 0
+    with PageWriter() as writer:
+        for page in pages:
+            path = os.path.join(CONTENT_DIR, page)
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+            new_content, still_used = rewrite_references(content, posixpath.dirname(page), graph, renames)
+            kept |= still_used
+            if new_content != content:
+                rewritten += 1
+                if not dry_run:
+                    writer.write(path, new_content)
+    metrics.count("assets.dedupe_pages", rewritten)
+
+    removable = sorted(p for p in renames if p not in kept)
+    for path in sorted(kept):
+        print(f"  Kept {posixpath.basename(path)}: a reference to it could not be rewritten")
+    if dry_run:
+        print(f"Would rewrite {rewritten} pages and delete {len(removable)} duplicates "
+              f"({size_mb(removable):.1f} MB)")
+        return
+    freed = size_mb(removable)
+    for path in removable:
+        os.remove(os.path.join(CONTENT_DIR, path))
+    metrics.count("assets.deduped", len(removable))
+    print(f"Rewrote {rewritten} pages, deleted {len(removable)} duplicates ({freed:.1f} MB)")
+
+
+def build_graph():
+    """Walk the content folder once and return its AssetGraph."""
+    graph = AssetGraph()
+    pages = []
+    with metrics.phase("assets.list"):
+        for dirpath, dirnames, filenames in os.walk(CONTENT_DIR):
+            # Hidden folders (.obsidian) and generated files are not part of the vault
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")
+                           and os.path.join(dirpath, d) != config.DERIVED_DIR]
+            rel_dir = os.path.relpath(dirpath, CONTENT_DIR).replace(os.sep, "/")
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue
+                rel = filename if rel_dir == "." else f"{rel_dir}/{filename}"
+                graph.add_file(rel)
+                if filename.endswith(".md"):
+                    pages.append(rel)
+
+    with metrics.phase("assets.scan_pages"):
+        for page in pages:
+            with open(os.path.join(CONTENT_DIR, page), "r", encoding="utf-8", errors="replace") as f:
+                content = f.read()
+            graph.pages += 1
+            page_dir = posixpath.dirname(page)
+            for ref in page_references(content):
+                target = file_target(ref)
+                if target is None:
+                    continue
+                graph.references += 1
+                resolved = graph.resolve(target, page_dir)
+                if not resolved:
+                    graph.dangling.append((page, ref))
+                for path in resolved:
+                    graph.used_by[path].add(page)
+    metrics.count("assets.pages", graph.pages)
+    metrics.count("assets.references", graph.references)
+    return graph
+
+
+def size_mb(paths):
+    return sum(os.path.getsize(os.path.join(CONTENT_DIR, p)) for p in paths) / 1e6
+
+
+def main(prune=False, dedupe_assets=False, dry_run=False):
+    graph = build_graph()
+    orphans = graph.orphans()
+    assets = graph.assets()
+    metrics.count("assets.orphans", len(orphans))
+    metrics.count("assets.dangling", len(graph.dangling))
+
+    print(f"Pages: {graph.pages}, file references: {graph.references}")
+    print(f"Assets: {len(assets)} files ({size_mb(assets):.1f} MB), "
+          f"orphaned: {len(orphans)} ({size_mb(orphans):.1f} MB)")
+
+    if orphans:
+        print("\nOrphaned assets (no page references them):")
+        for path in sorted(orphans, key=lambda p: -os.path.getsize(os.path.join(CONTENT_DIR, p))):
+            print(f"  {posixpath.basename(path)}  "
+                  f"({os.path.getsize(os.path.join(CONTENT_DIR, path)) / 1e6:.2f} MB)")
+
+    if graph.dangling:
+        print(f"\nDangling references ({len(graph.dangling)}):")
+        for page, ref in sorted(graph.dangling):
+            print(f"  {page}: {ref}")
+
+    if dedupe_assets:
+        dedupe(graph, dry_run)
+        if prune:
+            # Deleted duplicates and rewritten pages change what is orphaned
+            graph = build_graph()
+            orphans = graph.orphans()
+
+    if not prune or not orphans:
+        return
+    if dry_run:
+        print(f"\nWould delete {len(orphans)} orphaned assets")
+        return
+    freed = size_mb(orphans)
+    for path in orphans:
+        os.remove(os.path.join(CONTENT_DIR, path))
+    metrics.count("assets.pruned", len(orphans))
+    print(f"\nDeleted {len(orphans)} orphaned assets ({freed:.1f} MB). "
+          f"`python -m scripts images` drops their derivatives.")
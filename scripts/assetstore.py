@@ -0,0 +1,217 @@
+"""
+Content-addressed import of images into the flat content/assets folder.
+
+Every file is streamed through SHA-256 before it is imported:
+- content already in assets is not copied again; the existing name is reused
+- a different file whose name is already taken gets a "-<hash8>" suffix instead of colliding
+- new blobs are hard-linked (or reflinked) from the source when possible, copied otherwise
+- archive members are streamed in directly, hashing while they are written
+
+Digests of existing assets are cached by (size, mtime) in a JSON sidecar,
+so only new or modified assets are hashed on each run.
+"""
+
+import errno
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config, metrics
+from .pagewriter import TMP_SUFFIX
+
+INDEX_PATH = config.ASSET_INDEX_PATH
+
+HASH_CHUNK = 1 << 20
+IMPORT_WORKERS = 8
+
+# Linux FICLONE ioctl (copy-on-write clone on btrfs/xfs)
+FICLONE = 0x40049409
+
+
+def file_digest(path):
+    """Streaming SHA-256 of a file."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def link_or_copy(src, dest):
+    """Hard-link src to dest, else reflink, else copy. Returns the method used."""
+    try:
+        os.link(src, dest)
+        return "link"
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+            raise
+    try:
+        import fcntl
+        with open(src, "rb") as s, open(dest, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        shutil.copystat(src, dest)
+        return "reflink"
+    except (ImportError, OSError):
+        pass
+    shutil.copy2(src, dest)
+    return "copy"
+
+
+class AssetStore:
+    def __init__(self, assets_dir, index_path=INDEX_PATH, workers=IMPORT_WORKERS):
+        self.assets_dir = assets_dir
+        self.index_path = index_path
+        self.workers = workers
+        self.lock = threading.Lock()
+        # Notified whenever an import in flight finishes, successfully or not
+        self.placed = threading.Condition(self.lock)
+        self.by_name = {}    # filename -> digest
+        self.by_digest = {}  # digest -> filename
+        self.reserved = {}   # digest -> filename, for imports in flight
+        self._scan()
+
+    def _scan(self):
+        cached = {}
+        if self.index_path and os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+
+        to_hash = []
+        for entry in os.scandir(self.assets_dir):
+            # Temp files of an import that was killed are not assets
+            if not entry.is_file() or entry.name.endswith(TMP_SUFFIX):
+                continue
+            st = entry.stat()
+            prev = cached.get(entry.name)
+            if prev and prev[0] == st.st_size and prev[1] == st.st_mtime_ns:
+                self._add(entry.name, prev[2])
+            else:
+                to_hash.append(entry.name)
+
+        metrics.count("assets.hashed", len(to_hash))
+        with metrics.phase("assets.scan"), ThreadPoolExecutor(max_workers=self.workers) as pool:
+            digests = pool.map(lambda n: file_digest(os.path.join(self.assets_dir, n)), to_hash)
+            for name, digest in zip(to_hash, digests):
+                self._add(name, digest)
+
+    def _add(self, name, digest):
+        self.by_name[name] = digest
+        # Keep the first name seen for a blob as its canonical name
+        self.by_digest.setdefault(digest, name)
+
+    def _free_name(self, name, digest):
+        if name not in self.by_name and name not in self.reserved.values():
+            return name
+        stem, ext = os.path.splitext(name)
+        return f"{stem}-{digest[:8]}{ext}"
+
+    def _reserve(self, name, digest):
+        """Return (existing name, None) if the blob is already in assets, else (None, a free name).
+
+        Called with the lock held. If another thread is importing the same blob, wait for it.
+        The free name is only reserved: it is registered by _place once the file is in place.
+        """
+        while digest in self.reserved:
+            self.placed.wait()
+        existing = self.by_digest.get(digest)
+        if existing:
+            return existing, None
+        dest_name = self.reserved[digest] = self._free_name(name, digest)
+        return None, dest_name
+
+    def _place(self, digest, dest_name, put):
+        """Run put(dest path) for a reserved name; register the name only if it succeeds."""
+        dest = os.path.join(self.assets_dir, dest_name)
+        done = False
+        try:
+            result = put(dest)
+            done = True
+            return result
+        except FileExistsError:
+            raise
+        except BaseException:
+            # No half-copied file may stay behind under the name
+            if os.path.exists(dest):
+                os.remove(dest)
+            raise
+        finally:
+            with self.lock:
+                del self.reserved[digest]
+                if done:
+                    self._add(dest_name, digest)
+                self.placed.notify_all()
+
+    def import_file(self, src, name=None):
+        """Import src into assets and return its canonical asset filename."""
+        name = name or os.path.basename(src)
+        digest = file_digest(src)
+        with self.lock:
+            existing, dest_name = self._reserve(name, digest)
+        if existing:
+            metrics.count("assets.deduplicated")
+            return existing
+        method = self._place(digest, dest_name, lambda dest: link_or_copy(src, dest))
+        metrics.count("assets.imported")
+        metrics.count("assets.import_" + method)
+        return dest_name
+
+    def import_stream(self, opener, name):
+        """Import a file from a zero-argument callable returning a binary stream (e.g. a zip member).
+
+        The stream is hashed while it is spooled into the assets folder, so
+        nothing is extracted elsewhere first. Returns the canonical asset filename.
+        """
+        # A gitignored temp name, so Quartz's watcher does not pick it up
+        tmp = os.path.join(self.assets_dir, f".{name}.{os.getpid()}.{threading.get_ident()}{TMP_SUFFIX}")
+        try:
+            h = hashlib.sha256()
+            with opener() as src, open(tmp, "wb") as dest:
+                for chunk in iter(lambda: src.read(HASH_CHUNK), b""):
+                    h.update(chunk)
+                    dest.write(chunk)
+            digest = h.hexdigest()
+            with self.lock:
+                existing, dest_name = self._reserve(name, digest)
+            if existing:
+                metrics.count("assets.deduplicated")
+                return existing
+            self._place(digest, dest_name, lambda dest: os.replace(tmp, dest))
+        finally:
+            # Left over if the copy failed or the blob was already there
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        metrics.count("assets.imported")
+        metrics.count("assets.import_stream")
+        return dest_name
+
+    def import_files(self, sources):
+        """Import many files in parallel. Returns canonical names in the same order.
+
+        Each source is a file path or an (opener, name) pair for import_stream.
+        """
+        def run(source):
+            if isinstance(source, tuple):
+                return self.import_stream(*source)
+            return self.import_file(source)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(run, sources))
+
+    def save(self):
+        """Persist the digest cache for the next run."""
+        if not self.index_path:
+            return
+        data = {}
+        for name, digest in self.by_name.items():
+            try:
+                st = os.stat(os.path.join(self.assets_dir, name))
+            except FileNotFoundError:
+                continue
+            data[name] = [st.st_size, st.st_mtime_ns, digest]
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.index_path)
@@ -0,0 +1,10 @@
+"""
+Benchmarks for the sync scripts, run entirely against local data.
+
+    python -m scripts.bench --sizes 1000,10000 --output baseline.json
+    python -m scripts.bench --sizes 1000 --compare baseline.json
+
+Each size gets a synthetic vault (vault.py) and a local stand-in for
+Open Library and Nominatim (standins.py). Every scenario runs in its own
+process, once cold and once warm (an immediate no-op rerun).
+"""
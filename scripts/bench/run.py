@@ -0,0 +1,164 @@
+"""Timed benchmark scenarios; results go to a JSON baseline that later runs can be compared with."""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from .. import config
+from .standins import StandinServer
+from .vault import generate
+
+# (name, CLI arguments); {export} is replaced by the vault's export zip
+SCENARIOS = [
+    ("books", ["--export", "{export}", "books"]),
+    ("travel-sync", ["--export", "{export}", "travel-sync"]),
+    ("travel-update", ["travel-update"]),
+]
+PASSES = ("cold", "warm")
+
+# A scenario this much slower than its baseline is reported as a regression,
+# unless the difference is within process start-up noise
+REGRESSION_THRESHOLD = 1.2
+NOISE_S = 0.1
+
+
+def run_scenario(args, env, log_path):
+    """Run `python -m scripts <args>` in a fresh process. Returns (exit code, wall seconds, peak RSS MiB)."""
+    with open(log_path, "ab") as log:
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-m", "scripts", *args], cwd=config.REPO_ROOT,
+                                env=env, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in KiB on Linux
+    return proc.returncode, wall, usage.ru_maxrss / 1024
+
+
+def bench_size(size, workdir, server, args):
+    root = os.path.join(workdir, str(size))
+    shutil.rmtree(root, ignore_errors=True)
+    print(f"\n== size {size}: generating vault ==")
+    start = time.perf_counter()
+    vault = generate(root, size, existing_ratio=args.existing_ratio, images_per_place=args.images)
+    vault["generate_s"] = round(time.perf_counter() - start, 3)
+    print(f"   {vault}")
+
+    env = {
+        **os.environ,
+        **server.env(),
+        "SYNC_CONTENT_DIR": os.path.join(root, "content"),
+        "SYNC_CACHE_DIR": os.path.join(root, "cache"),
+        "NOMINATIM_DELAY": str(args.nominatim_delay),
+    }
+    os.makedirs(env["SYNC_CACHE_DIR"], exist_ok=True)
+    export = os.path.join(root, "export.zip")
+    log_path = os.path.join(root, "sync.log")
+
+    results = []
+    for name, cli_args in SCENARIOS:
+        cli_args = [a.replace("{export}", export) for a in cli_args]
+        for pass_name in PASSES:
+            before = server.snapshot()
+            code, wall, rss = run_scenario(cli_args, env, log_path)
+            after = server.snapshot()
+            requests = {
+                api: {k: after[api][k] - before[api][k] for k in after[api]}
+                for api in after
+                if after[api]["requests"] != before[api]["requests"]
+            }
+            result = {
+                "size": size,
+                "scenario": name,
+                "pass": pass_name,
+                "exit_code": code,
+                "wall_s": round(wall, 3),
+                "peak_rss_mib": round(rss, 1),
+                "requests": requests,
+            }
+            # Phases and counters the command recorded about itself
+            report_path = os.path.join(env["SYNC_CACHE_DIR"], ".reports", f"{name}.json")
+            if os.path.exists(report_path):
+                with open(report_path, "r", encoding="utf-8") as f:
+                    report = json.load(f)
+                result["phases"] = report["phases"]
+                result["counters"] = report["counters"]
+            results.append(result)
+            print(f"   {name:14} {pass_name:5} {wall:8.2f}s {rss:8.1f} MiB  exit {code}  {requests}")
+    return vault, results
+
+
+def compare(results, baseline_path):
+    """Print wall-time ratios against a baseline; returns the number of regressions."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["size"], r["scenario"], r["pass"]): r for r in baseline["results"]}
+    regressions = 0
+    print(f"\n== compared with {baseline_path} ==")
+    for r in results:
+        prev = previous.get((r["size"], r["scenario"], r["pass"]))
+        if prev is None or not prev["wall_s"]:
+            continue
+        ratio = r["wall_s"] / prev["wall_s"]
+        flag = ""
+        if ratio > REGRESSION_THRESHOLD and r["wall_s"] - prev["wall_s"] > NOISE_S:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"   {r['size']:>7} {r['scenario']:14} {r['pass']:5} {prev['wall_s']:8.2f}s -> {r['wall_s']:8.2f}s"
+              f" (x{ratio:.2f}){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scripts.bench", description="Benchmark the sync scripts offline")
+    parser.add_argument("--sizes", default="1000", help="comma-separated vault sizes (books and places each)")
+    parser.add_argument("--existing-ratio", type=float, default=0.5, help="share of entries that already have pages")
+    parser.add_argument("--images", type=int, default=3, help="images per new travel page")
+    parser.add_argument("--latency", type=float, default=0.02, help="stand-in response latency (seconds)")
+    parser.add_argument("--search-rate", type=float, default=0, help="Open Library search rate limit (req/s, 0: none)")
+    parser.add_argument("--covers-rate", type=float, default=0, help="cover download rate limit (req/s, 0: none)")
+    parser.add_argument("--nominatim-rate", type=float, default=0, help="Nominatim rate limit (req/s, 0: none)")
+    parser.add_argument("--nominatim-delay", type=float, default=0, help="client delay between Nominatim requests")
+    parser.add_argument("--workdir", help="where vaults are generated (default: a temp dir, removed afterwards)")
+    parser.add_argument("--output", help="write results as JSON (e.g. a new baseline)")
+    parser.add_argument("--compare", help="baseline JSON to compare wall times with")
+    args = parser.parse_args(argv)
+
+    rates = {api: rate for api, rate in (("search", args.search_rate), ("covers", args.covers_rate),
+                                          ("nominatim", args.nominatim_rate)) if rate}
+    workdir = args.workdir or tempfile.mkdtemp(prefix="sync-bench-")
+    vaults, results = [], []
+    try:
+        with StandinServer(latency=args.latency, rates=rates) as server:
+            for size in (int(s) for s in args.sizes.split(",")):
+                vault, size_results = bench_size(size, workdir, server, args)
+                vaults.append(vault)
+                results.extend(size_results)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        "settings": {k: v for k, v in vars(args).items() if k not in ("workdir", "output", "compare")},
+        "vaults": vaults,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    failed = [r for r in results if r["exit_code"] != 0]
+    regressions = compare(results, args.compare) if args.compare else 0
+    if failed or regressions:
+        raise SystemExit(1)
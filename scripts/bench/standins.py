@@ -0,0 +1,131 @@
+"""
+Local stand-ins for Open Library (search and covers) and Nominatim.
+
+One threaded HTTP server answers all three APIs with deterministic fake
+data. Each request waits `latency` seconds, and requests beyond `rate`
+per second (token bucket, per API) get HTTP 429, as the real services
+would. Counts of requests and throttled requests are kept per API.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ..ratelimit import TokenBucket
+
+APIS = ("search", "covers", "nominatim")
+
+
+def _seed(text):
+    return int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "big")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        if url.path == "/search.json":
+            api = "search"
+        elif url.path.startswith("/b/id/"):
+            api = "covers"
+        elif url.path == "/search":
+            api = "nominatim"
+        else:
+            self._send(404, b"not found", "text/plain")
+            return
+
+        server = self.server
+        if not server.admit(api):
+            self._send(429, b"rate limited", "text/plain")
+            return
+        if server.latency:
+            time.sleep(server.latency)
+
+        if api == "search":
+            title = query.get("title", [""])[0]
+            docs = [{"title": title, "cover_i": _seed(title) % 10_000_000}]
+            self._send(200, json.dumps({"numFound": 1, "docs": docs}).encode(), "application/json")
+        elif api == "covers":
+            # Deterministic per cover id and big enough not to look like a placeholder
+            block = hashlib.sha256(url.path.encode()).digest()
+            self._send(200, block * (server.cover_bytes // len(block)), "image/jpeg")
+        else:
+            q = query.get("q", [""])[0]
+            seed = _seed(q)
+            results = [
+                {
+                    "place_id": seed % 1_000_000 + i,
+                    "lat": f"{8 + (seed >> (8 * i)) % 2700 / 100:.4f}",
+                    "lon": f"{70 + (seed >> (8 * i + 4)) % 2000 / 100:.4f}",
+                    "display_name": f"{q} {i}",
+                    "importance": round(1 / (i + 1), 3),
+                }
+                for i in range(min(int(query.get("limit", ["1"])[0]), 3))
+            ]
+            self._send(200, json.dumps(results).encode(), "application/json")
+
+
+class StandinServer(ThreadingHTTPServer):
+    """Serve the stand-in APIs on 127.0.0.1 from a background thread."""
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.02, rates=None, cover_bytes=8192):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.cover_bytes = cover_bytes
+        # rates: {api: requests per second}; unlisted APIs are unlimited
+        self.buckets = {api: TokenBucket(rate, burst=max(1, int(rate))) for api, rate in (rates or {}).items()}
+        self.lock = threading.Lock()
+        self.counts = {api: {"requests": 0, "throttled": 0} for api in APIS}
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def admit(self, api):
+        bucket = self.buckets.get(api)
+        allowed = bucket is None or bucket.try_acquire()
+        with self.lock:
+            self.counts[api]["requests"] += 1
+            if not allowed:
+                self.counts[api]["throttled"] += 1
+        return allowed
+
+    def snapshot(self):
+        with self.lock:
+            return {api: dict(c) for api, c in self.counts.items()}
+
+    def env(self):
+        """Environment variables that point the sync scripts at this server."""
+        port = self.server_address[1]
+        # Covers use a different host name so the client rate-limits them separately, as in production
+        return {
+            "OPENLIBRARY_URL": self.url,
+            "OPENLIBRARY_COVERS_URL": f"http://localhost:{port}",
+            "NOMINATIM_URL": self.url,
+        }
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
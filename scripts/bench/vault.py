@@ -0,0 +1,137 @@
+"""
+Synthetic vaults: a Quartz content/ tree plus the Notion export it syncs from.
+
+A vault of size N has N books and N travel places in the Notion export.
+A fraction of them already have pages in content/ (some travel pages
+without coordinates or dates, some books with "Invalid date" timelines),
+so each sync has creates, fixes and unchanged rows to work through.
+Titles are random word combinations, so fuzzy title matching behaves as
+it would on real data.
+"""
+
+import csv
+import io
+import os
+import random
+import zipfile
+
+NOTION_ID_CHARS = "0123456789abcdef"
+
+STATUSES = ["Finished", "Reading", "To Read", "Finished, Favorite"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+REGIONS = ["Himachal Pradesh", "Rajasthan", "Kerala", "Newfoundland", "Maharashtra", "Tamil Nadu"]
+
+
+def _vocabulary(rng, size=600):
+    syllables = ["ka", "ri", "mo", "an", "te", "lu", "shi", "ver", "dal", "no", "pra", "sen",
+                 "gor", "el", "tha", "mi", "ron", "ba", "qui", "zu", "fen", "ola", "dre", "kai"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 3))).capitalize())
+    return sorted(words)
+
+
+def _notion_id(rng):
+    return "".join(rng.choice(NOTION_ID_CHARS) for _ in range(32))
+
+
+def _notion_date(rng):
+    return f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {rng.randint(2012, 2025)}"
+
+
+def _titles(rng, words, count, length):
+    seen = set()
+    while len(seen) < count:
+        seen.add(" ".join(rng.choice(words) for _ in range(rng.randint(*length))))
+    return sorted(seen)
+
+
+def _csv_bytes(fieldnames, rows):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=fieldnames)
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue().encode("utf-8-sig")
+
+
+def generate(root, size, existing_ratio=0.5, images_per_place=3, image_bytes=16 * 1024, seed=0):
+    """Write <root>/content and <root>/export.zip (a zip of two Part-N zips). Returns a summary dict."""
+    rng = random.Random(seed)
+    words = _vocabulary(rng)
+    books_dir = os.path.join(root, "content", "My Library", "Books")
+    travel_dir = os.path.join(root, "content", "Travel and Photography")
+    for d in (os.path.join(books_dir, "covers"), travel_dir, os.path.join(root, "content", "assets")):
+        os.makedirs(d, exist_ok=True)
+
+    # --- Books ---
+    book_rows = []
+    existing_books = 0
+    for title in _titles(rng, words, size, (2, 5)):
+        row = {
+            "Title": title,
+            "Primary Author": " ".join(rng.choice(words) for _ in range(2)),
+            "Status": rng.choice(STATUSES),
+            "Favorite": rng.choice(["Yes", "No"]),
+            "Timeline": _notion_date(rng),
+            "Entry Date": _notion_date(rng),
+        }
+        book_rows.append(row)
+        if rng.random() < existing_ratio:
+            existing_books += 1
+            timeline = "Invalid date" if rng.random() < 0.2 else "2020-01-01"
+            with open(os.path.join(books_dir, f"{title}.md"), "w", encoding="utf-8") as f:
+                f.write(f"---\nimage: covers/{title.replace(' ', '_')}.jpg\nPrimary Author: {row['Primary Author']}\n"
+                        f"Status:\n  - Finished\nTimeline: {timeline}\nFavorite: false\n---\n\nNotes.\n")
+
+    # --- Travel ---
+    travel_rows = []
+    pages = {}
+    existing_places = 0
+    for name in _titles(rng, words, size, (1, 3)):
+        region = rng.choice(REGIONS)
+        travel_rows.append({"Name": name, "Date": _notion_date(rng), "Place": f"{name}, {region}",
+                            "Tags": rng.choice(["", "hike", "city, food", "temple"])})
+        if rng.random() < existing_ratio:
+            existing_places += 1
+            lines = ["---", f"title: {name}"]
+            if rng.random() < 0.7:
+                lines.append("Date: 2019-06-12")
+            if rng.random() < 0.7:
+                lines.append(f"coordinates: [{rng.uniform(8, 35):.4f}, {rng.uniform(70, 90):.4f}]")
+            lines += ["---", "", f"A trip to {name}.", ""]
+            with open(os.path.join(travel_dir, f"{name}.md"), "w", encoding="utf-8") as f:
+                f.write("\n".join(lines))
+        else:
+            pages[name] = _notion_id(rng)
+
+    # --- Notion export: CSVs in part 1, pages and images in part 2 ---
+    books_id, travel_id = _notion_id(rng), _notion_id(rng)
+    part1, part2 = io.BytesIO(), io.BytesIO()
+    with zipfile.ZipFile(part1, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr(f"Books/Books {books_id}_all.csv", _csv_bytes(list(book_rows[0]), book_rows))
+        z.writestr(f"Travel/Travel log {travel_id}.csv", _csv_bytes(list(travel_rows[0]), travel_rows))
+    images = 0
+    with zipfile.ZipFile(part2, "w", zipfile.ZIP_STORED) as z:
+        for name, page_id in pages.items():
+            body = [f"# {name}", "", f"Date: {_notion_date(rng)}", "", f"Notes from {name}.", ""]
+            for i in range(images_per_place):
+                filename = f"IMG_{i:04d}.jpg"
+                body.append(f"![{filename}]({name.replace(' ', '%20')}/{filename})")
+                z.writestr(f"Travel/Travel log {travel_id}/{name}/{filename}", os.urandom(image_bytes))
+                images += 1
+            z.writestr(f"Travel/Travel log {travel_id}/{name} {page_id}.md", "\n".join(body) + "\n")
+    export = os.path.join(root, "export.zip")
+    with zipfile.ZipFile(export, "w", zipfile.ZIP_STORED) as z:
+        z.writestr("Export-Part-1.zip", part1.getvalue())
+        z.writestr("Export-Part-2.zip", part2.getvalue())
+
+    return {
+        "size": size,
+        "books": len(book_rows),
+        "existing_books": existing_books,
+        "places": len(travel_rows),
+        "existing_places": existing_places,
+        "images": images,
+        "export_bytes": os.path.getsize(export),
+    }
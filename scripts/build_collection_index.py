@@ -0,0 +1,198 @@
+"""
+Build the collection index read by the TravelMap and GalleryList components.
+
+For every travel, book, movie and short story page, one compact record:
+- slug, title, date and coordinates from the frontmatter
+- the page's cover or first image, resolved the way Quartz resolves it
+  (frontmatter socialImage/image/cover, else the first image embedded in
+  the body, with "shortest" link resolution) to a path from the vault root
+- the source file, its size and mtime, and a hash of its bytes, so the
+  components can ignore records for pages edited since the index was built
+  (the hash is only checked when the size and mtime no longer match)
+
+The index is written to content/assets/derived/collections.json, only when
+it changes, along with the travel map's marker clusters (see
+build_map_clusters). The sync commands refresh it after they run.
+
+Run with: python -m scripts index
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import urllib.parse
+
+from . import config, frontmatter, metrics
+from .build_image_derivatives import slugify_path
+from .build_map_clusters import write_clusters
+from .markdown import BODY_IMAGE, EXTERNAL
+from .pagewriter import atomic_write, same_bytes
+
+CONTENT_DIR = config.CONTENT_DIR
+INDEX_PATH = os.path.join(config.DERIVED_DIR, "collections.json")
+INDEX_VERSION = 1
+
+COLLECTIONS = [
+    ("travel", config.TRAVEL_DIR),
+    ("books", config.BOOKS_DIR),
+    ("movies", config.MOVIES_DIR),
+    ("short-stories", config.SHORT_STORIES_DIR),
+]
+
+# Frontmatter keys checked before the body, in extractFirstImageSrc's order
+IMAGE_KEYS = ("socialImage", "image", "cover")
+# Wiki embeds Quartz renders as <img>
+EMBED_IMAGE_EXTS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.svg', '.webp'}
+
+# Characters a URL path keeps as-is (what `new URL(...).pathname` leaves unescaped)
+URL_PATH_SAFE = "/!$%&'()*+,:;=@[\\]^|"
+
+
+def page_slug(rel_path):
+    """Quartz slug of a markdown page: "My Library/Books/A B.md" -> "My-Library/Books/A-B"."""
+    return slugify_path(os.path.splitext(rel_path)[0])
+
+
+def url_path(path):
+    return urllib.parse.quote(path, safe=URL_PATH_SAFE)
+
+
+def resolve_frontmatter_image(src, slug):
+    """Port of resolveImageToAbsolute: src relative to the page's slug."""
+    if src.startswith(EXTERNAL):
+        return src
+    joined = urllib.parse.urljoin(f"https://base.com/{url_path(slug)}", src)
+    return urllib.parse.urlsplit(joined).path[1:]
+
+
+def resolve_body_image(src, by_name):
+    """Where Quartz's "shortest" link resolution sends an image embedded in a page body."""
+    if src.startswith(EXTERNAL):
+        return src
+    target = urllib.parse.unquote(src).split("#")[0]
+    segments = [s for s in target.split("/") if s and s not in (".", "..")]
+    target = slugify_path("/".join(segments))
+    # A bare file name resolves to the one file of that name anywhere in the vault
+    if "/" not in target:
+        matches = by_name.get(target, ())
+        if len(matches) == 1:
+            target = matches[0]
+    return url_path(target)
+
+
+def first_body_image(body):
+    """The first image reference in a page body, or None."""
+    for m in BODY_IMAGE.finditer(body):
+        if m.group("embed"):
+            name = m.group("embed").strip()
+            if os.path.splitext(name)[1].lower() in EMBED_IMAGE_EXTS:
+                return name
+            continue
+        return m.group("link") or m.group("html")
+    return None
+
+
+def file_slugs():
+    """Slugs of every file under content/, grouped by their last segment."""
+    by_name = {}
+    for dirpath, dirnames, filenames in os.walk(CONTENT_DIR):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        rel_dir = os.path.relpath(dirpath, CONTENT_DIR).replace(os.sep, "/")
+        for filename in filenames:
+            rel = filename if rel_dir == "." else f"{rel_dir}/{filename}"
+            slug = page_slug(rel) if filename.endswith(".md") else slugify_path(rel)
+            by_name.setdefault(slug.rsplit("/", 1)[-1], []).append(slug)
+    return by_name
+
+
+def as_date(value):
+    if value is None or value == "":
+        return None
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def as_coordinates(value):
+    if not isinstance(value, list) or len(value) != 2:
+        return None
+    try:
+        return [float(value[0]), float(value[1])]
+    except (TypeError, ValueError):
+        return None
+
+
+def index_page(collection, path, rel, by_name):
+    """Index record of one page."""
+    with open(path, "rb") as f:
+        # Before reading: an edit made in between leaves a newer mtime, and the hash then decides
+        st = os.fstat(f.fileno())
+        data = f.read()
+    fm, body = frontmatter.parse(data.decode("utf-8"))
+    slug = page_slug(rel)
+
+    image = None
+    for key in IMAGE_KEYS:
+        value = fm.get(key)
+        if isinstance(value, str) and value:
+            image = resolve_frontmatter_image(value, slug)
+            break
+    else:
+        src = first_body_image(body)
+        if src:
+            image = resolve_body_image(src, by_name)
+
+    title = fm.get("title")
+    return slug, {
+        "collection": collection,
+        "file": rel,
+        "hash": hashlib.sha1(data).hexdigest(),
+        "size": st.st_size,
+        # A string: nanoseconds since the epoch are beyond a JavaScript number's precision
+        "mtime_ns": str(st.st_mtime_ns),
+        "title": str(title) if title not in (None, "") else os.path.splitext(os.path.basename(rel))[0],
+        "date": as_date(fm.get("date")),
+        "coordinates": as_coordinates(fm.get("coordinates")),
+        "image": image,
+    }
+
+
+def build_index():
+    """Return {"version": ..., "pages": {slug: record}} for every collection page."""
+    by_name = file_slugs()
+    pages = {}
+    for collection, directory in COLLECTIONS:
+        if not os.path.isdir(directory):
+            continue
+        rel_dir = os.path.relpath(directory, CONTENT_DIR).replace(os.sep, "/")
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".md") and filename != "index.md":
+                slug, record = index_page(collection, os.path.join(directory, filename),
+                                          f"{rel_dir}/{filename}", by_name)
+                pages[slug] = record
+    return {"version": INDEX_VERSION, "pages": pages}
+
+
+def main(dry_run=False):
+    with metrics.phase("index.build"):
+        index = build_index()
+    pages = index["pages"]
+    counts = {}
+    for record in pages.values():
+        counts[record["collection"]] = counts.get(record["collection"], 0) + 1
+    metrics.count("index.pages", len(pages))
+    summary = ", ".join(f"{name}: {counts.get(name, 0)}" for name, _ in COLLECTIONS)
+    mapped = sum(1 for r in pages.values() if r["coordinates"])
+    print(f"Collection index: {len(pages)} pages ({summary}), {mapped} with coordinates")
+
+    data = json.dumps(index, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    if dry_run:
+        pass
+    elif same_bytes(INDEX_PATH, data):
+        print(f"  {os.path.relpath(INDEX_PATH, CONTENT_DIR)} is up to date")
+    else:
+        os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
+        atomic_write(INDEX_PATH, data)
+        print(f"  Wrote {os.path.relpath(INDEX_PATH, CONTENT_DIR)} ({len(data)} bytes)")
+
+    # The travel map's marker clusters are derived from the same records
+    write_clusters(pages, dry_run)
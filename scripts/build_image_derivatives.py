@@ -0,0 +1,188 @@
+"""
+Generate responsive image derivatives for gallery cards, map popups and library covers.
+
+For every raster image in content/assets and the library covers folders:
+- resize to several widths and recompress as JPEG and WebP
+- write the results to content/assets/derived, named by source hash
+- compute a placeholder shown while the image loads: a 16px WebP as a
+  data URI (about 150 bytes) and the image's dominant colour
+- record them with the image's size in content/assets/derived/manifest.json,
+  keyed by the source's Quartz slug, for the components to build srcset,
+  width/height and placeholder attributes
+
+Work is incremental by source hash and runs on a process pool. Requires Pillow.
+The derived folder is gitignored: the deploy workflow generates it before
+building the site.
+
+Run with: python -m scripts images
+"""
+
+import base64
+import io
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from . import config
+from .assetstore import file_digest
+
+CONTENT_DIR = config.CONTENT_DIR
+# Folders holding source images, relative to the vault root: assets and each collection's covers
+SOURCE_DIRS = [
+    os.path.relpath(path, CONTENT_DIR).replace(os.sep, "/")
+    for path in (config.ASSETS_DIR, config.COVERS_DIR, os.path.join(config.MOVIES_DIR, "covers"),
+                 os.path.join(config.SHORT_STORIES_DIR, "covers"))
+]
+OUTPUT_DIR = os.path.relpath(config.DERIVED_DIR, CONTENT_DIR).replace(os.sep, "/")
+MANIFEST_NAME = "manifest.json"
+
+RASTER_EXTS = {'.jpg', '.jpeg', '.png', '.webp'}
+WIDTHS = (320, 640, 1280)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+# Longest side of the placeholder image, its WebP quality and the palette its colour is picked from
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+PLACEHOLDER_COLORS = 4
+
+
+def slugify_path(fp):
+    """Python port of Quartz's slugifyFilePath for asset paths (extension kept)."""
+    segments = []
+    for segment in fp.strip("/").split("/"):
+        segment = re.sub(r'\s', '-', segment)
+        segment = segment.replace("&", "-and-").replace("%", "-percent")
+        segment = segment.replace("?", "").replace("#", "")
+        segments.append(segment)
+    return "/".join(segments)
+
+
+def placeholder(im):
+    """(data URI of a tiny WebP, dominant colour as #rrggbb) for a decoded image."""
+    from PIL import Image
+
+    thumb = im.copy()
+    thumb.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.BOX)
+    buf = io.BytesIO()
+    thumb.save(buf, "WEBP", quality=PLACEHOLDER_QUALITY)
+    uri = "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+    # The most common colour of a small palette, so a blue sky beats the average of sky and sand
+    palette_im = thumb.convert("RGB").quantize(colors=PLACEHOLDER_COLORS)
+    _, index = max(palette_im.getcolors())
+    r, g, b = palette_im.getpalette()[index * 3:index * 3 + 3]
+    return uri, f"#{r:02x}{g:02x}{b:02x}"
+
+
+def render_derivatives(src, digest, out_dir, widths=WIDTHS):
+    """Write resized JPEG/WebP copies of src. Runs in a worker process."""
+    from PIL import Image, ImageOps
+
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        width, height = im.size
+        has_alpha = im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info)
+        im = im.convert("RGBA" if has_alpha else "RGB")
+
+        uri, color = placeholder(im)
+        entry = {"width": width, "height": height, "placeholder": uri, "color": color, "jpeg": [], "webp": []}
+        for w in sorted({min(w, width) for w in widths}):
+            h = max(1, round(height * w / width))
+            resized = im if w == width else im.resize((w, h), Image.LANCZOS)
+            base = os.path.join(out_dir, f"{digest[:16]}-{w}")
+
+            if not os.path.exists(base + ".webp"):
+                resized.save(base + ".webp", "WEBP", quality=WEBP_QUALITY, method=4)
+            entry["webp"].append([f"{OUTPUT_DIR}/{digest[:16]}-{w}.webp", w])
+
+            # JPEG has no alpha channel; transparent images only get WebP plus the original
+            if not has_alpha:
+                if not os.path.exists(base + ".jpg"):
+                    resized.save(base + ".jpg", "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+                entry["jpeg"].append([f"{OUTPUT_DIR}/{digest[:16]}-{w}.jpg", w])
+    return entry
+
+
+def outputs_exist(entry):
+    return all(os.path.exists(os.path.join(CONTENT_DIR, p)) for p, _ in entry["jpeg"] + entry["webp"])
+
+
+def iter_sources():
+    """Yield (relative path, absolute path) of every raster source image."""
+    for rel_dir in SOURCE_DIRS:
+        abs_dir = os.path.join(CONTENT_DIR, rel_dir)
+        if not os.path.isdir(abs_dir):
+            continue
+        for entry in os.scandir(abs_dir):
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in RASTER_EXTS:
+                yield f"{rel_dir}/{entry.name}", entry.path
+
+
+def main(dry_run=False):
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        raise SystemExit("Pillow is required: pip install Pillow")
+
+    out_dir = os.path.join(CONTENT_DIR, OUTPUT_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+
+    manifest = {}
+    pending = {}
+    for rel, path in iter_sources():
+        slug = slugify_path(rel)
+        st = os.stat(path)
+        prev = previous.get(slug)
+        if prev and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+            digest = prev["hash"]
+        else:
+            digest = file_digest(path)
+        # Entries from before placeholders existed are rendered again (existing copies are kept)
+        if prev and prev["hash"] == digest and outputs_exist(prev) and "placeholder" in prev:
+            manifest[slug] = {**prev, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        else:
+            pending[slug] = (path, digest, st)
+
+    print(f"Images: {len(manifest) + len(pending)}, up to date: {len(manifest)}, to render: {len(pending)}")
+    if dry_run:
+        return
+
+    rendered = 0
+    with ProcessPoolExecutor() as pool:
+        futures = {
+            slug: pool.submit(render_derivatives, path, digest, out_dir)
+            for slug, (path, digest, _) in pending.items()
+        }
+        for slug, future in futures.items():
+            path, digest, st = pending[slug]
+            try:
+                entry = future.result()
+            except Exception as e:
+                print(f"  Could not process {path}: {e}")
+                continue
+            manifest[slug] = {"hash": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns, **entry}
+            rendered += 1
+
+    # Remove derivatives no longer referenced by any source (JSON indexes and the map folder live here too)
+    referenced = {os.path.basename(p) for e in manifest.values() for p, _ in e["jpeg"] + e["webp"]}
+    removed = 0
+    for name in os.listdir(out_dir):
+        path = os.path.join(out_dir, name)
+        if os.path.isfile(path) and not name.endswith(".json") and name not in referenced:
+            os.remove(path)
+            removed += 1
+
+    tmp = manifest_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp, manifest_path)
+
+    failed = f", {len(pending) - rendered} failed" if rendered < len(pending) else ""
+    print(f"Done! Rendered {rendered}{failed}, removed {removed} stale derivatives.")
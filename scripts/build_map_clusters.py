@@ -0,0 +1,178 @@
+"""
+Precompute marker clusters for the TravelMap component, one file per zoom level.
+
+Every page with coordinates in the collection index is projected to Web
+Mercator pixels; at each zoom, pages falling in the same CELL_PX grid cell
+become one cluster (placed at their mean position, with their bounds).
+The map fetches the file for its current zoom and only draws the clusters
+in view, instead of building a marker for every place on load.
+
+Written to content/assets/derived/map/:
+- <zoom>.json: {"zoom": z, "clusters": [{"lat", "lng", "count", "bounds", "slugs"}]}
+  ("slugs" lists the pages of clusters of up to MAX_LISTED places, else null)
+- places.json: {"places": [{"slug", "title", "lat", "lng", "date", "image",
+  "placeholder"}]}, what a place's popup shows, with the image already
+  swapped for its smallest resized copy at least POPUP_IMAGE_PX wide
+- index.json: what the component checks at build time: number of places,
+  zoom range, overall bounds and a version for cache busting
+
+The collection index step (python -m scripts index) writes them; files
+are only rewritten when they change.
+"""
+
+import hashlib
+import json
+import math
+import os
+import urllib.parse
+
+from . import config, metrics
+from .build_image_derivatives import MANIFEST_NAME
+from .pagewriter import atomic_write, same_bytes
+
+MAP_DIR = os.path.join(config.DERIVED_DIR, "map")
+MAP_VERSION = 2
+DERIVATIVES_PATH = os.path.join(config.DERIVED_DIR, MANIFEST_NAME)
+
+# Zooms 0..MAX_ZOOM get their own file; deeper zooms reuse the last one
+MAX_ZOOM = 14
+# Grid cell size in screen pixels: places closer than this (roughly) share a marker
+CELL_PX = 64
+TILE_PX = 256
+# Clusters this small list their pages, so places at one spot can be listed instead of zoomed into
+MAX_LISTED = 8
+# Web Mercator stops here
+MAX_LAT = 85.05112878
+# Popups are ~220px wide: prefer the smallest resized copy of at least this width over the original
+POPUP_IMAGE_PX = 320
+
+
+def project(lat, lng):
+    """Web Mercator position in [0, 1) x [0, 1) world units."""
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    x = (lng + 180) / 360
+    s = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + s) / (1 - s)) / (4 * math.pi)
+    return x, y
+
+
+def cluster_zoom(points, zoom):
+    """Grid clusters of (slug, lat, lng, x, y) points at one zoom, in a stable order."""
+    cells_per_world = TILE_PX * 2 ** zoom / CELL_PX
+    cells = {}
+    for point in points:
+        _, _, _, x, y = point
+        key = (min(int(x * cells_per_world), int(cells_per_world)), int(y * cells_per_world))
+        cells.setdefault(key, []).append(point)
+
+    clusters = []
+    for key in sorted(cells):
+        members = cells[key]
+        lats = [p[1] for p in members]
+        lngs = [p[2] for p in members]
+        clusters.append({
+            "lat": round(sum(lats) / len(lats), 5),
+            "lng": round(sum(lngs) / len(lngs), 5),
+            "count": len(members),
+            "bounds": [min(lats), min(lngs), max(lats), max(lngs)],
+            "slugs": sorted(p[0] for p in members) if len(members) <= MAX_LISTED else None,
+        })
+    return clusters
+
+
+def load_derivatives(path=DERIVATIVES_PATH):
+    """The responsive image manifest; empty if the derivative step has not been run."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def pick_derivative(entries, min_width):
+    """Port of pickDerivative: the smallest entry at least min_width wide, else the largest."""
+    if not entries:
+        return None
+    return next((p for p, w in entries if w >= min_width), entries[-1][0])
+
+
+def placeholder_style(derived):
+    """Port of placeholderStyle: the blurry thumbnail over the dominant colour, as an inline style."""
+    if not derived or not derived.get("color"):
+        return None
+    thumb = f' url("{derived["placeholder"]}") center / cover no-repeat' if derived.get("placeholder") else ""
+    return f"background:{derived['color']}{thumb}"
+
+
+def popup_place(slug, record, derivatives):
+    """What the popup of one place shows."""
+    image = record["image"]
+    # Manifest keys are decoded paths from the vault root, as findImageDerivatives looks them up
+    derived = derivatives.get(urllib.parse.unquote(image)) if image else None
+    lat, lng = record["coordinates"]
+    return {
+        "slug": slug,
+        "title": record["title"],
+        "lat": lat,
+        "lng": lng,
+        "date": record["date"],
+        "image": (derived and pick_derivative(derived["webp"], POPUP_IMAGE_PX)) or image,
+        "placeholder": placeholder_style(derived),
+    }
+
+
+def build_clusters(pages, derivatives=None):
+    """Return ({zoom: file contents}, places contents, index contents) for the indexed pages with coordinates."""
+    derivatives = load_derivatives() if derivatives is None else derivatives
+    points = []
+    places = []
+    for slug, record in sorted(pages.items()):
+        if record["coordinates"]:
+            lat, lng = record["coordinates"]
+            points.append((slug, lat, lng, *project(lat, lng)))
+            places.append(popup_place(slug, record, derivatives))
+
+    files = {z: {"zoom": z, "clusters": cluster_zoom(points, z)} for z in range(MAX_ZOOM + 1)}
+    encoded = {z: encode(data) for z, data in files.items()}
+    places = encode({"places": places})
+    digest = hashlib.sha1(b"".join([*(encoded[z] for z in sorted(encoded)), places])).hexdigest()[:12]
+    bounds = None
+    if points:
+        bounds = [min(p[1] for p in points), min(p[2] for p in points),
+                  max(p[1] for p in points), max(p[2] for p in points)]
+    index = {"version": MAP_VERSION, "hash": digest, "places": len(points), "maxZoom": MAX_ZOOM, "bounds": bounds}
+    return encoded, places, encode(index)
+
+
+def encode(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def write_clusters(pages, dry_run=False):
+    """Write the per-zoom cluster files for the collection index's pages. Returns files written."""
+    with metrics.phase("map.cluster"):
+        encoded, places, index = build_clusters(pages)
+    sizes = [len(data) for data in encoded.values()]
+    print(f"Map clusters: zooms 0-{MAX_ZOOM}, {min(sizes)}-{max(sizes)} bytes per zoom, "
+          f"{len(places)} bytes of popups")
+    if dry_run:
+        return 0
+
+    os.makedirs(MAP_DIR, exist_ok=True)
+    wanted = {f"{z}.json": data for z, data in encoded.items()}
+    wanted["places.json"] = places
+    wanted["index.json"] = index
+    written = 0
+    for name, data in wanted.items():
+        path = os.path.join(MAP_DIR, name)
+        if not same_bytes(path, data):
+            atomic_write(path, data)
+            written += 1
+    # Zooms dropped since the last run
+    for name in os.listdir(MAP_DIR):
+        if name.endswith(".json") and name not in wanted:
+            os.remove(os.path.join(MAP_DIR, name))
+    metrics.count("map.files_written", written)
+    if written:
+        print(f"  Wrote {written} files to {os.path.relpath(MAP_DIR, config.CONTENT_DIR)}")
+    return written
@@ -0,0 +1,186 @@
+"""
+Single entry point for the sync tooling: python -m scripts COMMAND [COMMAND ...]
+
+Commands run in order in one process, sharing clients and caches. Each
+command imports its module (and heavy dependencies) only when it runs.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from . import clients, config, metrics
+
+
+def run_books(args):
+    from . import sync_library
+    sync_library.main(["books"], csv_paths={"books": args.books_csv}, dry_run=args.dry_run,
+                      export_path=args.export)
+
+
+def run_library(args):
+    from . import sync_library
+    sync_library.main(csv_paths={"books": args.books_csv}, dry_run=args.dry_run, export_path=args.export)
+
+
+def run_travel_sync(args):
+    from . import sync_travel_pages
+    sync_travel_pages.main(csv_path=args.travel_csv, dry_run=args.dry_run, export_path=args.export)
+
+
+def run_travel_update(args):
+    from . import update_travel_pages
+    update_travel_pages.main(dry_run=args.dry_run)
+
+
+def run_images(args):
+    from . import build_image_derivatives
+    build_image_derivatives.main(dry_run=args.dry_run)
+
+
+def run_index(args):
+    from . import build_collection_index
+    build_collection_index.main(dry_run=args.dry_run)
+
+
+def run_assets(args):
+    from . import asset_graph
+    asset_graph.main(prune=args.prune, dedupe_assets=args.dedupe, dry_run=args.dry_run)
+
+
+def run_watch(args):
+    from . import watch
+    watch.main(drop_dir=args.drop_dir, dry_run=args.dry_run)
+
+
+def _count_pages(directory):
+    if not os.path.isdir(directory):
+        return 0
+    return sum(1 for f in os.listdir(directory) if f.endswith(".md") and f != "index.md")
+
+
+def run_status(args):
+    print("Content")
+    print(f"  Books:  {_count_pages(config.BOOKS_DIR)} pages")
+    print(f"  Movies: {_count_pages(config.MOVIES_DIR)} pages")
+    print(f"  Short stories: {_count_pages(config.SHORT_STORIES_DIR)} pages")
+    print(f"  Travel: {_count_pages(config.TRAVEL_DIR)} pages")
+    index_path = os.path.join(config.DERIVED_DIR, "collections.json")
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            indexed = len(json.load(f)["pages"])
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(os.path.getmtime(index_path)))
+        print(f"  Collection index: {indexed} pages (built {when})")
+    else:
+        print("  Collection index: not built")
+
+    print("Notion exports")
+    export = args.export or config.NOTION_EXPORT
+    if export:
+        print(f"  Export: {'ok' if os.path.exists(export) else 'missing'} ({export})")
+    for label, path in (("Drop folder", args.drop_dir or config.NOTION_DROP_DIR),
+                        ("Books CSV", args.books_csv or config.NOTION_BOOKS_CSV),
+                        ("Travel CSV", args.travel_csv or config.NOTION_TRAVEL_CSV),
+                        ("Travel dir", config.NOTION_TRAVEL_DIR)):
+        print(f"  {label}: {'ok' if os.path.exists(path) else 'missing'} ({path})")
+
+    print("Manifests")
+    for name in ("books", "movies", "short-stories", "travel-sync", "travel-update"):
+        path = os.path.join(config.MANIFEST_DIR, f"{name}.json")
+        if not os.path.exists(path):
+            print(f"  {name}: never run")
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(os.path.getmtime(path)))
+        print(f"  {name}: {len(data['rows'])} rows, {len(data['pages'])} pages (last run {when})")
+
+    print("Caches")
+    if os.path.exists(config.GEOCODE_CACHE_PATH):
+        conn = sqlite3.connect(config.GEOCODE_CACHE_PATH)
+        hits, misses, pinned = conn.execute(
+            "SELECT SUM(lat IS NOT NULL AND pinned = 0), SUM(lat IS NULL), SUM(pinned) FROM geocode"
+        ).fetchone()
+        conn.close()
+        print(f"  Geocode: {hits or 0} hits, {misses or 0} negative, {pinned or 0} pinned")
+    else:
+        print("  Geocode: empty")
+    print(f"  Gazetteer: {'built' if os.path.exists(config.GAZETTEER_PATH) else 'not built'}")
+    blobs = os.path.join(config.HTTP_CACHE_DIR, "blobs")
+    print(f"  Cover blobs: {len(os.listdir(blobs)) if os.path.isdir(blobs) else 0}")
+
+
+def run_command(command, args):
+    """Run one command with a fresh run report, optionally under cProfile."""
+    report = metrics.start(command)
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        COMMANDS[command](args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        report.finish()
+        if command != "status":
+            path = report.save()
+            print(f"\n{report.summary()}\n  (report: {path})")
+        if profiler is not None:
+            _write_profile(profiler, os.path.join(metrics.REPORT_DIR, f"{command}.prof"))
+
+
+def _write_profile(profiler, path):
+    """Save pstats output (loadable by snakeviz, flameprof, gprof2dot) and print the hot spots."""
+    import pstats
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profiler.dump_stats(path)
+    print(f"\nProfile written to {path}; hottest functions by cumulative time:")
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+
+COMMANDS = {
+    "books": run_books,
+    "library": run_library,
+    "travel-sync": run_travel_sync,
+    "travel-update": run_travel_update,
+    "images": run_images,
+    "index": run_index,
+    "assets": run_assets,
+    "status": run_status,
+    "watch": run_watch,
+}
+
+# Commands that change pages; the collection index is refreshed after them
+PAGE_COMMANDS = {"books", "library", "travel-sync", "travel-update"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scripts", description="Sync Notion exports into Quartz content")
+    parser.add_argument("commands", nargs="+", choices=COMMANDS, metavar="COMMAND",
+                        help=f"one or more of: {', '.join(COMMANDS)}")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing or geocoding")
+    parser.add_argument("--books-csv", help="Notion Books CSV export")
+    parser.add_argument("--travel-csv", help="Notion Travel log CSV export")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile each command with cProfile; stats go to .reports/<command>.prof")
+    parser.add_argument("--export", help="full Notion export (.zip, zip of Part-N zips, or folder) to read both databases from")
+    parser.add_argument("--prune", action="store_true", help="assets: delete assets no page references")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="assets: merge identical assets into one copy and rewrite the embeds")
+    parser.add_argument("--drop-dir", help="folder the watch command syncs new Notion exports from")
+    args = parser.parse_args(argv)
+    changes_pages = PAGE_COMMANDS & set(args.commands) or (args.dedupe and "assets" in args.commands)
+    if changes_pages and "index" not in args.commands and not args.dry_run:
+        args.commands.append("index")
+
+    try:
+        for command in args.commands:
+            if len(args.commands) > 1:
+                print(f"\n##### {command} #####")
+            run_command(command, args)
+    finally:
+        clients.close_all()
@@ -0,0 +1,68 @@
+"""
+Process-wide clients, created on first use and shared by every sync in the process.
+
+Heavy dependencies (geopy) are only imported when a client that needs them is
+first requested, so commands that never geocode start without loading them.
+"""
+
+import threading
+import urllib.parse
+
+from . import config
+
+_lock = threading.RLock()
+_clients = {}
+
+# Open Library request rates (requests per second), per host
+OPENLIBRARY_RATES = {
+    urllib.parse.urlsplit(config.OPENLIBRARY_URL).hostname: 2.0,
+    urllib.parse.urlsplit(config.OPENLIBRARY_COVERS_URL).hostname: 5.0,
+}
+
+
+def _get(name, factory):
+    with _lock:
+        if name not in _clients:
+            _clients[name] = factory()
+        return _clients[name]
+
+
+def geolocator():
+    """Shared Nominatim geolocator."""
+    def factory():
+        from geopy.geocoders import Nominatim
+        url = urllib.parse.urlsplit(config.NOMINATIM_URL)
+        return Nominatim(user_agent=config.USER_AGENT, domain=url.netloc, scheme=url.scheme)
+    return _get("geolocator", factory)
+
+
+def geocode_cache():
+    """Shared persistent geocode cache."""
+    from .geocache import GeocodeCache
+    return _get("geocode_cache", lambda: GeocodeCache(config.GEOCODE_CACHE_PATH))
+
+
+def gazetteer():
+    """Shared offline gazetteer, or None if the index has not been built."""
+    from .gazetteer import Gazetteer
+    return _get("gazetteer", lambda: Gazetteer.open(config.GAZETTEER_PATH))
+
+
+def openlibrary():
+    """Shared keep-alive, rate-limited HTTP client for Open Library."""
+    def factory():
+        from .httpclient import HttpClient
+        from .ratelimit import HostRateLimiter
+        limiter = HostRateLimiter(OPENLIBRARY_RATES, default_rate=1.0, burst=2)
+        return HttpClient("BookSync/1.0", limiter=limiter, cache_dir=config.HTTP_CACHE_DIR)
+    return _get("openlibrary", factory)
+
+
+def close_all():
+    """Close clients holding files or connections. Safe to call more than once."""
+    with _lock:
+        for name in ("geocode_cache", "gazetteer"):
+            client = _clients.pop(name, None)
+            if client is not None:
+                client.close()
+        _clients.clear()
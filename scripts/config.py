@@ -0,0 +1,76 @@
+"""
+Shared configuration for the sync scripts.
+
+Content paths are relative to this repository. Notion export locations, the
+content and cache folders, the remote service URLs and the countries searched
+when geocoding can be overridden with environment variables (Notion exports
+also on the command line).
+"""
+
+import os
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+CONTENT_DIR = os.environ.get("SYNC_CONTENT_DIR", os.path.join(REPO_ROOT, "content"))
+LIBRARY_DIR = os.path.join(CONTENT_DIR, "My Library")
+BOOKS_DIR = os.path.join(LIBRARY_DIR, "Books")
+COVERS_DIR = os.path.join(BOOKS_DIR, "covers")
+MOVIES_DIR = os.path.join(LIBRARY_DIR, "Movies")
+SHORT_STORIES_DIR = os.path.join(LIBRARY_DIR, "Short Stories")
+TRAVEL_DIR = os.path.join(CONTENT_DIR, "Travel and Photography")
+ASSETS_DIR = os.path.join(CONTENT_DIR, "assets")
+# Generated files read by the Quartz components (image derivatives, collection index)
+DERIVED_DIR = os.path.join(ASSETS_DIR, "derived")
+
+# Notion exports
+NOTION_BOOKS_CSV = os.environ.get(
+    "NOTION_BOOKS_CSV",
+    "/Users/shivam/Documents/Obsedian/ExportBlock-b42621f2-edb3-4a2d-a2f2-aab2f1067ff4-Part-1/Books/Books 6101836b49094f229a0ad4485340288b_all.csv",
+)
+# Movies and Short Stories have no separate exports by default; use NOTION_EXPORT or these
+NOTION_MOVIES_CSV = os.environ.get("NOTION_MOVIES_CSV")
+NOTION_SHORT_STORIES_CSV = os.environ.get("NOTION_SHORT_STORIES_CSV")
+NOTION_TRAVEL_CSV = os.environ.get(
+    "NOTION_TRAVEL_CSV",
+    "/Users/shivam/Documents/Obsedian/Travel/Travel log 4afded99a5534d64be24b7541470718d.csv",
+)
+NOTION_TRAVEL_DIR = os.environ.get(
+    "NOTION_TRAVEL_DIR",
+    "/Users/shivam/Documents/Obsedian/Travel/Travel log",
+)
+
+# Folder new exports are downloaded or unpacked into; `python -m scripts watch` syncs them as they land
+NOTION_DROP_DIR = os.environ.get("NOTION_DROP_DIR", "/Users/shivam/Documents/Obsedian")
+
+# Alternatively, one Notion export (.zip, zip of Part-N zips, or unpacked folder)
+# holding both databases; CSVs and pages are then read from it directly
+NOTION_EXPORT = os.environ.get("NOTION_EXPORT")
+NOTION_BOOKS_DATABASE = "Books"
+NOTION_MOVIES_DATABASE = "Movies"
+NOTION_SHORT_STORIES_DATABASE = "Short Stories"
+NOTION_TRAVEL_DATABASE = "Travel log"
+
+# Local caches and manifests (all gitignored)
+CACHE_DIR = os.environ.get("SYNC_CACHE_DIR", SCRIPTS_DIR)
+GEOCODE_CACHE_PATH = os.path.join(CACHE_DIR, ".geocode_cache.sqlite3")
+GAZETTEER_PATH = os.path.join(CACHE_DIR, ".gazetteer.sqlite3")
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, ".http_cache")
+MANIFEST_DIR = os.path.join(CACHE_DIR, ".manifests")
+ASSET_INDEX_PATH = os.path.join(CACHE_DIR, ".asset_index.json")
+REPORT_DIR = os.path.join(CACHE_DIR, ".reports")
+
+USER_AGENT = "quartz-travel-sync"
+
+# Remote services (overridable, e.g. to point the benchmarks at local stand-ins)
+OPENLIBRARY_URL = os.environ.get("OPENLIBRARY_URL", "https://openlibrary.org")
+OPENLIBRARY_COVERS_URL = os.environ.get("OPENLIBRARY_COVERS_URL", "https://covers.openlibrary.org")
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+# Seconds between Nominatim requests (usage policy: at most 1 per second)
+NOMINATIM_DELAY = float(os.environ.get("NOMINATIM_DELAY", "1.1"))
+# ISO country codes Nominatim searches are restricted to, comma-separated; empty searches worldwide.
+# The countries of the existing travel pages: a trip to a new country needs its code here.
+GEOCODE_COUNTRIES = tuple(
+    code.strip().lower() for code in os.environ.get("GEOCODE_COUNTRIES", "in,ca,us,fr,it,mx").split(",")
+    if code.strip()
+)
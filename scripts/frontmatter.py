@@ -0,0 +1,260 @@
+"""
+Frontmatter codec for the subset of YAML our pages use.
+
+Pages are split into their frontmatter block and body by line, and each
+top-level key keeps its original text. Values are parsed lazily, only
+when a key is read:
+- plain scalars, quoted strings, ISO dates, flow lists ([a, b]) and block
+  lists (- a) go through a small restricted parser that agrees with YAML
+- anything else (nested maps, block scalars, anchors, ...) is handed to
+  PyYAML, using the libyaml CSafeLoader when it is available
+
+On output, keys that were not assigned are written back byte-for-byte;
+only assigned keys are serialized, quoted where YAML would otherwise
+read them differently.
+"""
+
+import datetime
+import json
+import re
+
+# Top-level "key:" or "key: value" line
+KEY_LINE = re.compile(r'^([^\s#:\-"\'][^:]*):(?:[ \t]+(.*?))?[ \t]*$')
+BLOCK_ITEM = re.compile(r'^[ \t]*- (.*?)[ \t]*$')
+
+INT = re.compile(r'^[-+]?(?:0|[1-9][0-9]*)$')
+FLOAT = re.compile(r'^[-+]?[0-9]+\.[0-9]+$')
+DATE = re.compile(r'^[0-9]{4}-[0-9]{2}-[0-9]{2}$')
+BOOLS = {
+    "true": True, "True": True, "TRUE": True, "yes": True, "Yes": True, "YES": True,
+    "on": True, "On": True, "ON": True,
+    "false": False, "False": False, "FALSE": False, "no": False, "No": False, "NO": False,
+    "off": False, "Off": False, "OFF": False,
+}
+NULLS = {"", "~", "null", "Null", "NULL"}
+
+# Plain scalars starting with these, or containing ": " / " #", need the full YAML grammar
+INDICATORS = set("[]{},&*!|>'\"%@`#?:-")
+
+_UNPARSED = object()
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def parse_scalar(text):
+    """Parse one inline YAML scalar from the supported subset; raise _Unsupported otherwise."""
+    text = text.strip()
+    if text in NULLS:
+        return None
+    if text in BOOLS:
+        return BOOLS[text]
+    if INT.match(text):
+        return int(text)
+    if FLOAT.match(text):
+        return float(text)
+    if DATE.match(text):
+        try:
+            return datetime.date.fromisoformat(text)
+        except ValueError:
+            raise _Unsupported(text)
+    if text.startswith("'") and text.endswith("'") and len(text) > 1:
+        inner = text[1:-1]
+        if "'" in inner.replace("''", ""):
+            raise _Unsupported(text)
+        return inner.replace("''", "'")
+    if text.startswith('"') and text.endswith('"') and len(text) > 1:
+        inner = text[1:-1]
+        if "\\" in inner or '"' in inner:
+            raise _Unsupported(text)
+        return inner
+    if text[0] in INDICATORS or text[0] in "+.0123456789" or ": " in text or " #" in text or text.endswith(":"):
+        raise _Unsupported(text)
+    return text
+
+
+def parse_inline(text):
+    """Parse an inline value: a scalar or a flat flow list."""
+    text = text.strip()
+    if text.startswith("[") and text.endswith("]"):
+        inner = text[1:-1]
+        if any(c in inner for c in "[]{}'\""):
+            raise _Unsupported(text)
+        return [parse_scalar(item) for item in inner.split(",")] if inner.strip() else []
+    return parse_scalar(text)
+
+
+_loader = None
+
+
+def yaml_load(text):
+    """Load YAML with the libyaml C loader when PyYAML was built with it."""
+    global _loader
+    import yaml
+    if _loader is None:
+        _loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(text, Loader=_loader)
+
+
+def parse_entry(key, raw):
+    """Value of one top-level key from its original text (the key line plus continuation lines)."""
+    lines = raw.splitlines()
+    try:
+        value = KEY_LINE.match(lines[0]).group(2) or ""
+        rest = [line for line in lines[1:] if line.strip() and not line.lstrip().startswith("#")]
+        if not rest:
+            return parse_inline(value)
+        if value:
+            raise _Unsupported(raw)
+        items = []
+        for line in rest:
+            m = BLOCK_ITEM.match(line)
+            if not m:
+                raise _Unsupported(raw)
+            items.append(parse_scalar(m.group(1)))
+        return items
+    except _Unsupported:
+        pass
+    try:
+        return (yaml_load(raw) or {}).get(key)
+    except ImportError:
+        return raw.split(":", 1)[1].strip()
+    except Exception:
+        # Not valid YAML on its own: keep the raw text rather than losing the value
+        return raw.split(":", 1)[1].strip()
+
+
+def dump_scalar(value):
+    """Serialize a scalar so YAML reads it back as the same value."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, (int, float)):
+        return str(value)
+    text = str(value)
+    try:
+        if parse_scalar(text) == text and "\n" not in text:
+            return text
+    except _Unsupported:
+        pass
+    return json.dumps(text, ensure_ascii=False)
+
+
+def dump_entry(key, value):
+    """Text for one top-level key, in the style our pages already use."""
+    if value is None or value == "":
+        return f"{key}:\n"
+    if isinstance(value, (list, tuple)) and len(value) == 2 and all(
+        isinstance(v, (int, float)) and not isinstance(v, bool) for v in value
+    ):
+        # coordinates as inline list
+        return f"{key}: [{value[0]}, {value[1]}]\n"
+    if isinstance(value, (list, tuple)):
+        return f"{key}:\n" + "".join(f"  - {dump_scalar(item)}\n" for item in value)
+    return f"{key}: {dump_scalar(value)}\n"
+
+
+class Frontmatter:
+    """Ordered frontmatter keys, each with its original text and a lazily parsed value."""
+
+    def __init__(self, text=""):
+        self.preamble = ""  # comments or blank lines before the first key
+        self._entries = {}  # key -> [raw text or None, value or _UNPARSED]
+        key = None
+        for line in text.splitlines(keepends=True):
+            m = KEY_LINE.match(line.rstrip("\r\n"))
+            if m and not line[0].isspace():
+                key = m.group(1)
+                # YAML keeps the last of duplicate keys
+                self._entries.pop(key, None)
+                self._entries[key] = [line, _UNPARSED]
+            elif key is None:
+                self.preamble += line
+            else:
+                self._entries[key][0] += line
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, key):
+        entry = self._entries[key]
+        if entry[1] is _UNPARSED:
+            entry[1] = parse_entry(key, entry[0])
+        return entry[1]
+
+    def get(self, key, default=None):
+        return self[key] if key in self._entries else default
+
+    def __setitem__(self, key, value):
+        """Assign a value; assigning the value a key already has keeps its original text."""
+        if key in self._entries:
+            current = self[key]
+            if type(current) is type(value) and current == value:
+                return
+        self._entries[key] = [None, value]
+
+    def __delitem__(self, key):
+        del self._entries[key]
+
+    def move_to_front(self, keys):
+        """Reorder so the given keys (those present) come first, in that order."""
+        front = {k: self._entries[k] for k in keys if k in self._entries}
+        rest = {k: v for k, v in self._entries.items() if k not in front}
+        self._entries = {**front, **rest}
+
+    def dump(self):
+        """Frontmatter text (without --- delimiters); unassigned keys are reproduced exactly."""
+        parts = [self.preamble]
+        for key, (raw, value) in self._entries.items():
+            if raw is None:
+                parts.append(dump_entry(key, value))
+            else:
+                parts.append(raw if raw.endswith("\n") else raw + "\n")
+        return "".join(parts)
+
+
+def split(content):
+    """Split a page into (frontmatter text, body); text is None if the page has no frontmatter.
+
+    The body starts right after the closing --- (usually with its newline).
+    """
+    if not content.startswith("---"):
+        return None, content
+    first_end = content.find("\n")
+    if first_end == -1 or content[:first_end].rstrip("\r") != "---":
+        return None, content
+    pos = first_end + 1
+    while pos <= len(content):
+        end = content.find("\n", pos)
+        line = content[pos:] if end == -1 else content[pos:end]
+        # Closing delimiter may carry trailing whitespace; it stays with the body
+        if line.rstrip() == "---":
+            return content[first_end + 1:pos], content[pos + 3:]
+        if end == -1:
+            break
+        pos = end + 1
+    return None, content
+
+
+def parse(content):
+    """Return (Frontmatter, body) for a page; pages without frontmatter get an empty one."""
+    text, body = split(content)
+    return Frontmatter(text or ""), body
+
+
+def compose(fm, body):
+    """Inverse of parse: "---\\n<frontmatter>---<body>"."""
+    # A page that had no frontmatter: start its body on a new line
+    if body.partition("\n")[0].strip():
+        body = "\n" + body
+    return f"---\n{fm.dump()}---{body}"
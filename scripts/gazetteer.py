@@ -0,0 +1,179 @@
+"""
+Offline geocoder backed by a local GeoNames dump.
+
+Build the index once from a GeoNames export (allCountries.txt, cities500.txt, ...),
+optionally with admin1CodesASCII.txt and countryInfo.txt for region names:
+
+    python -m scripts.gazetteer build allCountries.txt --admin1 admin1CodesASCII.txt --countries countryInfo.txt
+
+The dump is streamed into a SQLite index of normalized names and alternate
+names. Queries like "Palampur, Himachal Pradesh" look up the first part as a
+place name and use the remaining parts to filter by admin region or country.
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import unicodedata
+
+from . import config, metrics
+
+GAZETTEER_PATH = config.GAZETTEER_PATH
+
+BATCH_SIZE = 10000
+
+# Preferred feature classes: populated places, admin areas, parks/areas, terrain, spots, water
+FEATURE_RANK = {"P": 0, "A": 1, "L": 2, "T": 3, "S": 4, "H": 5, "V": 6, "R": 7, "U": 8}
+
+
+def normalize_name(name):
+    """Lowercase, strip accents and punctuation: "St. John’s" -> "st johns"."""
+    s = unicodedata.normalize("NFKD", name)
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    s = re.sub(r"['’‘.]", "", s.lower())
+    s = re.sub(r'[^a-z0-9]+', ' ', s)
+    return s.strip()
+
+
+def _read_tsv(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            yield line.rstrip("\n").split("\t")
+
+
+def build_index(dump_path, index_path=GAZETTEER_PATH, admin1_path=None, countries_path=None, min_population=0):
+    """Stream a GeoNames dump into a fresh SQLite index. Returns the number of places."""
+    tmp_path = index_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript(
+        "PRAGMA journal_mode = OFF;"
+        "PRAGMA synchronous = OFF;"
+        "CREATE TABLE places (id INTEGER PRIMARY KEY, lat REAL, lng REAL, country TEXT,"
+        " admin1 TEXT, fclass TEXT, population INTEGER);"
+        "CREATE TABLE names (name TEXT, place_id INTEGER, PRIMARY KEY (name, place_id)) WITHOUT ROWID;"
+        "CREATE TABLE regions (name TEXT, country TEXT, admin1 TEXT);"
+    )
+
+    count = 0
+    places, names = [], []
+    for cols in _read_tsv(dump_path):
+        if len(cols) < 15:
+            continue
+        population = int(cols[14] or 0)
+        if population < min_population and cols[6] == "P":
+            continue
+        place_id = int(cols[0])
+        places.append((place_id, float(cols[4]), float(cols[5]), cols[8], cols[10], cols[6], population))
+        variants = {cols[1], cols[2], *cols[3].split(",")}
+        names.extend((n, place_id) for n in {normalize_name(v) for v in variants if v} if n)
+        count += 1
+        if len(places) >= BATCH_SIZE:
+            conn.executemany("INSERT OR IGNORE INTO places VALUES (?, ?, ?, ?, ?, ?, ?)", places)
+            conn.executemany("INSERT OR IGNORE INTO names VALUES (?, ?)", names)
+            places, names = [], []
+    conn.executemany("INSERT OR IGNORE INTO places VALUES (?, ?, ?, ?, ?, ?, ?)", places)
+    conn.executemany("INSERT OR IGNORE INTO names VALUES (?, ?)", names)
+
+    # Region qualifiers: admin1 names ("Himachal Pradesh") and countries ("India", "IN")
+    regions = []
+    if admin1_path:
+        for cols in _read_tsv(admin1_path):
+            country, _, admin1 = cols[0].partition(".")
+            for name in {cols[1], cols[2]}:
+                regions.append((normalize_name(name), country, admin1))
+    if countries_path:
+        for cols in _read_tsv(countries_path):
+            regions.append((normalize_name(cols[4]), cols[0], None))
+            regions.append((cols[0].lower(), cols[0], None))
+            regions.append((cols[1].lower(), cols[0], None))
+    conn.executemany("INSERT INTO regions VALUES (?, ?, ?)", regions)
+
+    conn.execute("CREATE INDEX regions_name ON regions (name)")
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, index_path)
+    return count
+
+
+class Gazetteer:
+    def __init__(self, index_path=GAZETTEER_PATH):
+        self.conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True, check_same_thread=False)
+
+    @classmethod
+    def open(cls, index_path=GAZETTEER_PATH):
+        """Open the index if it has been built, else return None."""
+        if not os.path.exists(index_path):
+            return None
+        return cls(index_path)
+
+    def _regions(self, qualifier):
+        """(country, admin1) pairs a qualifier may refer to; prefix matches allowed ("Newfoundland")."""
+        q = normalize_name(qualifier)
+        return self.conn.execute(
+            "SELECT country, admin1 FROM regions WHERE name = ? OR (name >= ? AND name < ?)",
+            (q, q + " ", q + "~"),
+        ).fetchall()
+
+    def lookup(self, query):
+        """Return (lat, lng) for a query like "Palampur, Himachal Pradesh", or None."""
+        parts = [p.strip() for p in query.split(",") if p.strip()]
+        if not parts:
+            return None
+        name, qualifiers = normalize_name(parts[0]), parts[1:]
+
+        rows = self.conn.execute(
+            "SELECT p.lat, p.lng, p.country, p.admin1, p.fclass, p.population"
+            " FROM names n JOIN places p ON p.id = n.place_id WHERE n.name = ?",
+            (name,),
+        ).fetchall()
+
+        for qualifier in qualifiers:
+            regions = self._regions(qualifier)
+            if not regions:
+                # Not a known region (e.g. "East Coast Trail"): leave it to the network geocoder
+                return None
+            rows = [
+                r for r in rows
+                if any(r[2] == country and (admin1 is None or r[3] == admin1) for country, admin1 in regions)
+            ]
+        if not rows:
+            return None
+
+        metrics.count("gazetteer.hits")
+        best = min(rows, key=lambda r: (FEATURE_RANK.get(r[4], 9), -r[5]))
+        return round(best[0], 4), round(best[1], 4)
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline GeoNames gazetteer")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build the index from a GeoNames dump")
+    build.add_argument("dump")
+    build.add_argument("--admin1", help="admin1CodesASCII.txt")
+    build.add_argument("--countries", help="countryInfo.txt")
+    build.add_argument("--min-population", type=int, default=0)
+    query = sub.add_parser("query", help="look up a place")
+    query.add_argument("place")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_index(args.dump, admin1_path=args.admin1, countries_path=args.countries,
+                            min_population=args.min_population)
+        print(f"Indexed {count} places into {GAZETTEER_PATH}")
+    else:
+        gazetteer = Gazetteer.open()
+        if gazetteer is None:
+            raise SystemExit("No gazetteer index; run: python -m scripts.gazetteer build <dump>")
+        print(gazetteer.lookup(args.place))
+
+
+if __name__ == '__main__':
+    main()
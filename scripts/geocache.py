@@ -0,0 +1,155 @@
+"""
+Persistent geocode cache shared by the travel scripts.
+
+Results are stored in a SQLite file next to the scripts, keyed on the
+normalized query string:
+- positive hits are kept forever
+- negative results (no match) expire after NEGATIVE_TTL seconds
+- COORD_OVERRIDES are stored as pinned entries that lookups never replace
+"""
+
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from . import config, metrics
+
+CACHE_PATH = config.GEOCODE_CACHE_PATH
+
+# Retry places that failed to geocode after 30 days
+NEGATIVE_TTL = 30 * 24 * 3600
+
+# Manual overrides for locations that might not geocode well
+COORD_OVERRIDES = {
+    "Bell Island": [47.633, -52.942],  # Bell Island, Newfoundland
+    "Butter Pot Provincial Park": [47.367, -52.983],
+    "Chintpuni": [31.52, 76.58],  # Himachal Pradesh
+    "Cobbler Path, East Coast Trail": [47.52, -52.72],  # near St. John's, NL
+    "Fort Amherst, St. John's": [47.563, -52.681],
+    "Freshwater Bay": [47.59, -52.72],  # Newfoundland
+    "ICTS, Bangalore": [13.0827, 77.5800],  # ICTS campus, Bangalore
+    "La Manche Provincial Park": [47.10, -52.93],
+    "Le Manche": [47.10, -52.93],  # same as La Manche
+    "LSuC, Sardarshahar": [28.44, 74.49],  # Sardarshahar, Rajasthan
+    "Madman's Farm, Madhya Pradesh": [23.25, 77.41],  # approx MP center
+    "Matheran 2": [18.98, 73.27],  # Matheran, Maharashtra
+    "Mickeleen's Path, East Coast Trail": [47.45, -52.75],
+    "Motion Path, East Coast Trail": [47.48, -52.73],
+    "Newfoundland Screech at Middle Cove": [47.64, -52.67],
+    "Petty Harbour": [47.467, -52.717],
+    "Poanta Sahib": [30.44, 77.62],
+    "Sapna Ranch, Maharashtra": [19.0, 73.5],  # approx Maharashtra
+    "Sehatvan, Madhya Pradesh": [23.25, 77.41],
+    "Shimla + Kufri": [31.10, 77.17],  # Shimla area
+    "Spout Path, East Coast Trail": [47.50, -52.73],
+    "Swift Current": [47.27, -53.97],  # Swift Current, NL
+    "Kanyakumari, Tamil Nadu": [8.0883, 77.5385],
+    "Kanyakumari": [8.0883, 77.5385],
+    "Madurai, Tamil Nadu": [9.9252, 78.1198],
+    "Barog, Himachal Pradesh": [30.9, 77.07],
+    "McLeod Ganj, Himachal Pradesh": [32.24, 76.32],
+    "Palampur, Himachal Pradesh": [32.11, 76.53],
+    "Udaipur, Rajasthan": [24.5854, 73.7125],
+    "Terra Nova National Park, Canada": [48.55, -53.97],
+    "Tirumala Tirupati": [13.6833, 79.3472],
+    "Trivendrum": [8.5241, 76.9366],  # Trivandrum/Thiruvananthapuram
+    "Kodikanal": [10.2381, 77.4892],  # Kodaikanal
+}
+
+# Returned by lookup() when the query has never been resolved (or its negative result expired)
+MISS = object()
+
+
+def normalize_query(query):
+    """Normalize a query so trivially different spellings share a cache entry."""
+    q = unicodedata.normalize("NFKC", query)
+    q = q.replace("’", "'").replace("‘", "'")
+    q = re.sub(r'\s+', ' ', q)
+    return q.strip().lower()
+
+
+class GeocodeCache:
+    """SQLite-backed cache of query -> (lat, lng) or None. Safe to share between threads."""
+
+    def __init__(self, path=CACHE_PATH, negative_ttl=NEGATIVE_TTL, overrides=COORD_OVERRIDES):
+        self.negative_ttl = negative_ttl
+        # Opened on whichever thread first needs it (e.g. the travel sync's geocode lane)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            " query TEXT PRIMARY KEY,"
+            " lat REAL,"
+            " lng REAL,"
+            " pinned INTEGER NOT NULL DEFAULT 0,"
+            " fetched_at REAL NOT NULL)"
+        )
+        if overrides is not None:
+            self.pin_all(overrides)
+
+    def pin_all(self, overrides):
+        """Replace all pinned entries with the given {query: [lat, lng]} table."""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM geocode WHERE pinned = 1")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO geocode (query, lat, lng, pinned, fetched_at) VALUES (?, ?, ?, 1, ?)",
+                [(normalize_query(q), c[0], c[1], now) for q, c in overrides.items()],
+            )
+
+    def lookup(self, query):
+        """Return (lat, lng), None for a cached negative result, or MISS."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT lat, lng, pinned, fetched_at FROM geocode WHERE query = ?",
+                (normalize_query(query),),
+            ).fetchone()
+        if row is None:
+            return MISS
+        lat, lng, pinned, fetched_at = row
+        if lat is None:
+            if not pinned and time.time() - fetched_at > self.negative_ttl:
+                return MISS
+            return None
+        return lat, lng
+
+    def pinned(self, query):
+        """Return the pinned (lat, lng) for query (from COORD_OVERRIDES), or None if it has none."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT lat, lng FROM geocode WHERE query = ? AND pinned = 1 AND lat IS NOT NULL",
+                (normalize_query(query),),
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def store(self, query, coords):
+        """Record a lookup result (coords or None). Pinned entries are left untouched."""
+        lat, lng = coords if coords else (None, None)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO geocode (query, lat, lng, pinned, fetched_at) VALUES (?, ?, ?, 0, ?)"
+                " ON CONFLICT(query) DO UPDATE SET lat = excluded.lat, lng = excluded.lng,"
+                " fetched_at = excluded.fetched_at WHERE pinned = 0",
+                (normalize_query(query), lat, lng, time.time()),
+            )
+
+    def resolve(self, query, fetch):
+        """Return cached coords for query, calling fetch(query) only on a miss.
+
+        fetch must return (lat, lng) or None; exceptions propagate and are not cached.
+        """
+        cached = self.lookup(query)
+        if cached is not MISS:
+            metrics.count("geocode.cache_hits")
+            return cached
+        metrics.count("geocode.cache_misses")
+        with metrics.phase("geocode.fetch"):
+            coords = fetch(query)
+        self.store(query, coords)
+        return coords
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,191 @@
+"""
+Single-request Nominatim search with local candidate ranking.
+
+Instead of retrying a place with guessed suffixes (", India",
+", Newfoundland, Canada"), issue one query that asks for several candidates,
+restricted to config.GEOCODE_COUNTRIES (the countries of the existing
+travel pages, unless overridden) and biased
+towards a viewbox around the region the place most likely lies in.
+Candidates are then ranked locally: those near a known place (override or
+existing page coordinates) win, then Nominatim's own importance score
+decides.
+
+Known places are grouped into regions (Newfoundland, north India, ...)
+of places within REGION_KM of each other, each with its own viewbox. A
+query goes to the region whose place names share the most words with it
+("Cobbler Path, East Coast Trail" -> the East Coast Trail paths around
+St. John's), else to the region with the most places.
+"""
+
+import math
+import re
+import time
+
+from . import config, metrics
+
+CANDIDATE_LIMIT = 10
+
+# A candidate within this distance of a known place counts as "near"
+NEAR_KM = 300
+
+# Known places closer than this (chained) form one region
+REGION_KM = 500
+
+# Only send a viewbox when a region's places fit in a box this small (degrees)
+MAX_VIEWBOX_SPAN = 40
+
+# Words of place names that can tie a query to a region
+WORD = re.compile(r"[^\W\d_]{4,}")
+
+COORD_PAIR = re.compile(r'(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)')
+
+
+def parse_coordinates(value):
+    """Parse a frontmatter coordinates value ("[lat, lng]" or a list) into (lat, lng), or None."""
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        return float(value[0]), float(value[1])
+    if isinstance(value, str):
+        m = COORD_PAIR.search(value)
+        if m:
+            return float(m.group(1)), float(m.group(2))
+    return None
+
+
+def known_places(overrides=None, pages=None):
+    """KnownPlaces from an overrides table and a PageIndex with 'coordinates'."""
+    places = []
+    for name, coords in (overrides or {}).items():
+        places.append((name, (float(coords[0]), float(coords[1]))))
+    for page in pages or ():
+        coords = parse_coordinates(page.get("coordinates"))
+        if coords:
+            places.append((page.stem, coords))
+    return KnownPlaces(places)
+
+
+def haversine_km(a, b):
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(h))
+
+
+def viewbox_for(points, max_span=MAX_VIEWBOX_SPAN):
+    """Bounding box ((south, west), (north, east)) of points, or None if empty or too large to help."""
+    if not points:
+        return None
+    lats = [p[0] for p in points]
+    lngs = [p[1] for p in points]
+    if max(lats) - min(lats) > max_span or max(lngs) - min(lngs) > max_span:
+        return None
+    return (min(lats) - 1, min(lngs) - 1), (max(lats) + 1, max(lngs) + 1)
+
+
+def words(name):
+    return set(WORD.findall(name.lower()))
+
+
+def group_regions(places, link_km=REGION_KM):
+    """Split (name, point) places into regions: groups chained by distances under link_km, largest first."""
+    regions = []
+    unvisited = list(places)
+    while unvisited:
+        region = [unvisited.pop()]
+        i = 0
+        while i < len(region):
+            near, far = [], []
+            for place in unvisited:
+                (near if haversine_km(region[i][1], place[1]) <= link_km else far).append(place)
+            region.extend(near)
+            unvisited = far
+            i += 1
+        regions.append(region)
+    return sorted(regions, key=len, reverse=True)
+
+
+class KnownPlaces:
+    """Places we already have coordinates for, grouped into regions with a viewbox each."""
+
+    def __init__(self, places=()):
+        self.places = list(places)
+        self.points = [point for _, point in self.places]
+        self.regions = group_regions(self.places)
+        self.viewboxes = [viewbox_for([point for _, point in region]) for region in self.regions]
+        # Words found in one region only: they point at it
+        owners = {}
+        for i, region in enumerate(self.regions):
+            for word in set().union(*(words(name) for name, _ in region)):
+                owners[word] = i if word not in owners else None
+        self.region_words = [{w for w, owner in owners.items() if owner == i} for i in range(len(self.regions))]
+
+    def __len__(self):
+        return len(self.places)
+
+    def region_for(self, query):
+        """Index of the region a query most likely lies in, or None if there are no known places."""
+        if not self.regions:
+            return None
+        query_words = words(query)
+        scores = [len(query_words & region_words) for region_words in self.region_words]
+        best = max(scores)
+        if best and scores.count(best) == 1:
+            return scores.index(best)
+        return 0
+
+    def viewbox(self, query):
+        """Viewbox to bias a query towards, or None."""
+        region = self.region_for(query)
+        return None if region is None else self.viewboxes[region]
+
+
+class StructuredGeocoder:
+    """Callable query -> (lat, lng) or None that costs at most one rate-limited request."""
+
+    def __init__(self, geolocator, country_codes=config.GEOCODE_COUNTRIES, known=None, near_km=NEAR_KM,
+                 limit=CANDIDATE_LIMIT, delay=1.1):
+        self.geolocator = geolocator
+        self.country_codes = list(country_codes) or None
+        # known may be KnownPlaces or a zero-argument callable producing them (evaluated lazily)
+        self._known = known
+        self.near_km = near_km
+        self.limit = limit
+        self.delay = delay
+
+    @property
+    def known(self):
+        if callable(self._known):
+            self._known = self._known()
+        if self._known is None:
+            self._known = KnownPlaces()
+        return self._known
+
+    def rank(self, candidates):
+        """Pick the best candidate: near a known place first, then by Nominatim importance."""
+        known = self.known.points
+
+        def key(loc):
+            point = (loc.latitude, loc.longitude)
+            near = any(haversine_km(point, k) <= self.near_km for k in known)
+            importance = float((loc.raw or {}).get("importance") or 0)
+            return (not near, -importance)
+
+        return min(candidates, key=key)
+
+    def __call__(self, query):
+        with metrics.phase("geocode.nominatim_delay"):
+            time.sleep(self.delay)  # Nominatim rate limit: 1 req/sec
+        viewbox = self.known.viewbox(query)
+        metrics.count("geocode.nominatim_requests")
+        with metrics.phase("geocode.nominatim_request"):
+            candidates = self.geolocator.geocode(
+                query,
+                exactly_one=False,
+                limit=self.limit,
+                country_codes=self.country_codes,
+                viewbox=viewbox,
+                bounded=False,
+                timeout=10,
+            )
+        if not candidates:
+            return None
+        best = self.rank(candidates)
+        return round(best.latitude, 4), round(best.longitude, 4)
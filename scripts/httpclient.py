@@ -0,0 +1,166 @@
+"""
+Small HTTP client for the sync scripts.
+
+- keep-alive connections, pooled per thread and host
+- optional per-host rate limiting (see ratelimit.py)
+- on-disk JSON response cache with ETag / Last-Modified revalidation
+- on-disk blob cache for immutable downloads (e.g. Open Library covers by cover_i)
+"""
+
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+import urllib.parse
+
+from . import config, metrics
+
+CACHE_DIR = config.HTTP_CACHE_DIR
+
+# Cached JSON younger than this is returned without contacting the server
+JSON_MAX_AGE = 7 * 24 * 3600
+
+MAX_REDIRECTS = 5
+
+
+class HttpError(Exception):
+    def __init__(self, url, status):
+        super().__init__(f"HTTP {status} for {url}")
+        self.url = url
+        self.status = status
+
+
+def _atomic_write(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class HttpClient:
+    """GET-only client that reuses one connection per (thread, scheme, host)."""
+
+    def __init__(self, user_agent, limiter=None, cache_dir=CACHE_DIR, timeout=15, json_max_age=JSON_MAX_AGE):
+        self.user_agent = user_agent
+        self.limiter = limiter
+        self.timeout = timeout
+        self.json_max_age = json_max_age
+        self.cache_dir = cache_dir
+        self.local = threading.local()
+        if cache_dir:
+            os.makedirs(os.path.join(cache_dir, "json"), exist_ok=True)
+            os.makedirs(os.path.join(cache_dir, "blobs"), exist_ok=True)
+
+    def _connection(self, scheme, netloc, fresh=False):
+        pool = getattr(self.local, "pool", None)
+        if pool is None:
+            pool = self.local.pool = {}
+        key = (scheme, netloc)
+        conn = pool.get(key)
+        if conn is None or fresh:
+            if conn is not None:
+                conn.close()
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = pool[key] = cls(netloc, timeout=self.timeout)
+        return conn
+
+    def _request(self, url, headers):
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        all_headers = {"User-Agent": self.user_agent, "Connection": "keep-alive"}
+        all_headers.update(headers)
+        for attempt in range(2):
+            # Every attempt is a request to the host, the retry included
+            if self.limiter:
+                with metrics.phase("http.rate_limit_wait"):
+                    self.limiter.wait(url)
+            # A pooled connection may have been closed by the server; retry once on a fresh one
+            conn = self._connection(parts.scheme, parts.netloc, fresh=attempt > 0)
+            try:
+                with metrics.phase("http.request"):
+                    conn.request("GET", path, headers=all_headers)
+                    resp = conn.getresponse()
+                    body = resp.read()
+                metrics.count("http.requests")
+                metrics.count("http.bytes_downloaded", len(body))
+                return resp.status, resp.headers, body
+            except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                    BrokenPipeError, ConnectionResetError):
+                if attempt:
+                    raise
+
+    def get(self, url, headers=None):
+        """GET url, following redirects. Returns (status, headers, body)."""
+        headers = dict(headers or {})
+        for _ in range(MAX_REDIRECTS + 1):
+            status, resp_headers, body = self._request(url, headers)
+            if status in (301, 302, 303, 307, 308) and resp_headers.get("Location"):
+                url = urllib.parse.urljoin(url, resp_headers["Location"])
+                continue
+            return status, resp_headers, body
+        raise HttpError(url, status)
+
+    def get_json(self, url):
+        """GET a JSON document, served from the on-disk cache when fresh or unchanged."""
+        if not self.cache_dir:
+            status, _, body = self.get(url)
+            if status != 200:
+                raise HttpError(url, status)
+            return json.loads(body)
+
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        path = os.path.join(self.cache_dir, "json", key + ".json")
+        entry = None
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if time.time() - entry["fetched_at"] < self.json_max_age:
+                metrics.count("http.json_cache_hits")
+                return entry["body"]
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        status, resp_headers, body = self.get(url, headers)
+        if status == 304 and entry:
+            metrics.count("http.json_revalidated")
+            entry["fetched_at"] = time.time()
+        elif status == 200:
+            entry = {
+                "url": url,
+                "etag": resp_headers.get("ETag"),
+                "last_modified": resp_headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+                "body": json.loads(body),
+            }
+        else:
+            raise HttpError(url, status)
+        _atomic_write(path, json.dumps(entry).encode("utf-8"))
+        return entry["body"]
+
+    def blob_path(self, key):
+        """Path of a cached blob (which may not exist yet)."""
+        return os.path.join(self.cache_dir, "blobs", key)
+
+    def get_blob(self, url, key):
+        """Return the bytes at url, cached on disk forever under key."""
+        if self.cache_dir:
+            path = self.blob_path(key)
+            if os.path.exists(path):
+                metrics.count("http.blob_cache_hits")
+                with open(path, "rb") as f:
+                    return f.read()
+        status, _, body = self.get(url)
+        if status != 200:
+            raise HttpError(url, status)
+        if self.cache_dir:
+            _atomic_write(self.blob_path(key), body)
+        return body
@@ -0,0 +1,143 @@
+"""
+Incremental sync manifest.
+
+Each script keeps a JSON manifest of what it saw on its last run:
+- rows:  {key: {"hash": <row content hash>, ...}} for Notion CSV rows
+- pages: {path: {"mtime_ns", "size", "fm_hash", "facts"}} for content pages
+
+On the next run, rows whose hash is unchanged and pages whose mtime/size
+are unchanged can be skipped without re-reading or re-processing them.
+Entries not seen during a run are dropped when the manifest is saved.
+
+SyncManifest.shared keeps one manifest per name in memory, so a
+long-running process (watch mode) doesn't reload it for every run.
+"""
+
+import hashlib
+import json
+import os
+
+from . import config, metrics
+
+MANIFEST_DIR = config.MANIFEST_DIR
+
+_shared = {}
+
+
+def content_hash(data):
+    """Stable hash of a str, bytes or JSON-serializable value."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    elif not isinstance(data, bytes):
+        data = json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()
+
+
+def frontmatter_block(content):
+    """Return the raw frontmatter text of a page (between the leading --- lines), or ''."""
+    if not content.startswith("---"):
+        return ""
+    end = content.find("\n---", 3)
+    return content[3:end] if end != -1 else ""
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class SyncManifest:
+    def __init__(self, name, manifest_dir=MANIFEST_DIR):
+        self.path = os.path.join(manifest_dir, f"{name}.json")
+        self.rows = {}
+        self.pages = {}
+        self.seen_rows = set()
+        self.seen_pages = set()
+        self.saved_mtime_ns = _mtime_ns(self.path)
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.rows = data.get("rows", {})
+            self.pages = data.get("pages", {})
+
+    @classmethod
+    def shared(cls, name, manifest_dir=MANIFEST_DIR):
+        """The process-wide manifest for name, kept in memory from one run to the next.
+
+        It is reloaded if another process saved it since; what was seen is reset for the new run.
+        """
+        manifest = _shared.get((name, manifest_dir))
+        if manifest is None or manifest.saved_mtime_ns != _mtime_ns(manifest.path):
+            manifest = _shared[(name, manifest_dir)] = cls(name, manifest_dir)
+        manifest.seen_rows = set()
+        manifest.seen_pages = set()
+        return manifest
+
+    # --- CSV rows ---
+
+    def row(self, key):
+        """Previously recorded entry for a row key, or None."""
+        return self.rows.get(key)
+
+    def row_unchanged(self, key, row):
+        """True if the row's content hash matches the last run."""
+        self.seen_rows.add(key)
+        prev = self.rows.get(key)
+        return prev is not None and prev["hash"] == content_hash(row)
+
+    def record_row(self, key, row, **extra):
+        self.seen_rows.add(key)
+        self.rows[key] = {"hash": content_hash(row), **extra}
+
+    # --- content pages ---
+
+    def page_facts(self, path):
+        """Facts recorded for a page if its mtime and size are unchanged, else None."""
+        self.seen_pages.add(path)
+        prev = self.pages.get(path)
+        if prev is None:
+            return None
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if st.st_mtime_ns != prev["mtime_ns"] or st.st_size != prev["size"]:
+            return None
+        return prev["facts"]
+
+    def frontmatter_facts(self, path, content):
+        """Facts recorded for a page if its frontmatter is byte-identical to the last run, else None.
+
+        Useful when only the body was edited: anything derived from frontmatter is still valid.
+        """
+        self.seen_pages.add(path)
+        prev = self.pages.get(path)
+        if prev is None or prev["fm_hash"] != content_hash(frontmatter_block(content)):
+            return None
+        return prev["facts"]
+
+    def record_page(self, path, content, **facts):
+        """Record a page's current stat, frontmatter hash and derived facts."""
+        self.seen_pages.add(path)
+        st = os.stat(path)
+        self.pages[path] = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "fm_hash": content_hash(frontmatter_block(content)),
+            "facts": facts,
+        }
+
+    def save(self):
+        """Write the manifest atomically, keeping only entries seen this run."""
+        self.rows = {k: v for k, v in self.rows.items() if k in self.seen_rows}
+        self.pages = {k: v for k, v in self.pages.items() if k in self.seen_pages}
+        data = {"rows": self.rows, "pages": self.pages}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with metrics.phase("manifest.save"):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        self.saved_mtime_ns = _mtime_ns(self.path)
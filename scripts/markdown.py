@@ -0,0 +1,15 @@
+"""
+Patterns for the image references in a page body, shared by the scripts
+that read them (the collection index, photo GPS).
+"""
+
+import re
+
+# ![[file.jpg|alt]], ![alt](path "title") or <img src="...">, whichever comes first
+BODY_IMAGE = re.compile(
+    r'!\[\[(?P<embed>[^\]|#]+)[^\]]*\]\]'
+    r'|!\[[^\]]*\]\(\s*<?(?P<link>[^)\s>]+)>?(?:\s+"[^"]*")?\s*\)'
+    r'|<img\s[^>]*?src=["\'](?P<html>[^"\']+)'
+)
+# References to other sites or inline data, not files in the vault
+EXTERNAL = ("http://", "https://", "data:")
@@ -0,0 +1,105 @@
+"""
+Run instrumentation shared by the sync scripts.
+
+- phase(name): context manager adding wall time to a named phase. Phases
+  can nest and can run on worker threads, so phase times may add up to
+  more than the run's wall time.
+- count(name, n): named counters (network calls, cache hits, bytes
+  downloaded, files written, ...).
+- RunReport: one per command, saved as JSON to .reports/<command>.json
+  in the cache folder, and summarized at the end of the run.
+
+Counting is always on; it is a dict update under a lock.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from . import config
+
+REPORT_DIR = config.REPORT_DIR
+
+
+class RunReport:
+    def __init__(self, command=None):
+        self.command = command
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.wall_s = None
+        self.lock = threading.Lock()
+        self.phases = {}    # name -> [seconds, calls]
+        self.counters = {}  # name -> number
+
+    def add_phase(self, name, seconds):
+        with self.lock:
+            entry = self.phases.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def finish(self):
+        self.wall_s = time.perf_counter() - self._start
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "command": self.command,
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "wall_s": round(self.wall_s if self.wall_s is not None else time.perf_counter() - self._start, 4),
+                "phases": {k: {"seconds": round(s, 4), "calls": c} for k, (s, c) in sorted(self.phases.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def save(self, path=None):
+        """Write the report as JSON (default: .reports/<command>.json). Returns the path."""
+        path = path or os.path.join(REPORT_DIR, f"{self.command or 'run'}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp, path)
+        return path
+
+    def summary(self):
+        """A few lines for the end of a run: slowest phases and all counters."""
+        data = self.to_dict()
+        lines = [f"Run report ({data['command']}): {data['wall_s']:.2f}s wall"]
+        phases = sorted(data["phases"].items(), key=lambda kv: -kv[1]["seconds"])
+        for name, p in phases[:8]:
+            lines.append(f"  {name:24} {p['seconds']:9.3f}s  x{p['calls']}")
+        if data["counters"]:
+            lines.append("  " + ", ".join(f"{k}={v}" for k, v in data["counters"].items()))
+        return "\n".join(lines)
+
+
+_current = RunReport()
+
+
+def start(command):
+    """Begin a fresh report for a command and make it current."""
+    global _current
+    _current = RunReport(command)
+    return _current
+
+
+def current():
+    return _current
+
+
+def count(name, n=1):
+    _current.count(name, n)
+
+
+@contextmanager
+def phase(name):
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        _current.add_phase(name, time.perf_counter() - start_time)
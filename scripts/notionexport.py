@@ -0,0 +1,144 @@
+"""
+Read a Notion export in place: an unpacked folder, the export .zip, or a
+zip of "Part-N" zips as Notion produces for large workspaces.
+
+Member names are indexed once. Notion appends a 32-character id to page
+and database names ("Paris 1c2e...9f.md"), so every path is also indexed
+with the ids stripped ("Paris.md"). Finding an entry's page or image
+folder is then a dictionary lookup instead of a glob, and files are
+streamed straight out of the archive without extracting it.
+"""
+
+import copy
+import io
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+import urllib.parse
+import zipfile
+from collections import defaultdict
+
+NOTION_ID = re.compile(r'\s[0-9a-f]{32}(?=(_all)?$)')
+
+# Inner Part-N zips up to this size are read into memory; larger ones are spooled to a temp file
+INNER_ZIP_MEMORY = 64 << 20
+
+
+def clean_name(name):
+    """Strip a Notion id from one path segment: "Paris 1c2e...9f.md" -> "Paris.md"."""
+    stem, ext = posixpath.splitext(name)
+    if NOTION_ID.search(stem):
+        return NOTION_ID.sub("", stem) + ext
+    # Folder names have no extension but may contain dots ("St. John's 1c2e...")
+    return NOTION_ID.sub("", name)
+
+
+def clean_path(path):
+    return "/".join(clean_name(segment) for segment in path.split("/") if segment)
+
+
+class NotionExport:
+    """Read-only view of a Notion export, optionally scoped to one database folder."""
+
+    def __init__(self, path):
+        self.path = path
+        self.root = ""     # clean path of the folder lookups are relative to
+        self.openers = {}  # real member path -> callable returning a binary file
+        self.clean = {}    # clean path (files and folders) -> real path
+        self.children = defaultdict(list)  # clean folder -> real paths of the files in it
+        self._archives = []  # open ZipFiles and the spooled copies of inner zips
+        self.base_dir = None  # set for unpacked exports
+        if os.path.isdir(path):
+            self._index_dir(path)
+        else:
+            self._index_zip(zipfile.ZipFile(path))
+
+    def _add(self, real, opener):
+        self.openers[real] = opener
+        parts = real.split("/")
+        for i in range(1, len(parts)):
+            self.clean.setdefault(clean_path("/".join(parts[:i])), "/".join(parts[:i]))
+        cleaned = clean_path(real)
+        self.clean.setdefault(cleaned, real)
+        self.children[posixpath.dirname(cleaned)].append(real)
+
+    def _index_dir(self, base):
+        self.base_dir = base
+        for dirpath, _, filenames in os.walk(base):
+            rel_dir = os.path.relpath(dirpath, base).replace(os.sep, "/")
+            for filename in filenames:
+                real = filename if rel_dir == "." else f"{rel_dir}/{filename}"
+                full = os.path.join(dirpath, filename)
+                self._add(real, lambda full=full: open(full, "rb"))
+
+    def _index_zip(self, archive):
+        self._archives.append(archive)
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            if info.filename.lower().endswith(".zip"):
+                # Large exports are split into Part-N zips that all share one tree. Reading a
+                # zip needs seeks, and a seek inside a compressed member decompresses it again
+                # from the start, so each part is copied out once into a seekable spool
+                spool = tempfile.SpooledTemporaryFile(max_size=INNER_ZIP_MEMORY)
+                self._archives.append(spool)
+                with archive.open(info) as member:
+                    shutil.copyfileobj(member, spool, 1 << 20)
+                spool.seek(0)
+                self._index_zip(zipfile.ZipFile(spool))
+            else:
+                self._add(info.filename, lambda info=info, archive=archive: archive.open(info))
+
+    def close(self):
+        for archive in reversed(self._archives):
+            archive.close()
+
+    # --- lookups ---
+
+    def database(self, name):
+        """A view of this export scoped to the folder of database `name`, or None if absent."""
+        matches = [p for p in self.clean if posixpath.basename(p) == name and p in self.children]
+        if not matches:
+            return None
+        view = copy.copy(self)
+        view.root = min(matches, key=len)
+        return view
+
+    def find(self, path):
+        """Real member path for a path relative to the view root (ids optional), or None."""
+        return self.clean.get(clean_path(posixpath.join(self.root, path)))
+
+    def find_csv(self, name):
+        """Real path of database `name`'s CSV, preferring the "_all" variant that includes every view."""
+        for candidate in (f"{name}_all.csv", f"{name}.csv"):
+            matches = [p for p in self.clean if posixpath.basename(p) == candidate]
+            if matches:
+                return self.clean[min(matches, key=len)]
+        return None
+
+    def listdir(self, path):
+        """Real paths of the files directly inside a folder relative to the view root."""
+        return list(self.children.get(clean_path(posixpath.join(self.root, path)), ()))
+
+    def resolve_ref(self, ref):
+        """Real path for a link inside a page (e.g. "Paris%201c2e.../IMG_1.jpg"), or None."""
+        for candidate in (ref, urllib.parse.unquote(ref)):
+            real = self.find(candidate)
+            if real:
+                return real
+        return None
+
+    # --- reading ---
+
+    def open(self, real):
+        """Open a member for binary reading."""
+        return self.openers[real]()
+
+    def local_path(self, real):
+        """Path on disk for a member of an unpacked export (None inside a zip)."""
+        return os.path.join(self.base_dir, *real.split("/")) if self.base_dir else None
+
+    def open_text(self, real):
+        return io.TextIOWrapper(self.open(real), encoding="utf-8-sig", newline="")
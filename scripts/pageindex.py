@@ -0,0 +1,153 @@
+"""
+Lazy, frontmatter-only index of the markdown pages in a content folder.
+
+Only the frontmatter block of each page is read (stopping at the closing
+---), and only the requested top-level keys are kept, in compact
+__slots__ records. Page bodies are read on demand for the few pages that
+are actually rewritten. With a SyncManifest, pages unchanged since the
+last run are not opened at all.
+"""
+
+import os
+import re
+
+from . import metrics
+
+FIELD_LINE = re.compile(r'^([^\s#:-][^:]*):[ \t]*(.*?)\s*$')
+
+
+def read_header(path):
+    """Return a page's frontmatter block including its --- delimiters, or '' if it has none."""
+    lines = []
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline()
+        if first.rstrip("\r\n") != "---":
+            return ""
+        lines.append(first)
+        for line in f:
+            lines.append(line)
+            if line.rstrip("\r\n") == "---":
+                break
+    return "".join(lines)
+
+
+def header_fields(header, keys):
+    """Raw string values of the requested top-level keys ('' for a key with no inline value)."""
+    fields = {}
+    for line in header.splitlines()[1:]:
+        m = FIELD_LINE.match(line)
+        if m and m.group(1) in keys:
+            fields.setdefault(m.group(1), m.group(2))
+    return fields
+
+
+class PageRecord:
+    __slots__ = ("index", "path", "_fields", "_unchanged")
+
+    def __init__(self, index, path):
+        self.index = index
+        self.path = path
+        self._fields = None
+        self._unchanged = False
+
+    def __repr__(self):
+        return f"PageRecord({self.path!r})"
+
+    @property
+    def filename(self):
+        return os.path.basename(self.path)
+
+    @property
+    def stem(self):
+        return os.path.splitext(self.filename)[0]
+
+    @property
+    def fields(self):
+        if self._fields is None:
+            self.index.load(self)
+        return self._fields
+
+    @property
+    def unchanged(self):
+        """True if the page is unchanged since the manifest last recorded it."""
+        if self._fields is None:
+            self.index.load(self)
+        return self._unchanged
+
+    def get(self, key, default=None):
+        return self.fields.get(key, default)
+
+    @property
+    def title(self):
+        return self.fields.get("title") or self.stem
+
+    def read(self):
+        """Read the full page content."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            return f.read()
+
+
+class PageIndex:
+    """Index of *.md pages (except index.md) in one directory; a missing directory is empty."""
+
+    def __init__(self, directory, keys=("title",), manifest=None):
+        self.directory = directory
+        self.keys = frozenset(keys)
+        self.manifest = manifest
+        self.records = {}
+        with metrics.phase("pages.list"):
+            for fname in os.listdir(directory) if os.path.isdir(directory) else ():
+                if fname.endswith(".md") and fname != "index.md":
+                    self.records[fname] = PageRecord(self, os.path.join(directory, fname))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def __contains__(self, filename):
+        return filename in self.records
+
+    def get(self, filename):
+        return self.records.get(filename)
+
+    def load(self, record):
+        """Fill a record's fields, from the manifest if the page is unchanged, else from its header.
+
+        Recorded fields are only reused if they were extracted for (at least) this index's keys.
+        """
+        keys = self.keys
+        unchanged = False
+        if self.manifest is not None:
+            facts = self.manifest.page_facts(record.path)
+            if facts is not None and "fields" in facts:
+                recorded = frozenset(facts.get("keys", ()))
+                if keys <= recorded:
+                    record._fields = {k: v for k, v in facts["fields"].items() if k in keys}
+                    record._unchanged = True
+                    metrics.count("pages.from_manifest")
+                    return
+                # The page is unchanged but was indexed for other keys: read it for all of them
+                keys = keys | recorded
+                unchanged = True
+        metrics.count("pages.headers_read")
+        header = read_header(record.path)
+        fields = header_fields(header, keys)
+        record._fields = {k: v for k, v in fields.items() if k in self.keys}
+        record._unchanged = unchanged
+        if self.manifest is not None:
+            self.manifest.record_page(record.path, header, fields=fields, keys=sorted(keys))
+
+    def refresh(self, filename):
+        """Re-read a page after it was written (adding it to the index if new)."""
+        record = self.records.get(filename)
+        if record is None:
+            record = self.records[filename] = PageRecord(self, os.path.join(self.directory, filename))
+        record._fields = None
+        self.load(record)
+        return record
+
+    def by_title(self):
+        """{lowercase title: record} for every page."""
+        return {record.title.lower(): record for record in self}
@@ -0,0 +1,116 @@
+"""
+Shared write layer for content pages and covers.
+
+Quartz's watch mode rebuilds on every file event, so a sync should only
+touch files whose bytes actually change:
+- new content is compared to what is on disk (or already queued) first;
+  identical content is never written and keeps its mtime
+- real changes are queued and written in one burst when the batch fills
+  or the writer is flushed
+- each file is written to a temp file in the same directory and renamed
+  over the target, so readers never see a half-written page
+"""
+
+import os
+import shutil
+import threading
+
+from . import metrics
+
+# Pending writes are flushed once this many have been queued
+BATCH_SIZE = 64
+
+# Temp files are gitignored, so Quartz's watcher never picks them up
+TMP_SUFFIX = ".sync-tmp"
+
+
+def atomic_write(path, data):
+    """Write bytes to path via a temp file and rename, keeping the existing file mode."""
+    directory, name = os.path.split(path)
+    tmp = os.path.join(directory, f".{name}.{os.getpid()}{TMP_SUFFIX}")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        if os.path.exists(path):
+            shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def same_bytes(path, data):
+    """True if path exists and holds exactly data."""
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except FileNotFoundError:
+        return False
+
+
+class PageWriter:
+    """Batched, skip-unchanged, atomic file writer. Safe to share between threads."""
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.lock = threading.RLock()
+        self.pending = {}  # path -> (bytes, [callbacks])
+        self.written = 0
+        self.unchanged = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def write(self, path, content, after=None):
+        """Queue content (str or bytes) for path. Returns False if the file already holds it.
+
+        after() is called once the bytes are on disk: right away for unchanged
+        files, else when the batch is flushed (e.g. to refresh an index or manifest).
+        """
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        with self.lock:
+            queued = self.pending.get(path)
+            current = queued[0] == data if queued else same_bytes(path, data)
+            if current and not queued:
+                self.unchanged += 1
+                metrics.count("files.unchanged")
+            elif current:
+                if after:
+                    queued[1].append(after)
+                return True
+            else:
+                callbacks = queued[1] if queued else []
+                if after:
+                    callbacks.append(after)
+                self.pending[path] = (data, callbacks)
+                if len(self.pending) >= self.batch_size:
+                    self._flush_locked()
+                return True
+        if after:
+            after()
+        return False
+
+    def flush(self):
+        """Write all queued changes, then run their callbacks."""
+        with self.lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        with metrics.phase("files.write"):
+            for path, (data, _) in pending.items():
+                atomic_write(path, data)
+        self.written += len(pending)
+        metrics.count("files.written", len(pending))
+        metrics.count("files.bytes_written", sum(len(data) for data, _ in pending.values()))
+        for _, callbacks in pending.values():
+            for callback in callbacks:
+                callback()
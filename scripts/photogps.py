@@ -0,0 +1,184 @@
+"""
+Coordinates for travel pages from the GPS EXIF of their own photos.
+
+Only the start of each JPEG is read: the segment headers up to the Exif
+APP1 block (at most 64 KB), which is parsed in place for the GPS IFD; the
+image data is never touched. Photos are read in parallel, and the page's
+coordinates are a robust centroid of their fixes: the component-wise
+median, then the mean of the fixes near it, so one photo taken at the
+airport doesn't drag a trek off its valley while a long trail still lands
+in its middle.
+"""
+
+import os
+import struct
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from statistics import median
+
+from . import config, metrics
+from .geosearch import haversine_km
+from .markdown import BODY_IMAGE, EXTERNAL
+
+CONTENT_DIR = config.CONTENT_DIR
+ASSETS_DIR = config.ASSETS_DIR
+
+EXIF_EXTS = {'.jpg', '.jpeg'}
+READ_WORKERS = 8
+
+# Fixes further than this from the median (or 3x the median distance, if larger) are outliers
+OUTLIER_KM = 25
+
+GPS_IFD_TAG = 0x8825
+# EXIF field types: size in bytes
+TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+
+def _exif_block(f):
+    """Return the TIFF data of a JPEG's Exif APP1 segment, reading only segment headers before it."""
+    if f.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        header = f.read(2)
+        if len(header) < 2 or header[0] != 0xFF:
+            return None
+        marker = header[1]
+        while marker == 0xFF:  # fill bytes
+            byte = f.read(1)
+            if not byte:
+                return None
+            marker = byte[0]
+        if marker in (0xD9, 0xDA):  # end of image / start of scan: no Exif ahead
+            return None
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            continue
+        size = f.read(2)
+        if len(size) < 2:
+            return None
+        length = struct.unpack(">H", size)[0] - 2
+        if length < 0:
+            return None
+        if marker == 0xE1:
+            data = f.read(length)
+            if data.startswith(b"Exif\0\0"):
+                return data[6:]
+        else:
+            f.seek(length, os.SEEK_CUR)
+
+
+def _ifd(tiff, offset, endian):
+    """Entries of one IFD: {tag: (type, count, raw 4-byte value or offset)}."""
+    (count,) = struct.unpack_from(endian + "H", tiff, offset)
+    entries = {}
+    for i in range(count):
+        tag, typ, n, raw = struct.unpack_from(endian + "HHI4s", tiff, offset + 2 + 12 * i)
+        entries[tag] = (typ, n, raw)
+    return entries
+
+
+def _value_bytes(tiff, entry, endian):
+    typ, n, raw = entry
+    size = TYPE_SIZES.get(typ, 1) * n
+    if size <= 4:
+        return raw[:size]
+    (offset,) = struct.unpack(endian + "I", raw)
+    return tiff[offset:offset + size]
+
+
+def _degrees(tiff, entry, endian):
+    """Degrees from an EXIF (degrees, minutes, seconds) rational triple."""
+    data = _value_bytes(tiff, entry, endian)
+    parts = struct.unpack(endian + "6I", data[:24])
+    values = [num / den if den else 0.0 for num, den in zip(parts[::2], parts[1::2])]
+    return values[0] + values[1] / 60 + values[2] / 3600
+
+
+def gps_from_tiff(tiff):
+    """(lat, lng) from the GPS IFD of EXIF TIFF data, or None (also for truncated or corrupt data)."""
+    if tiff[:2] == b"II":
+        endian = "<"
+    elif tiff[:2] == b"MM":
+        endian = ">"
+    else:
+        return None
+    try:
+        (ifd0,) = struct.unpack_from(endian + "I", tiff, 4)
+        pointer = _ifd(tiff, ifd0, endian).get(GPS_IFD_TAG)
+        if pointer is None:
+            return None
+        (gps_offset,) = struct.unpack(endian + "I", pointer[2])
+        gps = _ifd(tiff, gps_offset, endian)
+        if not all(tag in gps for tag in (1, 2, 3, 4)):
+            return None
+        lat = _degrees(tiff, gps[2], endian)
+        lng = _degrees(tiff, gps[4], endian)
+        if _value_bytes(tiff, gps[1], endian)[:1] == b"S":
+            lat = -lat
+        if _value_bytes(tiff, gps[3], endian)[:1] == b"W":
+            lng = -lng
+    except struct.error:
+        return None
+    # Cameras without a fix often write zeros
+    if (lat == 0 and lng == 0) or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def read_gps(path):
+    """GPS fix (lat, lng) of a JPEG, or None. Reads only the file's header segments."""
+    try:
+        with open(path, "rb") as f:
+            tiff = _exif_block(f)
+        return gps_from_tiff(tiff) if tiff else None
+    except OSError:
+        return None
+
+
+def robust_centroid(points, outlier_km=OUTLIER_KM):
+    """Centroid of GPS fixes that ignores stray ones: mean of the fixes near the median point."""
+    if not points:
+        return None
+    center = (median(p[0] for p in points), median(p[1] for p in points))
+    distances = [haversine_km(center, p) for p in points]
+    limit = max(outlier_km, 3 * median(distances))
+    kept = [p for p, d in zip(points, distances) if d <= limit] or [center]
+    return (round(sum(p[0] for p in kept) / len(kept), 4),
+            round(sum(p[1] for p in kept) / len(kept), 4))
+
+
+def page_photos(body, page_dir):
+    """Paths of the JPEGs a page embeds (![[name]], ![alt](path), <img src>) that exist on disk."""
+    paths = []
+    for m in BODY_IMAGE.finditer(body):
+        ref = (m.group("embed") or m.group("link") or m.group("html") or "").strip()
+        if not ref or ref.startswith(EXTERNAL):
+            continue
+        ref = urllib.parse.unquote(ref)
+        if os.path.splitext(ref)[1].lower() not in EXIF_EXTS:
+            continue
+        # Wiki embeds resolve by file name (our images live in assets/); links are from the vault root
+        candidates = (os.path.join(ASSETS_DIR, os.path.basename(ref)), os.path.join(CONTENT_DIR, ref),
+                      os.path.join(page_dir, ref))
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                if candidate not in paths:
+                    paths.append(candidate)
+                break
+    return paths
+
+
+def photo_coordinates(body, page_dir, workers=READ_WORKERS):
+    """Return ((lat, lng), number of photos with a fix) for a page body, or (None, 0)."""
+    return coordinates_from_photos(page_photos(body, page_dir), workers)
+
+
+def coordinates_from_photos(photos, workers=READ_WORKERS):
+    """Return ((lat, lng), number of photos with a fix) for image paths, or (None, 0)."""
+    photos = [p for p in photos if os.path.splitext(p)[1].lower() in EXIF_EXTS]
+    if not photos:
+        return None, 0
+    with metrics.phase("photogps.read"), ThreadPoolExecutor(max_workers=workers) as pool:
+        fixes = [fix for fix in pool.map(read_gps, photos) if fix]
+    metrics.count("photogps.photos_read", len(photos))
+    metrics.count("photogps.fixes", len(fixes))
+    return robust_centroid(fixes), len(fixes)
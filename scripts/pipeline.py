@@ -0,0 +1,104 @@
+"""
+Streaming building blocks for the Notion ingestion pipelines.
+
+Each sync is a chain of generator stages (parse -> normalize -> match ->
+plan -> apply), so rows flow through one at a time and an export is never
+loaded whole. `buffered` runs an upstream stage in a background thread
+behind a bounded queue: parsing overlaps with matching and writing, and a
+slow consumer blocks the producer instead of letting rows pile up.
+"""
+
+import csv
+import queue
+import threading
+
+from . import metrics
+
+# Rows held between two stages at most
+QUEUE_SIZE = 256
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+def read_csv_rows(source):
+    """Yield rows of a Notion CSV export as dicts, one at a time.
+
+    source is a file path or a zero-argument callable returning an open text file
+    (e.g. a member streamed out of an export zip).
+    """
+    f = source() if callable(source) else open(source, "r", encoding="utf-8-sig", newline="")
+    rows = 0
+    try:
+        with f:
+            for row in csv.DictReader(f):
+                rows += 1
+                yield row
+    finally:
+        metrics.count("csv.rows", rows)
+
+
+def buffered(iterable, maxsize=QUEUE_SIZE):
+    """Iterate `iterable` in a background thread, handing items over through a bounded queue.
+
+    Exceptions raised upstream are re-raised in the consumer. Closing the
+    returned generator early stops the producer.
+    """
+    items = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+class Counter(dict):
+    """Named counts for a pipeline run; missing names read as 0.
+
+    With a prefix, counts also go to the run report as "<prefix>.<name>".
+    """
+
+    def __init__(self, prefix=None):
+        super().__init__()
+        self.prefix = prefix
+
+    def __missing__(self, key):
+        return 0
+
+    def add(self, key, n=1):
+        self[key] += n
+        if self.prefix:
+            metrics.count(f"{self.prefix}.{key}", n)
@@ -0,0 +1,62 @@
+"""Thread-safe token-bucket rate limiting, keyed per host."""
+
+import threading
+import time
+import urllib.parse
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second on average, with bursts up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available now. Returns False instead of blocking."""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """One TokenBucket per host; hosts not listed in `rates` use `default_rate`."""
+
+    def __init__(self, rates=None, default_rate=1.0, burst=1):
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, host):
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rates.get(host, self.default_rate), self.burst)
+            return self.buckets[host]
+
+    def wait(self, url):
+        """Block until a request to url's host is allowed."""
+        self.bucket(urllib.parse.urlsplit(url).hostname or "").acquire()
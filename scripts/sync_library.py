@@ -0,0 +1,578 @@
+"""Sync the library collections (Books, Movies, Short Stories) from Notion exports.
+
+Each collection is a Collection schema: its Notion database and content
+folder, the title column, how CSV columns map to frontmatter fields, the
+date field repaired on existing pages, file naming rules and an optional
+cover provider. One engine runs every collection: create new pages, fix
+missing or invalid dates, download covers. A run shares one page writer,
+one cover download pool and the Open Library client (connection pool and
+HTTP cache) across all collections.
+
+Run with: python -m scripts library   (all collections)
+          python -m scripts books     (Books only)
+"""
+
+import os
+import re
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from functools import partial
+
+from . import clients, config, frontmatter, metrics
+from .manifest import SyncManifest
+from .notionexport import NotionExport
+from .pageindex import PageIndex
+from .pagewriter import PageWriter
+from .pipeline import Counter, buffered, read_csv_rows
+from .titlematch import TitleIndex, main_title
+
+NOTION_EXPORT = config.NOTION_EXPORT
+
+# Parallel cover downloads (throttled per host by the shared Open Library client)
+COVER_WORKERS = 8
+
+def title_to_filename(title):
+    """Convert book title to .md filename matching existing convention."""
+    # Replace : with -
+    name = title.replace(":", "-")
+    # Strip trailing whitespace
+    name = name.strip()
+    return name + ".md"
+
+def title_to_cover_filename(title):
+    """Convert book title to cover image filename matching existing convention."""
+    name = title.strip()
+    # Replace spaces with _
+    name = name.replace(" ", "_")
+    # Replace : with -
+    name = name.replace(":", "-")
+    # Remove apostrophes
+    name = name.replace("'", "")
+    # Remove commas
+    name = name.replace(",", "")
+    # Replace @ with _
+    name = name.replace("@", "_")
+    # Replace & with __
+    name = name.replace("&", "__")
+    # Replace = with _
+    name = name.replace("=", "_")
+    # Remove parentheses content chars
+    name = name.replace("(", "").replace(")", "")
+    # Remove !
+    name = name.replace("!", "")
+    # Remove "
+    name = name.replace('"', '')
+    # Clean up multiple underscores
+    name = re.sub(r'_+', '_', name)
+    name = name.strip('_')
+    return name + ".jpg"
+
+def parse_timeline_to_iso(timeline_str):
+    """Parse Notion timeline string to ISO date(s)."""
+    if not timeline_str or not timeline_str.strip():
+        return None
+
+    timeline_str = timeline_str.strip()
+
+    # Handle range: "July 7, 2020 → August 1, 2020" or "September 1, 2025 → September 20, 2025"
+    if "→" in timeline_str:
+        parts = timeline_str.split("→")
+        start = parts[0].strip()
+        end = parts[1].strip()
+        try:
+            start_dt = datetime.strptime(start, "%B %d, %Y")
+            end_dt = datetime.strptime(end, "%B %d, %Y")
+            return f"{start_dt.strftime('%Y-%m-%d')} → {end_dt.strftime('%Y-%m-%d')}"
+        except ValueError:
+            pass
+
+    # Handle single date: "June 19, 2021"
+    try:
+        dt = datetime.strptime(timeline_str.strip(), "%B %d, %Y")
+        return dt.strftime("%Y-%m-%d")
+    except ValueError:
+        pass
+
+    return None
+
+def parse_entry_date_to_iso(date_str):
+    """Parse entry date to ISO format."""
+    if not date_str or not date_str.strip():
+        return None
+    date_str = date_str.strip()
+    # Handle range in entry date (e.g. "May 3, 2023 → May 29, 2023")
+    if "→" in date_str:
+        parts = date_str.split("→")
+        date_str = parts[0].strip()
+    try:
+        dt = datetime.strptime(date_str, "%B %d, %Y")
+        return dt.strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+def parse_created_to_iso(value):
+    """Parse a Notion "Created time" ("December 17, 2022 12:57 PM") to 2022-12-17T12:57."""
+    if not value or not value.strip():
+        return None
+    try:
+        return datetime.strptime(value.strip(), "%B %d, %Y %I:%M %p").strftime("%Y-%m-%dT%H:%M")
+    except ValueError:
+        return parse_entry_date_to_iso(value)
+
+# --- Field converters: CSV cell -> frontmatter value (None leaves the field out) ---
+
+def text(value):
+    return value.strip() or None
+
+def status_list(value):
+    """Notion multi-select as a list; books without a status count as finished."""
+    value = value.strip() or "Finished"
+    return [s.strip() for s in value.split(",")]
+
+def tag_list(value):
+    return [t.strip() for t in value.split(",") if t.strip()] or None
+
+def yes_no(value):
+    return value.strip().lower() == "yes"
+
+# --- Cover providers: provider(title, dest, writer) -> True if a cover is in place ---
+
+def download_cover(title, dest, writer):
+    """Download book cover from Open Library API."""
+    # Normalize the query so equivalent titles share a cached search response
+    search_query = urllib.parse.quote(" ".join(title.lower().split()))
+    search_url = f"{config.OPENLIBRARY_URL}/search.json?title={search_query}&limit=3"
+
+    try:
+        data = clients.openlibrary().get_json(search_url)
+
+        if not data.get("docs"):
+            print(f"  No results found on Open Library for: {title}")
+            return False
+
+        # Find first doc with a cover
+        cover_id = None
+        for doc in data["docs"][:3]:
+            if doc.get("cover_i"):
+                cover_id = doc["cover_i"]
+                break
+
+        if not cover_id:
+            print(f"  No cover image found on Open Library for: {title}")
+            return False
+
+        # Download medium-size cover (cached by cover id, so renamed titles reuse it)
+        cover_url = f"{config.OPENLIBRARY_COVERS_URL}/b/id/{cover_id}-M.jpg"
+        img_data = clients.openlibrary().get_blob(cover_url, f"{cover_id}-M.jpg")
+
+        # Check if we got a real image (not a 1x1 placeholder)
+        if len(img_data) < 1000:
+            print(f"  Cover image too small (placeholder?) for: {title}")
+            return False
+
+        if writer.write(dest, img_data):
+            print(f"  Downloaded cover: {os.path.basename(dest)} ({len(img_data)} bytes)")
+        return True
+
+    except Exception as e:
+        print(f"  Error downloading cover for {title}: {e}")
+        return False
+
+def openlibrary_cover(title, dest, writer):
+    """Open Library cover, retrying with a simplified title. Safe to run from worker threads."""
+    has_cover = download_cover(title, dest, writer)
+    if not has_cover:
+        # Try simpler search query (just main title words)
+        simple_title = title.split(":")[0].split("(")[0].strip()
+        if simple_title != title:
+            print(f"  Retrying with simplified title: {simple_title}")
+            has_cover = download_cover(simple_title, dest, writer)
+    return has_cover
+
+# --- Collection schemas ---
+
+class Collection:
+    """How one Notion database maps onto a content folder."""
+
+    def __init__(self, name, database, directory, title_column, fields, date_field=None, date_before=None,
+                 cover_provider=None, csv_path=None, page_filename=title_to_filename,
+                 cover_filename=title_to_cover_filename):
+        self.name = name                      # manifest name and metrics prefix
+        self.database = database              # database name inside a full Notion export
+        self.directory = directory
+        self.covers_dir = os.path.join(directory, "covers")
+        self.title_column = title_column
+        self.fields = fields                  # [(frontmatter key, CSV column, converter)] in page order
+        self.date_field = date_field          # (key, column, converter) repaired on existing pages
+        self.date_before = date_before        # key a missing date is inserted before
+        self.cover_provider = cover_provider  # None: only covers already in the covers folder are used
+        self.csv_path = csv_path              # separately exported CSV, if any
+        self.page_filename = page_filename
+        self.cover_filename = cover_filename
+
+    def __repr__(self):
+        return f"Collection({self.name!r})"
+
+    @property
+    def cover_link(self):
+        """Covers folder as a link from the vault root, for the cover embed in page bodies."""
+        return urllib.parse.quote(os.path.relpath(self.covers_dir, config.CONTENT_DIR).replace(os.sep, "/"))
+
+
+BOOKS = Collection(
+    "books", config.NOTION_BOOKS_DATABASE, config.BOOKS_DIR, "Title",
+    fields=[
+        ("Entry Date", "Entry Date", parse_entry_date_to_iso),
+        ("Primary Author", "Primary Author", text),
+        ("Status", "Status", status_list),
+        ("Timeline", "Timeline", parse_timeline_to_iso),
+        ("Favorite", "Favorite", yes_no),
+    ],
+    date_field=("Timeline", "Timeline", parse_timeline_to_iso),
+    date_before="Favorite",
+    cover_provider=openlibrary_cover,
+    csv_path=config.NOTION_BOOKS_CSV,
+)
+
+# Open Library has no films or single stories: these use covers added by hand
+MOVIES = Collection(
+    "movies", config.NOTION_MOVIES_DATABASE, config.MOVIES_DIR, "Name",
+    fields=[
+        ("tags", "Type", tag_list),
+        ("Date", "Date", parse_entry_date_to_iso),
+    ],
+    date_field=("Date", "Date", parse_entry_date_to_iso),
+    csv_path=config.NOTION_MOVIES_CSV,
+)
+
+SHORT_STORIES = Collection(
+    "short-stories", config.NOTION_SHORT_STORIES_DATABASE, config.SHORT_STORIES_DIR, "Name",
+    fields=[
+        ("Created", "Created", parse_created_to_iso),
+        ("Author", "Author", text),
+        ("Favorite", "Favorite", yes_no),
+        ("URL", "URL", text),
+    ],
+    csv_path=config.NOTION_SHORT_STORIES_CSV,
+)
+
+COLLECTIONS = {c.name: c for c in (BOOKS, MOVIES, SHORT_STORIES)}
+
+# --- Pages ---
+
+def render_page(collection, row, cover_filename):
+    """Text of a new page: frontmatter from the schema's fields, then the cover."""
+    lines = ["---"]
+    if cover_filename:
+        lines.append(f"image: covers/{cover_filename}")
+    for key, column, convert in collection.fields:
+        value = convert(row.get(column, ""))
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            lines.append(f"{key}: {'true' if value else 'false'}")
+        elif isinstance(value, list):
+            lines.append(f"{key}:")
+            lines.extend(f"  - {item}" for item in value)
+        else:
+            lines.append(f"{key}: {value}")
+    lines.append("---")
+    lines.append("")
+    if cover_filename:
+        lines.append(f"![cover]({collection.cover_link}/{urllib.parse.quote(cover_filename)})")
+        lines.append("")
+    return "\n".join(lines)
+
+def create_page(collection, title, row, cover_filename, writer, after=None):
+    """Create a new page for a row."""
+    filename = collection.page_filename(title)
+    filepath = os.path.join(collection.directory, filename)
+    if writer.write(filepath, render_page(collection, row, cover_filename), after=after):
+        print(f"  Created: {filename}")
+    return filepath
+
+def fix_date(filepath, key, new_date_iso, writer, after=None, before=None):
+    """Fix an Invalid date or missing date field in an existing page."""
+    with open(filepath, "r") as f:
+        content = f.read()
+
+    # Replace "<key>: Invalid date" with correct value
+    if f"{key}: Invalid date" in content:
+        content = content.replace(f"{key}: Invalid date", f"{key}: {new_date_iso}")
+        writer.write(filepath, content, after=after)
+        print(f"  Fixed {key} in: {os.path.basename(filepath)}")
+        return True
+
+    # If the field is missing entirely, add it before `before` (or at the end of the frontmatter)
+    if f"{key}:" not in content:
+        if before and f"{before}:" in content:
+            content = content.replace(f"{before}:", f"{key}: {new_date_iso}\n{before}:", 1)
+        else:
+            fm_text, body = frontmatter.split(content)
+            if fm_text is None:
+                fm_text, body = "", "\n" + content
+            content = f"---\n{fm_text}{key}: {new_date_iso}\n---{body}"
+        writer.write(filepath, content, after=after)
+        print(f"  Added {key} to: {os.path.basename(filepath)}")
+        return True
+
+    if after:
+        after()
+    return False
+
+def normalize(s):
+    """Matching key for titles and filenames: lowercase alphanumerics only."""
+    return re.sub(r'[^a-z0-9]', '', s.lower())
+
+def needs_date(page, key):
+    value = page.get(key)
+    return value is None or value == "Invalid date"
+
+# --- Pipeline stages: parse -> normalize -> match -> plan -> apply ---
+
+def normalize_rows(rows, title_column="Title"):
+    """Yield (title, row) for CSV rows that have a title."""
+    for row in rows:
+        title = row.get(title_column, "").strip()
+        if title:
+            yield title, row
+
+def match_rows(collection, items, pages, manifest, stats):
+    """Yield (title, row, matched filename or None), dropping rows unchanged since the last run."""
+    existing_normalized = {normalize(fname[:-3]): fname for fname in pages.records}
+    # "Anxious People" and "Anxious People- A Novel" are one book, though too far apart for the
+    # fuzzy index: pages with a subtitle, by their main title
+    existing_main = {}
+    for fname in pages.records:
+        main = normalize(main_title(fname[:-3]))
+        if main != normalize(fname[:-3]):
+            existing_main.setdefault(main, fname)
+    # Built on first use: a no-op sync never needs the fuzzy index
+    title_index = None
+
+    for title, row in items:
+        # Unchanged row whose page is also unchanged since the last run: nothing to do
+        prev = manifest.row(title)
+        if manifest.row_unchanged(title, row) and prev.get("page") in pages:
+            if pages.get(prev["page"]).unchanged:
+                stats.add("skipped")
+                continue
+
+        filename = collection.page_filename(title)
+        norm_title = normalize(title.replace(":", "-"))
+        main = normalize(main_title(title))
+
+        # Check if exists
+        matched_file = None
+        if filename in pages:
+            matched_file = filename
+        elif norm_title in existing_normalized:
+            matched_file = existing_normalized[norm_title]
+        elif main != norm_title and main in existing_normalized:
+            # The row has a subtitle the page lacks
+            matched_file = existing_normalized[main]
+        elif norm_title in existing_main:
+            # The page has a subtitle the row lacks
+            matched_file = existing_main[norm_title]
+        else:
+            # Fall back to the closest title by n-gram similarity
+            if title_index is None:
+                title_index = TitleIndex()
+                for norm, fname in existing_normalized.items():
+                    title_index.add(norm, fname)
+            matched_file, _ = title_index.best_match(norm_title)
+
+        if matched_file is None:
+            # Later rows with the same title match the page this one creates
+            existing_normalized.setdefault(norm_title, filename)
+            if main != norm_title:
+                existing_main.setdefault(main, filename)
+        yield title, row, matched_file
+
+def plan_actions(collection, matches, pages):
+    """Yield ("create", title, row, filename) and ("date", title, row, filename, iso) actions.
+
+    Rows needing no change yield ("keep", title, row, filename) so they are still recorded.
+    """
+    for title, row, matched_file in matches:
+        if matched_file is None:
+            yield "create", title, row, collection.page_filename(title)
+            continue
+        if collection.date_field:
+            key, column, convert = collection.date_field
+            iso = convert(row.get(column, ""))
+            if iso and matched_file in pages and needs_date(pages.get(matched_file), key):
+                yield "date", title, row, matched_file, iso
+                continue
+        yield "keep", title, row, matched_file
+
+class CoverQueue:
+    """Cover downloads in flight on the shared pool, counted into each collection's stats."""
+
+    def __init__(self, pool, writer, limit=COVER_WORKERS * 4):
+        self.pool = pool
+        self.writer = writer
+        self.limit = limit
+        self.in_flight = {}  # future -> stats
+
+    def submit(self, collection, title, cover_filename, stats):
+        dest = os.path.join(collection.covers_dir, cover_filename)
+        future = self.pool.submit(self._fetch, collection, title, dest)
+        self.in_flight[future] = stats
+        # Bound pending downloads so a huge export doesn't queue every cover at once
+        self.collect(block=len(self.in_flight) >= self.limit)
+
+    def _fetch(self, collection, title, dest):
+        with metrics.phase(f"{collection.name}.fetch_cover"):
+            return collection.cover_provider(title, dest, self.writer)
+
+    def collect(self, block=False):
+        if not self.in_flight:
+            return
+        if block:
+            done, _ = wait(self.in_flight, return_when=FIRST_COMPLETED)
+        else:
+            done = [f for f in self.in_flight if f.done()]
+        for future in done:
+            stats = self.in_flight.pop(future)
+            if future.result():
+                stats.add("covers")
+
+    def drain(self):
+        while self.in_flight:
+            self.collect(block=True)
+
+def choose_cover(collection, title):
+    """Cover filename for a new page, or None if the collection has no cover for it."""
+    cover_filename = collection.cover_filename(title)
+    if collection.cover_provider or os.path.exists(os.path.join(collection.covers_dir, cover_filename)):
+        return cover_filename
+    return None
+
+def apply_actions(collection, actions, pages, manifest, writer, cover_queue, stats):
+    """Carry out planned actions as they arrive; cover downloads run on the shared pool.
+
+    Covers get their own writer so that page callbacks (index and manifest
+    updates) only ever run on this thread.
+    """
+    def record(title, row, page):
+        if os.path.exists(os.path.join(collection.directory, page)):
+            pages.refresh(page)
+            manifest.record_row(title, row, page=page)
+
+    for kind, title, row, page, *rest in actions:
+        after = partial(record, title, row, page)
+        if kind == "keep":
+            after()
+        elif kind == "date":
+            key = collection.date_field[0]
+            fix_date(os.path.join(collection.directory, page), key, rest[0], writer, after=after,
+                     before=collection.date_before)
+            stats.add("dates")
+        else:
+            cover_filename = choose_cover(collection, title)
+            if cover_filename and collection.cover_provider:
+                cover_queue.submit(collection, title, cover_filename, stats)
+            create_page(collection, title, row, cover_filename, writer, after=after)
+            stats.add("created")
+        cover_queue.collect()
+
+# --- Sources ---
+
+def open_export(export_path=None, csv_paths=None):
+    """The full Notion export to read, or None when separately exported CSVs are used."""
+    export_path = export_path or (None if csv_paths else NOTION_EXPORT)
+    return NotionExport(export_path) if export_path else None
+
+def collection_source(collection, export=None, csv_path=None):
+    """CSV source for read_csv_rows, or None if this collection has no export to sync from."""
+    if export is not None:
+        member = export.find_csv(collection.database)
+        return partial(export.open_text, member) if member else None
+    csv_path = csv_path or collection.csv_path
+    return csv_path if csv_path and os.path.exists(csv_path) else None
+
+def plan_collection(collection, source, stats):
+    """Index the collection's pages and return (pages, manifest, planned actions)."""
+    manifest = SyncManifest.shared(collection.name)
+    keys = (collection.date_field[0],) if collection.date_field else ()
+    pages = PageIndex(collection.directory, keys=keys, manifest=manifest)
+    # CSV parsing runs ahead in a background thread; everything after streams row by row
+    rows = buffered(normalize_rows(read_csv_rows(source), collection.title_column))
+    actions = plan_actions(collection, match_rows(collection, rows, pages, manifest, stats), pages)
+    return pages, manifest, actions
+
+def main(names=None, csv_paths=None, dry_run=False, export_path=None):
+    """Sync the named collections (default: all), in one pass sharing writers, pool and clients.
+
+    csv_paths: {collection name: CSV path} overriding the configured exports.
+    """
+    csv_paths = {k: v for k, v in (csv_paths or {}).items() if v}
+    collections = [COLLECTIONS[name] for name in (names or COLLECTIONS)]
+    export = open_export(export_path, csv_paths)
+
+    sources = {}
+    for collection in collections:
+        source = collection_source(collection, export, csv_paths.get(collection.name))
+        if source is None:
+            print(f"No '{collection.database}' export found; skipping {collection.name}")
+        else:
+            sources[collection.name] = source
+    if not sources:
+        raise SystemExit("Nothing to sync: no export found for " + ", ".join(c.name for c in collections))
+    collections = [c for c in collections if c.name in sources]
+
+    if dry_run:
+        print("\n=== Dry run ===")
+        for collection in collections:
+            stats = Counter(collection.name)
+            pages, manifest, actions = plan_collection(collection, sources[collection.name], stats)
+            print(f"\n[{collection.name}]")
+            for kind, title, row, page, *rest in actions:
+                if kind == "create":
+                    print(f"  Would create: {page}")
+                elif kind == "date":
+                    print(f"  Would set {collection.date_field[0]} of {page} to {rest[0]}")
+            print(f"  Unchanged rows skipped: {stats['skipped']}")
+        if export is not None:
+            export.close()
+        return
+
+    # Pages are written as rows arrive; covers download on a bounded worker pool meanwhile
+    writer = PageWriter()
+    covers = PageWriter()
+    manifests = []
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=COVER_WORKERS) as pool:
+            cover_queue = CoverQueue(pool, covers)
+            for collection in collections:
+                print(f"\n=== Syncing {collection.name} ===\n")
+                stats = Counter(collection.name)
+                pages, manifest, actions = plan_collection(collection, sources[collection.name], stats)
+                manifests.append(manifest)
+                results.append((collection, stats))
+                with metrics.phase(f"{collection.name}.sync"):
+                    apply_actions(collection, actions, pages, manifest, writer, cover_queue, stats)
+            # Covers of every collection finish together at the end
+            with metrics.phase("library.covers_wait"):
+                cover_queue.drain()
+    finally:
+        if export is not None:
+            export.close()
+        covers.flush()
+        writer.flush()
+        for manifest in manifests:
+            manifest.save()
+
+    print(f"\n=== Done! ===")
+    for collection, stats in results:
+        print(f"  [{collection.name}]")
+        print(f"  Unchanged rows skipped: {stats['skipped']}")
+        print(f"  New pages created: {stats['created']}")
+        if collection.cover_provider:
+            print(f"  Covers downloaded: {stats['covers']}")
+        if collection.date_field:
+            print(f"  Dates fixed: {stats['dates']}")
+    print(f"  Files written: {writer.written + covers.written}, already up to date: {writer.unchanged + covers.unchanged}")
@@ -1,4 +1,3 @@
-#!/usr/bin/env python3
 """
 Sync travel pages from Notion export into Quartz content.
 
@@ -6,23 +5,45 @@ Sync travel pages from Notion export into Quartz content.
 2. Copy images from Notion export to content/assets/
 3. Update existing pages with missing dates from CSV
 4. Geocode new pages to get coordinates
+
+Run with: python -m scripts travel-sync
 """
 
-import csv
 import os
+import posixpath
 import re
-import shutil
-import glob
+import urllib.parse
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-
-NOTION_CSV = "/Users/shivam/Documents/Obsedian/Travel/Travel log 4afded99a5534d64be24b7541470718d.csv"
-NOTION_DIR = "/Users/shivam/Documents/Obsedian/Travel/Travel log"
-QUARTZ_TRAVEL = "/Users/shivam/Documents/Obsedian/shivam-quartz-v2/content/Travel and Photography"
-QUARTZ_ASSETS = "/Users/shivam/Documents/Obsedian/shivam-quartz-v2/content/assets"
+from functools import partial
+
+from . import clients, config, metrics
+from .assetstore import AssetStore
+from .geocache import COORD_OVERRIDES, MISS
+from .geosearch import StructuredGeocoder, known_places
+from .manifest import SyncManifest
+from .notionexport import NotionExport
+from .pageindex import PageIndex
+from .pagewriter import PageWriter
+from .photogps import coordinates_from_photos
+from .pipeline import Counter, buffered, read_csv_rows
+
+NOTION_CSV = config.NOTION_TRAVEL_CSV
+NOTION_DIR = config.NOTION_TRAVEL_DIR
+NOTION_EXPORT = config.NOTION_EXPORT
+NOTION_DATABASE = config.NOTION_TRAVEL_DATABASE
+QUARTZ_TRAVEL = config.TRAVEL_DIR
+QUARTZ_ASSETS = config.ASSETS_DIR
 
 # Image extensions to copy
 IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.webp', '.mp4', '.mov'}
 
+# New pages whose text and images are prepared at once while geocoding runs on its own lane
+PAGE_WORKERS = 4
+# New pages waiting for coordinates or content at most
+MAX_PENDING = 64
+
 
 def parse_date(date_str):
     """Parse Notion date string, return the start date as YYYY-MM-DD or None."""
@@ -38,55 +59,44 @@ def parse_date(date_str):
     return None
 
 
-def get_existing_pages():
-    """Get dict of existing travel pages: {lowercase_title: filepath}"""
-    pages = {}
-    for f in glob.glob(os.path.join(QUARTZ_TRAVEL, "*.md")):
-        if os.path.basename(f) == "index.md":
-            continue
-        with open(f, "r") as fh:
-            content = fh.read()
-        # Extract title from frontmatter
-        m = re.search(r'^title:\s*(.+)$', content, re.MULTILINE)
-        if m:
-            title = m.group(1).strip()
-        else:
-            title = os.path.splitext(os.path.basename(f))[0]
-        pages[title.lower()] = {"path": f, "content": content, "title": title}
-    return pages
+def get_existing_pages(manifest=None, keys=("title", "Date")):
+    """Index existing travel pages by their frontmatter title and Date."""
+    return PageIndex(QUARTZ_TRAVEL, keys=keys, manifest=manifest)
 
 
-def get_existing_date(content):
-    """Extract Date from frontmatter."""
-    m = re.search(r'^Date:\s*(.*)$', content, re.MULTILINE)
-    if m:
-        val = m.group(1).strip()
-        return val if val else None
-    return None
+def open_notion_export(csv_path=None, export_path=None):
+    """Return (CSV source, export view of the travel database or None).
 
+    A full Notion export (zip or folder) is read in place; otherwise the
+    separately configured CSV and unpacked database folder are used.
+    """
+    export_path = export_path or (None if csv_path else NOTION_EXPORT)
+    if export_path:
+        export = NotionExport(export_path)
+        member = export.find_csv(NOTION_DATABASE)
+        if member is None:
+            raise SystemExit(f"No '{NOTION_DATABASE}' CSV in {export_path}")
+        return partial(export.open_text, member), export.database(NOTION_DATABASE)
+    export = NotionExport(NOTION_DIR) if os.path.isdir(NOTION_DIR) else None
+    return csv_path or NOTION_CSV, export
 
-def find_notion_md(name):
+
+def find_notion_md(export, name):
     """Find the Notion export .md file for a given entry name."""
-    # Notion exports files as "Name hash.md"
-    pattern = os.path.join(NOTION_DIR, f"{name} *.md")
-    matches = glob.glob(pattern)
-    if matches:
-        return matches[0]
-    # Try without special chars
-    return None
+    # Notion exports files as "Name hash.md"; the export index ignores the hash
+    return export.find(f"{name}.md") if export else None
 
 
-def find_notion_images_dir(name):
+def find_notion_images_dir(export, name):
     """Find the Notion export image directory for a given entry name."""
-    d = os.path.join(NOTION_DIR, name)
-    if os.path.isdir(d):
-        return d
+    if export and export.listdir(name):
+        return name
     return None
 
 
-def extract_notion_content(md_path):
+def extract_notion_content(export, md_path):
     """Extract text content (not metadata lines) and image references from Notion md."""
-    with open(md_path, "r") as f:
+    with export.open_text(md_path) as f:
         lines = f.readlines()
 
     text_lines = []
@@ -115,82 +125,103 @@ def extract_notion_content(md_path):
     return "\n".join(text_lines).strip(), images
 
 
-def copy_images_to_assets(notion_images_dir, images_list):
-    """Copy images from Notion export to Quartz assets. Return list of copied filenames."""
-    copied = []
-    if not notion_images_dir:
-        return copied
+def asset_source(export, member):
+    """Source for AssetStore.import_files: a disk path to link from, or a stream out of the zip."""
+    return export.local_path(member) or (partial(export.open, member), posixpath.basename(member))
 
+
+def copy_images_to_assets(export, notion_images_dir, images_list, store):
+    """Import images from Notion export into Quartz assets. Return list of canonical asset filenames."""
+    sources = []
     for img_ref in images_list:
         # img_ref is like "Paris/filename.jpg"
-        img_filename = os.path.basename(img_ref)
-        src = os.path.join(NOTION_DIR, img_ref)
-        if not os.path.exists(src):
+        member = export.resolve_ref(img_ref)
+        if member is None and notion_images_dir:
             # Try directly in the images dir
-            src = os.path.join(notion_images_dir, img_filename)
-        if os.path.exists(src):
-            dest = os.path.join(QUARTZ_ASSETS, img_filename)
-            if not os.path.exists(dest):
-                shutil.copy2(src, dest)
-                copied.append(img_filename)
-            else:
-                copied.append(img_filename)
-    return copied
+            img_filename = posixpath.basename(urllib.parse.unquote(img_ref))
+            member = export.find(f"{notion_images_dir}/{img_filename}")
+        if member:
+            sources.append(asset_source(export, member))
+        else:
+            # Left out of the page; say so rather than losing the photo silently
+            print(f"    Image not in export: {img_ref}")
+            metrics.count("assets.missing_source")
+    return store.import_files(sources)
 
 
-def copy_all_images_from_dir(notion_images_dir):
-    """Copy ALL images from a Notion export directory to assets. Return list of filenames."""
-    copied = []
-    if not notion_images_dir or not os.path.isdir(notion_images_dir):
-        return copied
-    for f in os.listdir(notion_images_dir):
-        ext = os.path.splitext(f)[1].lower()
+def copy_all_images_from_dir(export, notion_images_dir, store):
+    """Import ALL images from a Notion export directory into assets. Return list of canonical filenames."""
+    if not notion_images_dir:
+        return []
+    sources = []
+    for member in export.listdir(notion_images_dir):
+        ext = os.path.splitext(member)[1].lower()
         if ext in IMAGE_EXTS:
-            src = os.path.join(notion_images_dir, f)
-            dest = os.path.join(QUARTZ_ASSETS, f)
-            if not os.path.exists(dest):
-                shutil.copy2(src, dest)
-            copied.append(f)
-    return copied
+            sources.append(asset_source(export, member))
+    return store.import_files(sources)
+
 
+def geocode_place(name, place_hint, cache, search):
+    """Get coordinates for a place. Returns (lat, lng) or None.
+
+    cache: the GeocodeCache; search: the run's StructuredGeocoder, asked on cache misses
+    the offline gazetteer cannot answer.
+    """
+    def fetch(query):
+        # Offline GeoNames index first; no network and no rate-limit sleep
+        gazetteer = clients.gazetteer()
+        if gazetteer is not None:
+            coords = gazetteer.lookup(query)
+            if coords:
+                return coords
+        return search(query)
+
+    def lookup(query):
+        return cache.resolve(query, fetch)
 
-def geocode_place(name, place_hint=None):
-    """Get coordinates for a place. Returns (lat, lng) or None."""
     try:
-        from geopy.geocoders import Nominatim
-        geolocator = Nominatim(user_agent="quartz-travel-sync")
+        # Overrides and earlier hits for the page name win without any network call
+        cached = cache.lookup(name)
+        if cached is not None and cached is not MISS:
+            return cached
         # Try place hint first if available
         if place_hint:
-            loc = geolocator.geocode(place_hint, timeout=10)
-            if loc:
-                return round(loc.latitude, 4), round(loc.longitude, 4)
-        loc = geolocator.geocode(name, timeout=10)
-        if loc:
-            return round(loc.latitude, 4), round(loc.longitude, 4)
+            coords = lookup(place_hint)
+            if coords:
+                return coords
+        return lookup(name)
     except Exception as e:
         print(f"  Geocoding error for {name}: {e}")
     return None
 
 
-def create_travel_page(name, date, place, tags, coordinates):
-    """Create a new travel page .md file with frontmatter."""
+def collect_page_content(name, store, export=None):
+    """Read an entry's Notion page and import its images. Return (text, canonical image filenames).
+
+    Only local work (export reads, hashing, copies), so it can run on a worker thread.
+    """
     # Find Notion export content
-    notion_md = find_notion_md(name)
-    notion_images_dir = find_notion_images_dir(name)
+    notion_md = find_notion_md(export, name)
+    notion_images_dir = find_notion_images_dir(export, name)
 
     text_content = ""
     image_refs = []
 
     if notion_md:
-        text_content, image_refs = extract_notion_content(notion_md)
+        text_content, image_refs = extract_notion_content(export, notion_md)
 
-    # Copy images
+    # Import images (deduplicated by content; names may be rewritten to the canonical asset)
     copied_images = []
     if image_refs:
-        copied_images = copy_images_to_assets(notion_images_dir, image_refs)
+        copied_images = copy_images_to_assets(export, notion_images_dir, image_refs, store)
     elif notion_images_dir:
-        copied_images = copy_all_images_from_dir(notion_images_dir)
+        copied_images = copy_all_images_from_dir(export, notion_images_dir, store)
+    # Identical photos under different names collapse to one asset; embed it once
+    return text_content, list(dict.fromkeys(copied_images))
 
+
+def render_travel_page(name, date, tags, coordinates, text_content, copied_images):
+    """Text of a new travel page: frontmatter, then the images and the Notion text."""
     # Build frontmatter
     fm_lines = ["---"]
     fm_lines.append(f"title: {name}")
@@ -217,94 +248,202 @@ def create_travel_page(name, date, place, tags, coordinates):
             body_lines.append("")
         body_lines.append(text_content)
 
-    content = "\n".join(fm_lines) + "\n".join(body_lines) + "\n"
-
-    # Write file
-    filepath = os.path.join(QUARTZ_TRAVEL, f"{name}.md")
-    with open(filepath, "w") as f:
-        f.write(content)
-
-    return filepath, len(copied_images)
+    return "\n".join(fm_lines) + "\n".join(body_lines) + "\n"
 
 
-def update_existing_date(page_info, new_date):
+def update_existing_date(page, new_date, writer, after=None):
     """Update an existing page's Date field."""
-    content = page_info["content"]
+    content = page.read()
     # Replace empty Date: line
     updated = re.sub(r'^Date:\s*$', f'Date: {new_date}', content, count=1, flags=re.MULTILINE)
     if updated != content:
-        with open(page_info["path"], "w") as f:
-            f.write(updated)
-        return True
+        return writer.write(page.path, updated, after=after)
     return False
 
 
-def main():
-    import time
+# --- Pipeline stages: parse -> normalize -> match -> plan -> apply ---
 
-    # Read CSV
-    entries = []
-    with open(NOTION_CSV, "r", encoding="utf-8-sig") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            name = row["Name"].strip()
-            if not name or name.startswith("http"):
-                continue
-            entries.append(row)
+def normalize_entries(rows):
+    """Yield (name, row) for CSV rows naming a place (not a bare link)."""
+    for row in rows:
+        name = row["Name"].strip()
+        if name and not name.startswith("http"):
+            yield name, row
 
-    print(f"CSV entries: {len(entries)}")
 
-    # Get existing pages
-    existing = get_existing_pages()
-    print(f"Existing pages: {len(existing)}")
+def plan_entries(entries, existing, manifest, stats):
+    """Yield ("date", name, row, page, date), ("create", name, row, date, place, tags) or ("keep", name, row)."""
+    created = set()
+    for name, entry in entries:
+        key = name.lower()
+        stats.add("entries")
+        if key in created:
+            # Repeated row for a page this run already creates
+            yield "keep", name, entry
+            continue
 
-    # Identify missing pages and date updates
-    missing = []
-    date_updates = []
+        # Row and page both unchanged since the last run: nothing to do
+        if manifest.row_unchanged(name, entry) and key in existing and existing[key].unchanged:
+            stats.add("skipped")
+            continue
 
-    for entry in entries:
-        name = entry["Name"].strip()
         date = parse_date(entry.get("Date", ""))
-        place = entry.get("Place", "").strip()
-        tags = entry.get("Tags", "").strip()
-
-        key = name.lower()
         if key in existing:
             # Check if date needs updating
-            if date and not get_existing_date(existing[key]["content"]):
-                date_updates.append((existing[key], date, name))
-        else:
-            missing.append((name, date, place, tags))
-
-    print(f"\nMissing pages: {len(missing)}")
-    print(f"Date updates needed: {len(date_updates)}")
-
-    # Update dates on existing pages
-    print("\n--- Updating dates ---")
-    for page_info, date, name in date_updates:
-        if update_existing_date(page_info, date):
-            print(f"  Updated date for: {name} -> {date}")
+            if date and not existing[key].get("Date"):
+                yield "date", name, entry, existing[key], date
+            else:
+                yield "keep", name, entry
         else:
-            print(f"  Could not update date for: {name}")
-
-    # Create missing pages
-    print("\n--- Creating missing pages ---")
-    for name, date, place, tags in missing:
-        print(f"\n  Creating: {name}")
-
-        # Geocode (with rate limiting)
-        coords = geocode_place(name, place)
+            created.add(key)
+            yield "create", name, entry, date, entry.get("Place", "").strip(), entry.get("Tags", "").strip()
+
+
+def apply_entries(actions, pages, manifest, writer, export, stats, workers=PAGE_WORKERS):
+    """Apply planned actions as they arrive.
+
+    A new page's Notion text and images are prepared on a worker pool,
+    which also finds its coordinates where no network is needed: a pinned
+    override first, else the GPS of the page's photos. Only the remaining
+    pages are queued on the single geocoding lane (Nominatim allows one
+    request at a time), so the lane never waits on page preparation.
+    Pages are written here, in CSV order, once their coordinates are known,
+    so index and manifest updates stay on this thread.
+    """
+    known = known_places(COORD_OVERRIDES, pages)
+    cache = clients.geocode_cache()
+    store = None
+    pending = deque()  # (name, entry, date, tags, content future)
+    lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geocode")
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="travel-page")
+
+    search = None
+
+    def locate(name, place):
+        # Only ever called on the lane, so the geocoder is built once, by the first lookup
+        # (runs that never geocode don't import geopy)
+        nonlocal search
+        if search is None:
+            search = StructuredGeocoder(clients.geolocator(), country_codes=config.GEOCODE_COUNTRIES,
+                                        known=known, delay=config.NOMINATIM_DELAY)
+        with metrics.phase("travel.geocode"):
+            return geocode_place(name, place, cache, search)
+
+    def prepare(name, place):
+        """Return (text, images, coordinates or a future of the geocoded ones, where they came from)."""
+        with metrics.phase("travel.page_content"):
+            text_content, images = collect_page_content(name, store, export)
+            # A hand-pinned place wins over its photos, which may include a stray fix
+            coords = cache.pinned(name)
+            if coords:
+                return text_content, images, coords, "pinned"
+            # Then the page's own photos: their GPS fixes need no network lookup
+            coords, _ = coordinates_from_photos(os.path.join(QUARTZ_ASSETS, img) for img in images)
         if coords:
-            print(f"    Coordinates: {coords}")
-        else:
-            print(f"    WARNING: Could not geocode {name}")
-        time.sleep(1.1)  # Nominatim rate limit
-
-        filepath, img_count = create_travel_page(name, date, place, tags, coords)
-        print(f"    File: {os.path.basename(filepath)}, Images: {img_count}")
-
-    print("\n--- Done ---")
+            return text_content, images, coords, "from_photos"
+        return text_content, images, lane.submit(locate, name, place), "geocoded"
+
+    def ready(content):
+        if not content.done():
+            return False
+        if content.exception() is not None:
+            return True
+        coords = content.result()[2]
+        return not isinstance(coords, Future) or coords.done()
+
+    def finish(limit):
+        """Write ready pages from the front of the queue; block while more than `limit` are pending."""
+        while pending:
+            name, entry, date, tags, content = pending[0]
+            if len(pending) <= limit and not ready(content):
+                return
+            text_content, images, coords, source = content.result()
+            if isinstance(coords, Future):
+                coords = coords.result()
+            else:
+                stats.add(source)
+            pending.popleft()
 
+            print(f"\n  Created: {name}")
+            if coords:
+                print(f"    Coordinates: {coords}")
+            else:
+                print(f"    WARNING: Could not geocode {name}")
+            filename = f"{name}.md"
+            writer.write(os.path.join(QUARTZ_TRAVEL, filename),
+                         render_travel_page(name, date, tags, coords, text_content, images),
+                         after=partial(pages.refresh, filename))
+            manifest.record_row(name, entry)
+            stats.add("created")
+            print(f"    File: {filename}, Images: {len(images)}")
 
-if __name__ == "__main__":
-    main()
+    try:
+        for kind, name, entry, *rest in actions:
+            if kind == "date":
+                page, date = rest
+                if update_existing_date(page, date, writer, after=partial(pages.refresh, page.filename)):
+                    stats.add("dates")
+                    print(f"  Updated date for: {name} -> {date}")
+                else:
+                    print(f"  Could not update date for: {name}")
+            elif kind == "create":
+                date, place, tags = rest
+                # The asset index is only scanned once a page actually needs images
+                if store is None:
+                    store = AssetStore(QUARTZ_ASSETS)
+                # Geocoding is cached and rate limited only on network lookups
+                pending.append((name, entry, date, tags, pool.submit(prepare, name, place)))
+                # Bound how far page preparation runs ahead of geocoding
+                finish(limit=MAX_PENDING - 1)
+                continue
+            manifest.record_row(name, entry)
+        with metrics.phase("travel.wait_pending"):
+            finish(limit=0)
+    finally:
+        # On errors, drop queued work instead of waiting for the geocoding lane to drain;
+        # the pool goes first, as pages still being prepared may queue a lookup on the lane
+        pool.shutdown(cancel_futures=True)
+        lane.shutdown(cancel_futures=True)
+        if store is not None:
+            store.save()
+
+
+def main(csv_path=None, dry_run=False, export_path=None):
+    # Get existing pages
+    manifest = SyncManifest.shared("travel-sync")
+    pages = get_existing_pages(manifest, keys=("title", "Date", "coordinates"))
+    existing = pages.by_title()
+    print(f"Existing pages: {len(existing)}")
+    stats = Counter("travel_sync")
+
+    # CSV parsing runs ahead in a background thread; entries are planned and applied one by one
+    csv_source, export = open_notion_export(csv_path, export_path)
+    entries = buffered(normalize_entries(read_csv_rows(csv_source)))
+    actions = plan_entries(entries, existing, manifest, stats)
+
+    if dry_run:
+        for kind, name, entry, *rest in actions:
+            if kind == "date":
+                print(f"  Would set date of {name} -> {rest[1]}")
+            elif kind == "create":
+                print(f"  Would create: {name}")
+        print(f"CSV entries: {stats['entries']}, unchanged entries skipped: {stats['skipped']}")
+        if export is not None:
+            export.close()
+        return
+
+    # Page writes are batched and skipped when the bytes are unchanged;
+    # the index is refreshed as each batch lands on disk
+    writer = PageWriter()
+    try:
+        with metrics.phase("travel.sync"):
+            apply_entries(actions, pages, manifest, writer, export, stats)
+    finally:
+        if export is not None:
+            export.close()
+        writer.flush()
+        manifest.save()
+
+    print(f"\nCSV entries: {stats['entries']}, unchanged entries skipped: {stats['skipped']}")
+    print(f"Pages created: {stats['created']}, dates updated: {stats['dates']}")
+    print(f"\n--- Done --- ({writer.written} files written, {writer.unchanged} already up to date)")
@@ -0,0 +1,5 @@
+"""
+Tests for the sync scripts; they only touch temporary folders.
+
+    python -m pytest scripts/tests
+"""
@@ -0,0 +1,152 @@
+"""Tests for the asset reference graph: rewriting embeds of duplicates, deduping and pruning."""
+
+import functools
+import os
+
+import pytest
+
+from scripts import asset_graph, config
+from scripts.assetstore import AssetStore
+
+PHOTO = b"\xff\xd8 old town \xff\xd9"
+
+
+@pytest.fixture
+def vault(tmp_path, monkeypatch):
+    """An empty vault in tmp_path/content with its assets folder; the digest cache stays in tmp_path."""
+    content = tmp_path / "content"
+    (content / "assets").mkdir(parents=True)
+    monkeypatch.setattr(asset_graph, "CONTENT_DIR", str(content))
+    monkeypatch.setattr(asset_graph, "ASSETS_DIR", str(content / "assets"))
+    monkeypatch.setattr(config, "DERIVED_DIR", str(content / "assets" / "derived"))
+    monkeypatch.setattr(asset_graph, "AssetStore",
+                        functools.partial(AssetStore, index_path=str(tmp_path / "asset_index.json")))
+    return content
+
+
+def write(vault, rel, data):
+    path = vault / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(data, str):
+        path.write_text(data, encoding="utf-8")
+    else:
+        path.write_bytes(data)
+
+
+def assets(vault):
+    return sorted(os.listdir(vault / "assets"))
+
+
+PAGE = """---
+title: Lisbon
+image: "assets/Old Town copy.jpg"
+---
+![[Old Town copy.jpg|300]]
+![view](<assets/Old Town copy.jpg> "Alfama")
+![view](assets/Old%20Town%20copy.jpg#crop)
+![view](assets/OldTownCopy.jpg)
+<img src="assets/OldTownCopy.jpg" width="300">
+
+```
+![[Old Town copy.jpg]]
+```
+"""
+
+REWRITTEN = """---
+title: Lisbon
+image: "assets/Old Town.jpg"
+---
+![[Old Town.jpg|300]]
+![view](<assets/Old Town.jpg> "Alfama")
+![view](assets/Old%20Town.jpg#crop)
+![view](assets/Old%20Town.jpg)
+<img src="assets/Old Town.jpg" width="300">
+
+```
+![[Old Town copy.jpg]]
+```
+"""
+
+
+def test_dedupe_rewrites_references_with_spaces_and_percent_encoding(vault):
+    for name in ("Old Town.jpg", "Old Town copy.jpg", "OldTownCopy.jpg"):
+        write(vault, f"assets/{name}", PHOTO)
+    write(vault, "assets/Other.jpg", b"other bytes")
+    write(vault, "Travel/Lisbon.md", PAGE)
+
+    asset_graph.main(dedupe_assets=True)
+
+    assert (vault / "Travel/Lisbon.md").read_text(encoding="utf-8") == REWRITTEN
+    # The shortest name is the one copy kept; distinct files are left alone
+    assert assets(vault) == ["Old Town.jpg", "Other.jpg"]
+    assert asset_graph.build_graph().dangling == []
+
+
+def test_dry_run_dedupe_changes_nothing(vault):
+    for name in ("Old Town.jpg", "Old Town copy.jpg"):
+        write(vault, f"assets/{name}", PHOTO)
+    write(vault, "Travel/Lisbon.md", "![[Old Town copy.jpg]]\n")
+
+    asset_graph.main(prune=True, dedupe_assets=True, dry_run=True)
+
+    assert assets(vault) == ["Old Town copy.jpg", "Old Town.jpg"]
+    assert (vault / "Travel/Lisbon.md").read_text(encoding="utf-8") == "![[Old Town copy.jpg]]\n"
+
+
+def test_duplicate_behind_an_ambiguous_reference_is_kept(vault):
+    for name in ("a.jpg", "b.jpg"):
+        write(vault, f"assets/{name}", PHOTO)
+    # "b.jpg" alone could also mean the one in Travel/, so the reference is not rewritten
+    write(vault, "Travel/b.jpg", b"a different photo")
+    write(vault, "Travel/Lisbon.md", "![[b.jpg]]\n")
+
+    asset_graph.main(dedupe_assets=True)
+
+    assert assets(vault) == ["a.jpg", "b.jpg"]
+    assert (vault / "Travel/Lisbon.md").read_text(encoding="utf-8") == "![[b.jpg]]\n"
+
+
+def test_collapse_keeps_exactly_one_copy(vault):
+    names = ["IMG_1.jpg", "IMG_1 (1).jpg", "IMG_1-0a1b2c3d.jpg", "IMG_1 copy.jpg"]
+    for name in names:
+        write(vault, f"assets/{name}", PHOTO)
+    write(vault, "Travel/Lisbon.md", "".join(f"![[{name}]]\n" for name in names))
+
+    asset_graph.main(dedupe_assets=True)
+
+    assert assets(vault) == ["IMG_1.jpg"]
+    assert (vault / "Travel/Lisbon.md").read_text(encoding="utf-8") == "![[IMG_1.jpg]]\n" * 4
+
+
+def test_prune_keeps_every_referenced_file(vault):
+    referenced = {
+        "cover.jpg": "---\ncover: '../assets/cover.jpg'\n---\n",
+        "Old Town.jpg": "![](assets/Old%20Town.jpg)\n",
+        "clip.mp4": '<video src="assets/clip.mp4"></video>\n',
+        "Guide.pdf": "[[Guide.pdf]]\n",
+        "Upper.JPG": "![[upper.jpg]]\n",
+        "map.png": "![map](<assets/map.png>)\n",
+    }
+    for name in [*referenced, "orphan.jpg", "also orphan.png"]:
+        write(vault, f"assets/{name}", name.encode())
+    for i, page in enumerate(referenced.values()):
+        write(vault, f"Travel/Page {i}.md", page)
+    # A reference inside a code block does not count
+    write(vault, "Travel/Notes.md", "```\n![[orphan.jpg]]\n```\n")
+
+    asset_graph.main(prune=True)
+
+    assert assets(vault) == sorted(referenced)
+
+
+def test_prune_after_dedupe_keeps_the_surviving_copy(vault):
+    for name in ("a.jpg", "a copy.jpg"):
+        write(vault, f"assets/{name}", PHOTO)
+    write(vault, "assets/orphan.jpg", b"unused")
+    # Only the copy is referenced: after the rewrite the kept file is, and nothing else
+    write(vault, "Travel/Lisbon.md", "![[a copy.jpg]]\n")
+
+    asset_graph.main(prune=True, dedupe_assets=True)
+
+    assert assets(vault) == ["a.jpg"]
+    assert (vault / "Travel/Lisbon.md").read_text(encoding="utf-8") == "![[a.jpg]]\n"
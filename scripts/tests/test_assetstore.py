@@ -0,0 +1,57 @@
+"""Tests for content-addressed imports into the assets folder."""
+
+import io
+import os
+
+import pytest
+
+from scripts.assetstore import AssetStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / "assets").mkdir()
+    return AssetStore(str(tmp_path / "assets"), index_path=str(tmp_path / "asset_index.json"))
+
+
+def source(tmp_path, rel, data):
+    path = tmp_path / "export" / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_same_bytes_are_imported_once(tmp_path, store):
+    first = source(tmp_path, "Lisbon/IMG_1.jpg", b"photo")
+    again = source(tmp_path, "Porto/Old Town.jpg", b"photo")
+    assert store.import_file(first) == "IMG_1.jpg"
+    assert store.import_file(again) == "IMG_1.jpg"
+    assert store.import_stream(lambda: io.BytesIO(b"photo"), "other.jpg") == "IMG_1.jpg"
+    assert os.listdir(store.assets_dir) == ["IMG_1.jpg"]
+
+
+def test_taken_name_gets_a_hash_suffix(tmp_path, store):
+    store.import_file(source(tmp_path, "Lisbon/IMG_1.jpg", b"photo"))
+    name = store.import_file(source(tmp_path, "Porto/IMG_1.jpg", b"another photo"))
+    assert name.startswith("IMG_1-") and name.endswith(".jpg")
+    assert sorted(os.listdir(store.assets_dir)) == sorted(["IMG_1.jpg", name])
+
+
+def test_parallel_imports_of_one_blob_keep_one_copy(tmp_path, store):
+    sources = [source(tmp_path, f"{i}/IMG {i}.jpg", b"photo") for i in range(16)]
+    sources += [(lambda: io.BytesIO(b"photo"), f"zip {i}.jpg") for i in range(16)]
+    names = store.import_files(sources)
+    assert len(set(names)) == 1
+    assert os.listdir(store.assets_dir) == names[:1]
+
+
+def test_digests_are_reused_from_the_saved_index(tmp_path, store, monkeypatch):
+    store.import_file(source(tmp_path, "IMG_1.jpg", b"photo"))
+    store.save()
+
+    def no_hashing(path):
+        raise AssertionError(f"hashed {path} again")
+
+    monkeypatch.setattr("scripts.assetstore.file_digest", no_hashing)
+    again = AssetStore(store.assets_dir, index_path=store.index_path)
+    assert again.by_name == store.by_name
@@ -0,0 +1,146 @@
+"""Tests for the frontmatter codec: byte-exact round trips and agreement with PyYAML."""
+
+import datetime
+import glob
+import os
+import sys
+
+import pytest
+import yaml
+
+from scripts import config, frontmatter
+
+PAGES = sorted(glob.glob(os.path.join(config.CONTENT_DIR, "**", "*.md"), recursive=True))
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def load(text):
+    """Frontmatter text as the codec reads it, key by key."""
+    fm = frontmatter.Frontmatter(text)
+    return {key: fm[key] for key in fm}
+
+
+def assert_same(ours, theirs):
+    assert ours == theirs
+    # 1 == True and 1 == 1.0, so compare the types as well
+    assert {k: type(v) for k, v in ours.items()} == {k: type(v) for k, v in theirs.items()}
+
+
+@pytest.fixture
+def loader():
+    """Forget the cached YAML loader before and after a test that swaps it."""
+    frontmatter._loader = None
+    yield
+    frontmatter._loader = None
+
+
+@pytest.mark.skipif(not PAGES, reason="no content pages")
+@pytest.mark.parametrize("path", PAGES, ids=lambda p: os.path.relpath(p, config.CONTENT_DIR))
+def test_pages_round_trip_and_agree_with_yaml(path):
+    content = read(path)
+    fm, body = frontmatter.parse(content)
+    assert frontmatter.compose(fm, body) == content
+
+    text, _ = frontmatter.split(content)
+    if text is not None:
+        assert_same(load(text), yaml.safe_load(text) or {})
+
+
+@pytest.mark.parametrize("text", [
+    "Date: 2023-04-05\n",
+    "Date: Invalid date\n",
+    "Date:\n",
+    "title: 'It''s a Wonderful Life'\n",
+    'title: "Paris: the city"\n',
+    "title: \"Escaped \\\"quote\\\"\"\n",
+    "title: 1984\n",
+    "title: 12 Angry Men\n",
+    "title: Up\ndraft: true\npublished: no\nrating: 4.5\n",
+    "coordinates: [48.8566, 2.3522]\n",
+    "tags: []\n",
+    "tags: [travel, france]\n",
+    "tags:\n  - travel\n  - france\n",
+    "tags:\n- travel\n# a comment\n- 2023-01-01\n",
+    "tags: [a, [b]]\n",
+    "Genre: Sci-Fi #comment\n",
+    "cover: ~\nurl: https://example.com/a?b=c\n",
+    "seo:\n  title: Nested\n  score: 3\n",
+    "summary: |\n  line one\n  line two\n",
+    "summary: >\n  folded\n  text\n",
+])
+def test_values_agree_with_yaml(text):
+    assert_same(load(text), yaml.safe_load(text))
+
+
+def test_assigned_keys_are_read_back_as_assigned():
+    fm = frontmatter.Frontmatter("title: Old\nkeep:  'as is'  \n")
+    fm["title"] = "Paris: the city"
+    fm["Date"] = datetime.date(2023, 4, 5)
+    fm["coordinates"] = [48.8566, 2.3522]
+    fm["tags"] = ["yes", "2023-01-01", "plain"]
+    fm["flag"] = True
+    fm["empty"] = None
+    text = fm.dump()
+
+    assert "keep:  'as is'  \n" in text
+    assert yaml.safe_load(text) == {
+        "title": "Paris: the city",
+        "keep": "as is",
+        "Date": datetime.date(2023, 4, 5),
+        "coordinates": [48.8566, 2.3522],
+        "tags": ["yes", "2023-01-01", "plain"],
+        "flag": True,
+        "empty": None,
+    }
+
+
+def test_assigning_the_same_value_keeps_the_original_text():
+    fm = frontmatter.Frontmatter("Date: 2023-04-05   # visited\n")
+    fm["Date"] = datetime.date(2023, 4, 5)
+    assert fm.dump() == "Date: 2023-04-05   # visited\n"
+
+
+def test_duplicate_keys_keep_the_last_like_yaml():
+    text = "title: First\nDate: 2023-04-05\ntitle: Second\n"
+    assert_same(load(text), yaml.safe_load(text))
+
+
+def test_page_without_frontmatter_gets_one():
+    fm, body = frontmatter.parse("Just text\n")
+    fm["title"] = "Page"
+    assert frontmatter.compose(fm, body) == "---\ntitle: Page\n---\nJust text\n"
+
+
+def test_closing_delimiter_with_trailing_whitespace():
+    content = "---\ntitle: A\n---  \nBody\n"
+    assert frontmatter.split(content) == ("title: A\n", "  \nBody\n")
+    assert frontmatter.compose(*frontmatter.parse(content)) == content
+
+
+@pytest.mark.skipif(not hasattr(yaml, "CSafeLoader"), reason="PyYAML built without libyaml")
+def test_libyaml_loader_is_used_when_available(loader):
+    assert frontmatter.yaml_load("a: 1") == {"a": 1}
+    assert frontmatter._loader is yaml.CSafeLoader
+
+
+def test_pure_python_loader_without_libyaml(loader, monkeypatch):
+    monkeypatch.delattr(yaml, "CSafeLoader", raising=False)
+    text = "seo:\n  title: Nested\n"
+    assert load(text) == {"seo": {"title": "Nested"}}
+    assert frontmatter._loader is yaml.SafeLoader
+
+
+def test_without_pyyaml_unsupported_values_keep_their_text(loader, monkeypatch):
+    monkeypatch.setitem(sys.modules, "yaml", None)
+    fm = frontmatter.Frontmatter("title: Up\nsummary: |\n  text\n")
+    assert fm["title"] == "Up"
+    assert fm["summary"] == "|\n  text"
+
+
+def test_invalid_yaml_keeps_its_text():
+    fm = frontmatter.Frontmatter("title: [unclosed\n")
+    assert fm["title"] == "[unclosed"
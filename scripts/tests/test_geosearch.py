@@ -0,0 +1,122 @@
+"""Tests for the single-request Nominatim search: what is sent and how candidates are ranked."""
+
+from types import SimpleNamespace
+
+from scripts import config
+from scripts.geocache import COORD_OVERRIDES
+from scripts.geosearch import KnownPlaces, StructuredGeocoder, group_regions, known_places
+
+
+class RecordingGeolocator:
+    """Stands in for geopy's Nominatim: records each geocode call and returns fixed candidates."""
+
+    def __init__(self, candidates=()):
+        self.calls = []
+        self.candidates = list(candidates)
+
+    def geocode(self, query, **kwargs):
+        self.calls.append((query, kwargs))
+        return self.candidates
+
+
+def candidate(lat, lng, importance=0.5):
+    return SimpleNamespace(latitude=lat, longitude=lng, raw={"importance": importance})
+
+
+def search(known, candidates=(), **kwargs):
+    geolocator = RecordingGeolocator(candidates)
+    return StructuredGeocoder(geolocator, known=known, delay=0, **kwargs), geolocator
+
+
+def test_regions_of_the_overrides():
+    regions = group_regions(list(COORD_OVERRIDES.items()))
+    names = [{name for name, _ in region} for region in regions]
+    # Newfoundland and India never share a region, however the chain runs
+    for region in names:
+        assert not ({"Bell Island", "Petty Harbour"} & region and {"Chintpuni", "Poanta Sahib"} & region)
+    assert any({"Bell Island", "Petty Harbour", "Swift Current"} <= region for region in names)
+
+
+def test_one_request_with_country_codes_and_the_matching_viewbox():
+    known = known_places(COORD_OVERRIDES)
+    geocoder, geolocator = search(known, [candidate(47.6, -52.7)])
+
+    assert geocoder("Cobbler Path, East Coast Trail") == (47.6, -52.7)
+
+    assert len(geolocator.calls) == 1
+    query, kwargs = geolocator.calls[0]
+    assert query == "Cobbler Path, East Coast Trail"
+    assert kwargs["country_codes"] == list(config.GEOCODE_COUNTRIES)
+    assert kwargs["exactly_one"] is False
+    assert kwargs["bounded"] is False
+    (south, west), (north, east) = kwargs["viewbox"]
+    # The Newfoundland box, not one spanning India as well
+    assert 45 < south < north < 50 and -57 < west < east < -51
+
+
+def test_no_country_codes_search_worldwide():
+    geocoder, geolocator = search(known_places(COORD_OVERRIDES), [candidate(35.68, 139.69)], country_codes=())
+    assert geocoder("Tokyo") == (35.68, 139.69)
+    _, kwargs = geolocator.calls[0]
+    assert kwargs["country_codes"] is None
+
+
+def test_query_naming_a_region_gets_its_viewbox():
+    known = KnownPlaces([
+        ("Shimla", (31.10, 77.17)), ("Manali", (32.24, 77.19)), ("Dharamshala, Himachal", (32.22, 76.32)),
+        ("Petty Harbour", (47.467, -52.717)), ("Spout Path, East Coast Trail", (47.50, -52.73)),
+    ])
+    geocoder, geolocator = search(known)
+    geocoder("Palampur, Himachal Pradesh")
+    geocoder("Motion Path, East Coast Trail")
+    (india_sw, _), (nl_sw, _) = (kwargs["viewbox"] for _, kwargs in geolocator.calls)
+    assert india_sw[0] == 30.10 and nl_sw[0] == 46.467
+
+
+def test_unmatched_query_is_biased_towards_the_largest_region():
+    known = KnownPlaces([("Shimla", (31.10, 77.17)), ("Manali", (32.24, 77.19)), ("Paris", (48.85, 2.35))])
+    geocoder, geolocator = search(known)
+    geocoder("Kasol")
+    assert geolocator.calls[0][1]["viewbox"] == ((30.10, 76.17), (33.24, 78.19))
+
+
+def test_no_viewbox_without_known_places_or_for_a_sprawling_region():
+    geocoder, geolocator = search(None)
+    geocoder("Anywhere")
+    assert geolocator.calls[0][1]["viewbox"] is None
+
+    # Chained within 500 km from one end of a 60-degree arc to the other
+    arc = KnownPlaces([(f"stop{i}", (0.0, i * 4.0)) for i in range(16)])
+    assert len(arc.regions) == 1
+    assert arc.viewbox("stop3") is None
+
+
+def test_candidate_near_a_known_place_beats_importance():
+    known = KnownPlaces([("Bell Island", (47.633, -52.942))])
+    geocoder, _ = search(known, [candidate(51.5, -0.12, importance=0.9), candidate(47.6, -52.9, importance=0.2)])
+    assert geocoder("Bell Island") == (47.6, -52.9)
+
+
+def test_importance_decides_among_far_candidates():
+    geocoder, _ = search(KnownPlaces(), [candidate(10, 10, 0.3), candidate(20, 20, 0.8), candidate(30, 30, 0.5)])
+    assert geocoder("Somewhere") == (20, 20)
+
+
+def test_no_candidates():
+    geocoder, geolocator = search(KnownPlaces())
+    assert geocoder("Nowhere") is None
+    assert len(geolocator.calls) == 1
+
+
+def test_known_places_are_built_lazily():
+    built = []
+
+    def build():
+        built.append(True)
+        return KnownPlaces([("Shimla", (31.10, 77.17))])
+
+    geocoder, _ = search(build)
+    assert not built
+    geocoder("Kufri")
+    geocoder("Narkanda")
+    assert built == [True]
@@ -0,0 +1,65 @@
+"""Tests for the travel map's cluster files and the popup data that ships with them."""
+
+import json
+
+from scripts.build_map_clusters import MAX_ZOOM, build_clusters
+
+DERIVED = {
+    "assets/Old Town.jpg": {
+        "color": "#806040",
+        "placeholder": "data:image/webp;base64,AAAA",
+        "jpeg": [],
+        "webp": [["assets/derived/ab-160.webp", 160], ["assets/derived/ab-480.webp", 480]],
+    },
+}
+
+
+def record(title, coordinates, image=None, date=None):
+    return {"collection": "travel", "file": f"Travel and Photography/{title}.md", "hash": "",
+            "title": title, "date": date, "coordinates": coordinates, "image": image}
+
+
+PAGES = {
+    "Travel-and-Photography/Lisbon": record("Lisbon", [38.72, -9.14], "assets/Old%20Town.jpg", "2019-06-12"),
+    "Travel-and-Photography/Porto": record("Porto", [41.15, -8.61], "https://example.com/porto.jpg"),
+    "Books/Dune": record("Dune", None),
+}
+
+
+def places_of(pages, derivatives=DERIVED):
+    _, places, _ = build_clusters(pages, derivatives)
+    return {place["slug"]: place for place in json.loads(places)["places"]}
+
+
+def test_every_located_page_has_its_popup():
+    encoded, _, index = build_clusters(PAGES, DERIVED)
+    places = places_of(PAGES)
+    assert sorted(places) == ["Travel-and-Photography/Lisbon", "Travel-and-Photography/Porto"]
+    assert json.loads(index)["places"] == len(places)
+    assert sorted(encoded) == list(range(MAX_ZOOM + 1))
+
+
+def test_popup_uses_the_smallest_copy_wide_enough():
+    lisbon = places_of(PAGES)["Travel-and-Photography/Lisbon"]
+    assert lisbon == {
+        "slug": "Travel-and-Photography/Lisbon",
+        "title": "Lisbon",
+        "lat": 38.72,
+        "lng": -9.14,
+        "date": "2019-06-12",
+        "image": "assets/derived/ab-480.webp",
+        "placeholder": 'background:#806040 url("data:image/webp;base64,AAAA") center / cover no-repeat',
+    }
+
+
+def test_popup_keeps_images_without_derivatives():
+    porto = places_of(PAGES)["Travel-and-Photography/Porto"]
+    assert porto["image"] == "https://example.com/porto.jpg"
+    assert porto["placeholder"] is None
+    assert places_of(PAGES, {})["Travel-and-Photography/Lisbon"]["image"] == "assets/Old%20Town.jpg"
+
+
+def test_version_changes_with_the_popups():
+    _, _, before = build_clusters(PAGES, DERIVED)
+    _, _, after = build_clusters(PAGES, {})
+    assert json.loads(before)["hash"] != json.loads(after)["hash"]
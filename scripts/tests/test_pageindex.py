@@ -0,0 +1,56 @@
+"""Tests for the frontmatter-only page index and the fields it keeps in a SyncManifest."""
+
+from scripts.manifest import SyncManifest
+from scripts.pageindex import PageIndex
+
+PARIS = "---\ntitle: Paris\nDate: 2019-06-12\ncoordinates: [48.8566, 2.3522]\n---\nBody\n"
+
+
+def index_run(tmp_path, keys):
+    """Index the pages with a manifest loaded from disk, as one sync run does; save it afterwards."""
+    manifest = SyncManifest("travel-sync", manifest_dir=str(tmp_path / "manifests"))
+    pages = PageIndex(str(tmp_path / "pages"), keys=keys, manifest=manifest)
+    records = {record.filename: (dict(record.fields), record.unchanged) for record in pages}
+    manifest.save()
+    return records
+
+
+def write_pages(tmp_path):
+    pages = tmp_path / "pages"
+    pages.mkdir()
+    (pages / "Paris.md").write_text(PARIS, encoding="utf-8")
+
+
+def test_unchanged_pages_come_from_the_manifest(tmp_path):
+    write_pages(tmp_path)
+    first = index_run(tmp_path, ("title", "Date"))
+    assert first == {"Paris.md": ({"title": "Paris", "Date": "2019-06-12"}, False)}
+    assert index_run(tmp_path, ("title", "Date")) == {"Paris.md": ({"title": "Paris", "Date": "2019-06-12"}, True)}
+
+
+def test_fields_recorded_for_fewer_keys_are_read_again(tmp_path):
+    write_pages(tmp_path)
+    index_run(tmp_path, ("title", "Date"))
+
+    # A later version of the sync also asks for coordinates
+    fields, unchanged = index_run(tmp_path, ("title", "Date", "coordinates"))["Paris.md"]
+    assert fields["coordinates"] == "[48.8566, 2.3522]"
+    # The page itself did not change
+    assert unchanged
+
+    # Recorded for every key now, so neither set of keys reads the page again
+    assert index_run(tmp_path, ("title", "Date", "coordinates"))["Paris.md"] == (fields, True)
+    assert index_run(tmp_path, ("title",))["Paris.md"] == ({"title": "Paris"}, True)
+    assert index_run(tmp_path, ("title", "Date", "coordinates"))["Paris.md"] == (fields, True)
+
+
+def test_manifest_from_before_keys_were_recorded(tmp_path):
+    write_pages(tmp_path)
+    index_run(tmp_path, ("title",))
+    manifest = SyncManifest("travel-sync", manifest_dir=str(tmp_path / "manifests"))
+    for entry in manifest.pages.values():
+        del entry["facts"]["keys"]
+    manifest.seen_pages.update(manifest.pages)
+    manifest.save()
+
+    assert index_run(tmp_path, ("title",))["Paris.md"] == ({"title": "Paris"}, True)
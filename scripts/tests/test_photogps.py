@@ -0,0 +1,195 @@
+"""Tests for reading GPS fixes out of JPEG headers and averaging them into page coordinates."""
+
+import io
+import random
+import struct
+
+import pytest
+
+from scripts.photogps import (GPS_IFD_TAG, _exif_block, _ifd, coordinates_from_photos, gps_from_tiff,
+                              read_gps, robust_centroid)
+
+# 48°51'24" N, 2°21'8" E (Paris)
+PARIS = ((48, 51, 24), (2, 21, 8))
+
+
+def dms(value):
+    return value[0] + value[1] / 60 + value[2] / 3600
+
+
+def make_tiff(lat=PARIS[0], lat_ref=b"N", lng=PARIS[1], lng_ref=b"E", endian="<", gps=True):
+    """EXIF TIFF data with IFD0 pointing at a GPS IFD holding tags 1-4."""
+    order = b"II" if endian == "<" else b"MM"
+    header = order + struct.pack(endian + "HI", 42, 8)
+    if not gps:
+        return header + struct.pack(endian + "H", 0) + struct.pack(endian + "I", 0)
+    gps_offset = 8 + 2 + 12 + 4
+    data_offset = gps_offset + 2 + 4 * 12 + 4
+    ifd0 = (struct.pack(endian + "H", 1)
+            + struct.pack(endian + "HHII", GPS_IFD_TAG, 4, 1, gps_offset)
+            + struct.pack(endian + "I", 0))
+
+    def rationals(value):
+        return struct.pack(endian + "6I", *(part for v in value for part in (v, 1)))
+
+    ifd = (struct.pack(endian + "H", 4)
+           # ASCII refs fit in the entry itself, left-aligned whatever the byte order
+           + struct.pack(endian + "HHI", 1, 2, 2) + lat_ref + b"\0\0\0"
+           + struct.pack(endian + "HHII", 2, 5, 3, data_offset)
+           + struct.pack(endian + "HHI", 3, 2, 2) + lng_ref + b"\0\0\0"
+           + struct.pack(endian + "HHII", 4, 5, 3, data_offset + 24)
+           + struct.pack(endian + "I", 0))
+    return header + ifd0 + ifd + rationals(lat) + rationals(lng)
+
+
+def segment(marker, payload):
+    return b"\xff" + bytes([marker]) + struct.pack(">H", len(payload) + 2) + payload
+
+
+def make_jpeg(tiff, before=(), after=b"\xff\xda" + b"\0" * 16):
+    """A JPEG header: SOI, the given segments, the Exif APP1 segment, then the start of scan."""
+    return b"\xff\xd8" + b"".join(before) + segment(0xE1, b"Exif\0\0" + tiff) + after
+
+
+@pytest.mark.parametrize("endian", ["<", ">"])
+def test_fix_in_both_byte_orders(endian):
+    lat, lng = gps_from_tiff(make_tiff(endian=endian))
+    assert lat == pytest.approx(dms(PARIS[0]))
+    assert lng == pytest.approx(dms(PARIS[1]))
+
+
+@pytest.mark.parametrize("endian", ["<", ">"])
+def test_south_and_west_are_negative(endian):
+    # 22°54'30" S, 43°10'20" W (Rio de Janeiro)
+    lat, lng = gps_from_tiff(make_tiff((22, 54, 30), b"S", (43, 10, 20), b"W", endian=endian))
+    assert lat == pytest.approx(-dms((22, 54, 30)))
+    assert lng == pytest.approx(-dms((43, 10, 20)))
+
+
+def test_ifd_entries_in_both_byte_orders():
+    for endian in "<>":
+        tiff = make_tiff(endian=endian)
+        (ifd0,) = struct.unpack_from(endian + "I", tiff, 4)
+        typ, count, raw = _ifd(tiff, ifd0, endian)[GPS_IFD_TAG]
+        assert (typ, count) == (4, 1)
+        (gps_offset,) = struct.unpack(endian + "I", raw)
+        assert sorted(_ifd(tiff, gps_offset, endian)) == [1, 2, 3, 4]
+
+
+def test_zero_fix_is_no_fix():
+    assert gps_from_tiff(make_tiff((0, 0, 0), b"N", (0, 0, 0), b"E")) is None
+
+
+def test_out_of_range_is_no_fix():
+    assert gps_from_tiff(make_tiff((91, 0, 0), b"N", (2, 0, 0), b"E")) is None
+
+
+def test_no_gps_ifd():
+    assert gps_from_tiff(make_tiff(gps=False)) is None
+
+
+def test_zero_denominator_reads_as_zero():
+    tiff = bytearray(make_tiff())
+    # Denominator of the latitude's seconds
+    struct.pack_into("<I", tiff, len(tiff) - 24 - 4, 0)
+    lat, _ = gps_from_tiff(bytes(tiff))
+    assert lat == pytest.approx(48 + 51 / 60)
+
+
+@pytest.mark.parametrize("endian", ["<", ">"])
+def test_truncated_tiff_is_no_fix(endian):
+    tiff = make_tiff(endian=endian)
+    for size in range(len(tiff)):
+        assert gps_from_tiff(tiff[:size]) is None
+
+
+def test_garbage_never_raises():
+    rng = random.Random(0)
+    valid = make_tiff()
+    for _ in range(2000):
+        data = bytearray(valid)
+        for _ in range(rng.randint(1, 8)):
+            data[rng.randrange(2, len(data))] = rng.randrange(256)
+        fix = gps_from_tiff(bytes(data))
+        assert fix is None or (-90 <= fix[0] <= 90 and -180 <= fix[1] <= 180)
+    for _ in range(500):
+        fix = gps_from_tiff(b"II" + rng.randbytes(rng.randrange(64)))
+        assert fix is None or len(fix) == 2
+    assert gps_from_tiff(b"") is None
+    assert gps_from_tiff(b"XX" + valid[2:]) is None
+
+
+def test_exif_block_after_other_segments():
+    tiff = make_tiff()
+    jfif = segment(0xE0, b"JFIF\0\1\1\0\0\1\0\1\0\0")
+    xmp = segment(0xE1, b"http://ns.adobe.com/xap/1.0/\0<x/>")
+    # Fill bytes may pad a marker
+    jpeg = make_jpeg(tiff, before=[jfif, b"\xff" + xmp])
+    assert _exif_block(io.BytesIO(jpeg)) == tiff
+
+
+def test_exif_block_stops_at_the_image_data():
+    tiff = make_tiff()
+    jpeg = b"\xff\xd8" + segment(0xE0, b"JFIF\0") + b"\xff\xda" + segment(0xE1, b"Exif\0\0" + tiff)
+    assert _exif_block(io.BytesIO(jpeg)) is None
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"\x89PNG\r\n\x1a\n",
+    b"\xff\xd8",
+    b"\xff\xd8\xff",
+    b"\xff\xd8\xff\xe0\x00",
+    b"\xff\xd8\x00\x00",
+    b"\xff\xd8\xff\xe0\x00\x01",
+    b"\xff\xd8\xff\xe0\x00\x00\xff\xd9",
+])
+def test_exif_block_of_truncated_or_foreign_files(data):
+    assert _exif_block(io.BytesIO(data)) is None
+
+
+def test_read_gps(tmp_path):
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(make_jpeg(make_tiff(endian=">")))
+    lat, lng = read_gps(photo)
+    assert (lat, lng) == pytest.approx((dms(PARIS[0]), dms(PARIS[1])))
+
+    # Cut anywhere inside the Exif segment
+    jpeg = make_jpeg(make_tiff(), after=b"")
+    for size in range(len(jpeg)):
+        photo.write_bytes(jpeg[:size])
+        assert read_gps(photo) is None
+    assert read_gps(tmp_path / "missing.jpg") is None
+
+
+def test_coordinates_from_photos(tmp_path):
+    paths = []
+    for i, (lat, ref) in enumerate([((48, 51, 0), b"N"), ((48, 52, 0), b"N"), ((0, 0, 0), b"N")]):
+        path = tmp_path / f"{i}.jpg"
+        path.write_bytes(make_jpeg(make_tiff(lat, ref, (2, 21, 0) if i < 2 else (0, 0, 0), b"E")))
+        paths.append(str(path))
+    (tmp_path / "movie.mp4").write_bytes(b"")
+    coords, fixes = coordinates_from_photos(paths + [str(tmp_path / "movie.mp4")], workers=2)
+    assert fixes == 2
+    assert coords == pytest.approx((48.8583, 2.35), abs=1e-4)
+
+    assert coordinates_from_photos([str(tmp_path / "movie.mp4")]) == (None, 0)
+
+
+def test_centroid_ignores_a_stray_fix():
+    valley = [(32.24, 77.19), (32.25, 77.20), (32.26, 77.18), (32.25, 77.19)]
+    # Photo taken at the airport on the way home
+    airport = (28.56, 77.10)
+    assert robust_centroid(valley + [airport]) == robust_centroid(valley)
+    assert robust_centroid(valley) == (32.25, 77.19)
+
+
+def test_centroid_keeps_a_long_trail():
+    # ~300 km of evenly spaced fixes: the median distance widens the limit, so nothing is dropped
+    trail = [(45.0 + i * 0.3, 6.0) for i in range(10)]
+    assert robust_centroid(trail) == (round(45.0 + 4.5 * 0.3, 4), 6.0)
+
+
+def test_centroid_of_few_fixes():
+    assert robust_centroid([]) is None
+    assert robust_centroid([(1.5, 2.5)]) == (1.5, 2.5)
@@ -0,0 +1,178 @@
+"""Tests for the n-gram title index and how sync_library matches Notion rows to pages."""
+
+import random
+
+import pytest
+
+from scripts.manifest import SyncManifest
+from scripts.pageindex import PageIndex
+from scripts.pipeline import Counter
+from scripts.sync_library import BOOKS, match_rows, normalize
+from scripts.titlematch import TitleIndex, main_title, ngrams, similarity
+
+
+def brute_force(titles, key, threshold):
+    """What best_match must return: the first most similar title over the threshold."""
+    best, best_score = None, 0.0
+    for title in titles:
+        score = similarity(key, title)
+        if score >= threshold and score > best_score:
+            best, best_score = title, score
+    return best, best_score
+
+
+def index_of(titles, threshold=0.8):
+    index = TitleIndex(threshold=threshold)
+    for title in titles:
+        index.add(title, title)
+    return index
+
+
+def test_ngrams_are_padded():
+    assert ngrams("ab") == {"$$a", "$ab", "ab$", "b$$"}
+    assert ngrams("") == {"$$$"}
+
+
+def test_exact_title_scores_one():
+    index = index_of(["anxiouspeople", "americangods"])
+    assert index.best_match("americangods") == ("americangods", 1.0)
+
+
+def test_empty_index():
+    assert TitleIndex().best_match("beartown") == (None, 0.0)
+
+
+def test_threshold_is_inclusive():
+    # "atalefortthetimebeing" vs the same with "anovel" appended scores exactly 0.8
+    short, long = normalize("A Tale for the Time Being"), normalize("A Tale for the Time Being- A Novel")
+    score = similarity(short, long)
+    assert score == pytest.approx(0.8)
+    assert index_of([long], threshold=score).best_match(short) == (long, score)
+    assert index_of([long], threshold=score + 1e-9).best_match(short) == (None, 0.0)
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.6, 0.7, 0.8, 0.9])
+def test_prefix_filter_finds_what_a_full_scan_finds(threshold):
+    titles = [normalize(t) for t in (
+        "Harry Potter and the Chamber of Secrets", "Harry Potter and the Goblet of Fire",
+        "Harry Potter and the Prisoner of Azkaban (Book 3)", "Harry Potter And The Order Of The Phoenix",
+        "American Dirt", "American Dirt 2", "American Gods", "Anna Karenina", "Anxious People- A Novel",
+        "Autobiography of a Yogi", "Four thousand weeks", "How to change your mind", "How to know a person",
+    )]
+    index = index_of(titles, threshold)
+    for key in titles + [normalize(q) for q in (
+        "Harry Potter and the Goblet of Fire!", "Harry Potter", "American Dirt 3", "Anxious People",
+        "How to know people", "Anna Karenin", "Autobiography of a Yogi (Illustrated)", "Zen",
+    )]:
+        assert index.best_match(key) == brute_force(titles, key, threshold)
+
+
+def test_match_exactly_on_the_threshold_is_not_pruned():
+    # 4 shared of 6 + 4 n-grams: 0.8 exactly, where float bounds would skip 4-gram titles
+    assert similarity("abab", "ab") == 0.8
+    assert index_of(["ab"]).best_match("abab") == ("ab", 0.8)
+
+
+@pytest.mark.parametrize("length", [3, 6, 12])
+@pytest.mark.parametrize("threshold", [0.5, 0.6, 0.7, 0.75, 0.8, 0.9])
+def test_prefix_filter_agrees_with_a_full_scan_on_random_titles(length, threshold):
+    # A small alphabet makes many titles share n-grams, and many scores land on the threshold
+    rng = random.Random(length * 100 + int(threshold * 100))
+
+    def title(size):
+        return "".join(rng.choice("abc") for _ in range(max(1, size)))
+
+    titles = list(dict.fromkeys(title(length + rng.randint(-length // 2, length)) for _ in range(120)))
+    index = index_of(titles, threshold)
+    for _ in range(100):
+        key = title(length + rng.randint(-1, 1))
+        assert index.best_match(key) == brute_force(titles, key, threshold)
+
+
+def test_prefix_filter_prunes_candidates():
+    index = index_of([normalize(t) for t in (
+        "Harry Potter and the Chamber of Secrets", "Harry Potter and the Goblet of Fire",
+        "Harry Potter and the Sorcerer's Stone", "Homegoing", "Bad English",
+    )])
+    probed = []
+    postings = index.postings
+
+    class Recording(dict):
+        def get(self, gram, default=None):
+            probed.append(gram)
+            return postings.get(gram, default)
+
+    index.postings = Recording()
+    value, _ = index.best_match(normalize("Harry Potter and the Goblet of Fire"))
+    assert value == "harrypotterandthegobletoffire"
+    # Ranking the query's 31 n-grams by rarity reads each once. A title scoring 0.8 shares at
+    # least 21 of them, so it must hold one of the 11 rarest: only those posting lists are merged
+    query = ngrams("harrypotterandthegobletoffire")
+    assert len(query) == 31
+    assert len(probed) - len(query) == 11
+
+
+def test_ties_go_to_the_first_title_added():
+    # Both differ from the query by one trailing character
+    index = TitleIndex(threshold=0.5)
+    index.add("beartowna", "first")
+    index.add("beartownb", "second")
+    value, score = index.best_match("beartown")
+    assert value == "first"
+    assert score == pytest.approx(similarity("beartown", "beartowna"))
+
+
+def test_fuzzy_match_tolerates_small_differences():
+    index = index_of([normalize("Harry Potter and the Sorcerer's Stone")])
+    assert index.best_match(normalize("Harry Potter and the Sorcerers Stone!"))[0] is not None
+    assert index.best_match(normalize("Harry Potter and the Chamber of Secrets"))[0] is None
+
+
+@pytest.mark.parametrize("title, expected", [
+    ("Anxious People: A Novel", "Anxious People"),
+    ("Anxious People- A Novel", "Anxious People"),
+    ("Clouds (Clarendon Paperbacks)", "Clouds"),
+    ("Harry Potter and the Half-Blood Prince (Book 6)", "Harry Potter and the Half-Blood Prince"),
+    ("Em and The Big Hoom", "Em and The Big Hoom"),
+    ("(Untitled)", "(Untitled)"),
+])
+def test_main_title(title, expected):
+    assert main_title(title) == expected
+
+
+# Pages whose Notion title differs only by a subtitle: too far apart for the 0.8 index
+SUBTITLE_PAIRS = [
+    ("Anxious People", "Anxious People- A Novel.md"),
+    ("Clouds", "Clouds (Clarendon Paperbacks).md"),
+    ("Fear and Trembling", "Fear and Trembling (Penguin Classics).md"),
+    ("David and Goliath", "David and Goliath- Underdogs, Misfits, and the Art of Battling Giants.md"),
+    ("Homegoing: A Novel", "Homegoing.md"),
+]
+
+
+def run_match(tmp_path, filenames, titles):
+    pages_dir = tmp_path / "Books"
+    pages_dir.mkdir()
+    for fname in filenames:
+        (pages_dir / fname).write_text(f"---\ntitle: {fname[:-3]}\n---\n", encoding="utf-8")
+    pages = PageIndex(str(pages_dir))
+    manifest = SyncManifest("books", manifest_dir=str(tmp_path))
+    items = [(title, {"Title": title}) for title in titles]
+    return {title: matched for title, _, matched in match_rows(BOOKS, items, pages, manifest, Counter())}
+
+
+@pytest.mark.parametrize("title, page", SUBTITLE_PAIRS)
+def test_subtitle_variants_below_threshold_still_match(tmp_path, title, page):
+    assert similarity(normalize(title), normalize(page[:-3])) < 0.8
+    assert index_of([normalize(page[:-3])]).best_match(normalize(title)) == (None, 0.0)
+    assert run_match(tmp_path, [page, "Beartown.md"], [title]) == {title: page}
+
+
+def test_different_subtitles_are_different_books(tmp_path):
+    matched = run_match(tmp_path, ["Dune- Part One.md"], ["Dune: Part Two", "Dune"])
+    assert matched == {"Dune: Part Two": None, "Dune": "Dune- Part One.md"}
+
+
+def test_exact_title_wins_over_subtitle_variant(tmp_path):
+    matched = run_match(tmp_path, ["American Dirt.md", "American Dirt- A Novel.md"], ["American Dirt"])
+    assert matched == {"American Dirt": "American Dirt.md"}
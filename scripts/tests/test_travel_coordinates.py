@@ -0,0 +1,122 @@
+"""Tests for where the travel scripts take a page's coordinates from: pins, then photos, then geocoding."""
+
+import pytest
+
+from scripts import assetstore, frontmatter, sync_travel_pages, update_travel_pages
+from scripts.geocache import GeocodeCache
+from scripts.manifest import SyncManifest
+from scripts.pageindex import PageIndex
+from scripts.pagewriter import PageWriter
+from scripts.pipeline import Counter
+
+from .test_photogps import make_jpeg, make_tiff
+
+PINNED = {"Pinned Place": [10.5, 20.5]}
+PHOTOS = ["p0.jpg", "p1.jpg", "p2.jpg"]
+
+
+def no_network(*args):
+    raise AssertionError("geocoded although coordinates were known offline")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = GeocodeCache(str(tmp_path / "geocode.sqlite3"), overrides=PINNED)
+    yield cache
+    cache.close()
+
+
+def write_photos(folder):
+    folder.mkdir(exist_ok=True)
+    # Every photo agrees, so their centroid is Paris whatever the outlier filter does
+    for name in PHOTOS:
+        (folder / name).write_bytes(make_jpeg(make_tiff()))
+
+
+def coordinates_of(path):
+    fm, _ = frontmatter.parse(path.read_text(encoding="utf-8"))
+    return fm.get("coordinates")
+
+
+def test_pinned_cache_entries(cache):
+    assert cache.pinned("pinned place") == (10.5, 20.5)
+    cache.store("Somewhere", (1.0, 2.0))
+    assert cache.pinned("Somewhere") is None
+    assert cache.lookup("Somewhere") == (1.0, 2.0)
+
+
+def test_update_prefers_the_pin_over_the_photos(tmp_path, cache):
+    travel = tmp_path / "travel"
+    write_photos(travel)
+    body = "".join(f"![]({name})\n" for name in PHOTOS)
+    for name in ("Pinned Place", "Louvre"):
+        (travel / f"{name}.md").write_text(f"---\ntitle: {name}\n---\n{body}", encoding="utf-8")
+
+    manifest = SyncManifest("travel-update", manifest_dir=str(tmp_path / "manifests"))
+    with PageWriter() as writer:
+        for name in ("Pinned Place", "Louvre"):
+            update_travel_pages.process_file(str(travel / f"{name}.md"), f"{name}.md", cache, manifest,
+                                             writer, no_network)
+
+    assert coordinates_of(travel / "Pinned Place.md") == [10.5, 20.5]
+    lat, lng = coordinates_of(travel / "Louvre.md")
+    assert (lat, lng) == pytest.approx((48.8567, 2.3522), abs=1e-4)
+
+
+def test_sync_prefers_the_pin_over_the_photos(tmp_path, cache, monkeypatch):
+    travel, assets = tmp_path / "travel", tmp_path / "assets"
+    travel.mkdir()
+    write_photos(assets)
+    monkeypatch.setattr(sync_travel_pages, "QUARTZ_TRAVEL", str(travel))
+    monkeypatch.setattr(sync_travel_pages, "QUARTZ_ASSETS", str(assets))
+    monkeypatch.setattr(sync_travel_pages.clients, "geocode_cache", lambda: cache)
+    monkeypatch.setattr(sync_travel_pages, "AssetStore",
+                        lambda folder: assetstore.AssetStore(folder, index_path=None))
+    # Both pages embed the same photos, taken in Paris
+    monkeypatch.setattr(sync_travel_pages, "collect_page_content", lambda name, store, export: ("", PHOTOS))
+    monkeypatch.setattr(sync_travel_pages, "geocode_place", no_network)
+
+    pages = PageIndex(str(travel), keys=("title", "Date", "coordinates"))
+    manifest = SyncManifest("travel-sync", manifest_dir=str(tmp_path / "manifests"))
+    stats = Counter()
+    actions = [("create", name, {"Name": name}, None, "", "") for name in ("Pinned Place", "Louvre")]
+    with PageWriter() as writer:
+        sync_travel_pages.apply_entries(actions, pages, manifest, writer, None, stats)
+
+    assert coordinates_of(travel / "Pinned Place.md") == [10.5, 20.5]
+    lat, lng = coordinates_of(travel / "Louvre.md")
+    assert (lat, lng) == pytest.approx((48.8567, 2.3522), abs=1e-4)
+    assert (stats["pinned"], stats["from_photos"], stats["created"]) == (1, 1, 2)
+
+
+def test_sync_builds_one_geocoder_per_run(tmp_path, cache, monkeypatch):
+    travel, assets = tmp_path / "travel", tmp_path / "assets"
+    travel.mkdir()
+    assets.mkdir()
+    built = []
+
+    def geocoder(*args, **kwargs):
+        built.append(kwargs)
+        return lambda query: (len(query), 1.0)
+
+    monkeypatch.setattr(sync_travel_pages, "QUARTZ_TRAVEL", str(travel))
+    monkeypatch.setattr(sync_travel_pages, "QUARTZ_ASSETS", str(assets))
+    monkeypatch.setattr(sync_travel_pages.clients, "geocode_cache", lambda: cache)
+    monkeypatch.setattr(sync_travel_pages.clients, "gazetteer", lambda: None)
+    monkeypatch.setattr(sync_travel_pages.clients, "geolocator", object)
+    monkeypatch.setattr(sync_travel_pages, "StructuredGeocoder", geocoder)
+    monkeypatch.setattr(sync_travel_pages, "AssetStore",
+                        lambda folder: assetstore.AssetStore(folder, index_path=None))
+    monkeypatch.setattr(sync_travel_pages, "collect_page_content", lambda name, store, export: ("", []))
+
+    pages = PageIndex(str(travel), keys=("title", "Date", "coordinates"))
+    manifest = SyncManifest("travel-sync", manifest_dir=str(tmp_path / "manifests"))
+    stats = Counter()
+    actions = [("create", name, {"Name": name}, None, "", "") for name in ("Porto", "Lisbon", "Faro")]
+    with PageWriter() as writer:
+        sync_travel_pages.apply_entries(actions, pages, manifest, writer, None, stats)
+
+    assert len(built) == 1
+    assert [coordinates_of(travel / f"{name}.md") for name in ("Porto", "Lisbon", "Faro")] == [
+        [5, 1.0], [6, 1.0], [4, 1.0]]
+    assert cache.lookup("Lisbon") == (6, 1.0)
@@ -0,0 +1,82 @@
+"""
+Fuzzy title matching with a character n-gram inverted index.
+
+Titles are compared by the Dice coefficient of their n-gram sets. Lookups
+only probe the rarest n-grams of the query (prefix filtering), so a match
+touches a handful of posting lists instead of every title in the library.
+"""
+
+import math
+import re
+from collections import defaultdict
+from fractions import Fraction
+
+# Start of a subtitle or edition note: "Anxious People: A Novel", "Anxious People- A Novel"
+# (page names replace ":" with "-"), "Clouds (Clarendon Paperbacks)"; not "Half-Blood"
+SUBTITLE = re.compile(r'\s*(?::|\s?[-\u2013\u2014]\s|\().*$', re.S)
+
+
+def ngrams(s, n=3):
+    """Set of character n-grams of s, padded so short strings still have some."""
+    padded = f"{'$' * (n - 1)}{s}{'$' * (n - 1)}"
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def similarity(a, b, n=3):
+    """Dice coefficient of the n-gram sets of a and b, as best_match scores titles."""
+    a, b = ngrams(a, n), ngrams(b, n)
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def main_title(title):
+    """Title without its subtitle or parenthesised edition note."""
+    return SUBTITLE.sub("", title).strip() or title
+
+
+class TitleIndex:
+    """Map normalized titles to values and find the closest title above a threshold."""
+
+    def __init__(self, n=3, threshold=0.8):
+        self.n = n
+        self.threshold = threshold
+        self.grams = []
+        self.values = []
+        self.postings = defaultdict(list)
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, key, value):
+        grams = ngrams(key, self.n)
+        idx = len(self.values)
+        self.grams.append(grams)
+        self.values.append(value)
+        for g in grams:
+            self.postings[g].append(idx)
+
+    def best_match(self, key):
+        """Return (value, score) of the most similar title, or (None, 0.0) if none reach the threshold."""
+        query = ngrams(key, self.n)
+        # The threshold as the decimal it was written as (0.8 is 4/5), so bounds and scores that
+        # land exactly on it are not pushed over by float rounding
+        t = Fraction(str(self.threshold))
+        # Dice >= t needs at least this many shared n-grams with even the shortest admissible title
+        min_len = math.ceil(len(query) * t / (2 - t))
+        min_overlap = math.ceil(t * (len(query) + min_len) / 2)
+        # Any qualifying title must share at least one of the rarest (|query| - min_overlap + 1) n-grams
+        probe = sorted(query, key=lambda g: len(self.postings.get(g, ())))
+        probe = probe[:max(1, len(query) - min_overlap + 1)]
+
+        candidates = set()
+        for g in probe:
+            candidates.update(self.postings.get(g, ()))
+
+        # In insertion order, so of equally similar titles the first added wins
+        best, best_score = None, 0.0
+        for idx in sorted(candidates):
+            grams = self.grams[idx]
+            shared, total = len(query & grams), len(query) + len(grams)
+            score = 2 * shared / total
+            if 2 * shared * t.denominator >= t.numerator * total and score > best_score:
+                best, best_score = self.values[idx], score
+        return best, best_score
@@ -0,0 +1,284 @@
+"""
+Watch mode: sync Notion exports as they land in the drop folder.
+
+The process stays up between exports, so the sync modules are imported,
+the geocode cache is open, HTTP connections stay alive and the manifests
+stay in memory; each new or changed export only pays for its own delta
+(rows unchanged since the last sync are skipped by the manifests).
+
+- Linux: woken by inotify on the drop folder; elsewhere the folder is
+  polled every POLL_S seconds
+- an export (.zip, .csv or unpacked folder) is synced once it has stopped
+  changing for SETTLE_S seconds, so half-downloaded files are left alone
+- the databases it holds decide what runs: Books, Movies and Short
+  Stories go through the library sync, Travel log through travel-sync;
+  the collection index is refreshed afterwards
+- while pages are written, content/.sync-in-progress holds back Quartz's
+  `--serve` rebuilds, so a delta lands as one rebuild instead of several
+
+Exports already in the folder when watching starts are not synced.
+
+Run with: python -m scripts watch [--drop-dir DIR]
+"""
+
+import ctypes
+import os
+import select
+import time
+import traceback
+import zipfile
+from contextlib import contextmanager
+from functools import partial
+
+from . import build_collection_index, clients, config, metrics, sync_library, sync_travel_pages
+from .manifest import SyncManifest
+from .notionexport import NotionExport, clean_name
+
+DROP_DIR = config.NOTION_DROP_DIR
+# Quartz's watcher waits for this file to go away before rebuilding (see quartz/build.ts)
+SYNC_MARKER = os.path.join(config.CONTENT_DIR, ".sync-in-progress")
+
+# Quartz's watcher reports a write only once the file has been stable for its
+# awaitWriteFinish.stabilityThreshold (250 ms, polled every 100 ms), so the marker
+# stays this long after the last write for those delayed events to be held too
+MARKER_LINGER_S = 1.0
+
+# An export is synced once it has been unchanged this long
+SETTLE_S = 1.0
+# Polling interval without inotify; with it, the folder is still rescanned this often
+# (inotify only sees the top level, not files changing inside an unpacked export)
+POLL_S = 2.0
+RESCAN_S = 60.0
+
+# Browser placeholders for downloads in progress
+PARTIAL_SUFFIXES = (".crdownload", ".part", ".download", ".tmp")
+
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+INOTIFY_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+class InotifyWaiter:
+    """Wakes up on changes directly inside a folder, using Linux inotify through libc."""
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), INOTIFY_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+
+    def wait(self, timeout):
+        """Block until something changes or timeout seconds pass."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if readable:
+            # The events only wake us up; the folder is rescanned either way
+            try:
+                while os.read(self.fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollWaiter:
+    """Fallback where inotify is unavailable (e.g. macOS)."""
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, POLL_S))
+
+    def close(self):
+        pass
+
+
+def open_waiter(path):
+    """Return (waiter, description): inotify if the platform has it, else polling."""
+    try:
+        return InotifyWaiter(path), "inotify"
+    except (OSError, AttributeError):  # AttributeError: no inotify in this libc
+        return PollWaiter(), f"polling every {POLL_S:g}s"
+
+
+def is_export(path):
+    name = os.path.basename(path)
+    if name.startswith(".") or name.endswith(PARTIAL_SUFFIXES):
+        return False
+    return os.path.isdir(path) or name.lower().endswith((".zip", ".csv"))
+
+
+def signature(path):
+    """(files, bytes, newest mtime) of an export file or folder; changes while it is still landing."""
+    if not os.path.isdir(path):
+        st = os.stat(path)
+        return 1, st.st_size, st.st_mtime_ns
+    files = size = newest = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                st = os.stat(os.path.join(dirpath, filename))
+            except FileNotFoundError:
+                continue
+            files += 1
+            size += st.st_size
+            newest = max(newest, st.st_mtime_ns)
+    return files, size, newest
+
+
+def scan(drop_dir):
+    """{path: signature} of the exports in the drop folder."""
+    exports = {}
+    for name in os.listdir(drop_dir):
+        path = os.path.join(drop_dir, name)
+        if is_export(path):
+            try:
+                exports[path] = signature(path)
+            except FileNotFoundError:
+                continue
+    return exports
+
+
+def csv_database(path):
+    """Database a separately exported CSV belongs to: "Books 6101..._all.csv" -> "Books"."""
+    stem = os.path.splitext(clean_name(os.path.basename(path)))[0]
+    return stem[:-len("_all")] if stem.endswith("_all") else stem
+
+
+def export_jobs(path, dry_run=False):
+    """[(name, sync)] for the databases an export holds; empty if it holds none that are synced."""
+    collections = sync_library.COLLECTIONS.values()
+    jobs = []
+    if path.lower().endswith(".csv"):
+        database = csv_database(path)
+        for collection in collections:
+            if collection.database == database:
+                jobs.append((collection.name, partial(sync_library.main, [collection.name],
+                                                      csv_paths={collection.name: path}, dry_run=dry_run)))
+        if database == config.NOTION_TRAVEL_DATABASE:
+            jobs.append(("travel-sync", partial(sync_travel_pages.main, csv_path=path, dry_run=dry_run)))
+        return jobs
+
+    export = NotionExport(path)
+    try:
+        names = [c.name for c in collections if export.find_csv(c.database)]
+        travel = export.find_csv(config.NOTION_TRAVEL_DATABASE) is not None
+    finally:
+        export.close()
+    if names:
+        jobs.append(("library", partial(sync_library.main, names, dry_run=dry_run, export_path=path)))
+    if travel:
+        jobs.append(("travel-sync", partial(sync_travel_pages.main, dry_run=dry_run, export_path=path)))
+    return jobs
+
+
+@contextmanager
+def holding_rebuilds():
+    """Keep Quartz --serve from rebuilding until every page of a delta is written.
+
+    The marker holds this process's pid, so Quartz ignores a marker left behind by a crash.
+    It is removed MARKER_LINGER_S after the last write, once Quartz has seen every change.
+    """
+    with open(SYNC_MARKER, "w", encoding="utf-8") as f:
+        f.write(str(os.getpid()))
+    try:
+        yield
+    finally:
+        time.sleep(MARKER_LINGER_S)
+        try:
+            os.remove(SYNC_MARKER)
+        except FileNotFoundError:
+            pass
+
+
+def run_job(name, job):
+    """Run one sync with its own run report, as `python -m scripts` does per command."""
+    report = metrics.start(name)
+    try:
+        job()
+    finally:
+        report.finish()
+        print(f"\n{report.summary()}\n  (report: {report.save()})")
+
+
+def sync_export(path, dry_run=False):
+    """Apply one new or changed export. Failures are reported and the watch goes on."""
+    name = os.path.basename(path)
+    try:
+        jobs = export_jobs(path, dry_run)
+    except (OSError, zipfile.BadZipFile) as e:
+        print(f"Skipping {name}: {e}")
+        return
+    if not jobs:
+        print(f"Skipping {name}: no synced Notion database in it")
+        return
+
+    print(f"\n===== {name} ({time.strftime('%H:%M:%S')}) =====")
+    start = time.perf_counter()
+    try:
+        if dry_run:
+            for job_name, job in jobs:
+                print(f"\n##### {job_name} #####")
+                run_job(job_name, job)
+        else:
+            with holding_rebuilds():
+                for job_name, job in jobs:
+                    print(f"\n##### {job_name} #####")
+                    run_job(job_name, job)
+                print("\n##### index #####")
+                run_job("index", build_collection_index.main)
+    except SystemExit as e:
+        print(f"Sync of {name} stopped: {e}")
+    except Exception:
+        traceback.print_exc()
+        print(f"Sync of {name} failed; waiting for the next export")
+    else:
+        print(f"\nSynced {name} in {time.perf_counter() - start:.2f}s")
+
+
+def warm_up():
+    """Open what every sync needs up front: the geocode cache and the manifests."""
+    clients.geocode_cache()
+    for name in (*sync_library.COLLECTIONS, "travel-sync"):
+        SyncManifest.shared(name)
+
+
+def main(drop_dir=None, dry_run=False):
+    drop_dir = drop_dir or DROP_DIR
+    if not os.path.isdir(drop_dir):
+        raise SystemExit(f"Drop folder not found: {drop_dir}")
+    warm_up()
+    waiter, how = open_waiter(drop_dir)
+    synced = scan(drop_dir)
+    print(f"Watching {drop_dir} ({how}); {len(synced)} exports already there are left alone. Ctrl-C to stop.")
+
+    changing = {}  # path -> (signature, when it was last seen changing)
+    try:
+        while True:
+            waiter.wait(SETTLE_S if changing else RESCAN_S)
+            now = time.monotonic()
+            current = scan(drop_dir)
+            for path in set(synced) - set(current):
+                del synced[path]
+            for path in set(changing) - set(current):
+                del changing[path]
+            for path, sig in current.items():
+                if synced.get(path) == sig:
+                    changing.pop(path, None)
+                elif path not in changing or changing[path][0] != sig:
+                    changing[path] = (sig, now)
+
+            settled = [p for p, (_, since) in changing.items() if now - since >= SETTLE_S]
+            for path in sorted(settled, key=lambda p: changing[p][1]):
+                synced[path] = changing.pop(path)[0]
+                sync_export(path, dry_run)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        waiter.close()